@@ -0,0 +1,5 @@
+"""Runs the simulations: `python -m jonkal` prompts, `python -m jonkal simulate ...` does not"""
+
+from .engine import run
+
+run()
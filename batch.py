@@ -0,0 +1,226 @@
+"""
+A numpy batch engine that plays many games of Kalaha in lockstep
+Actions include:
+    BatchGame: holds N games as a single (N, 2 * (bowls + 1)) integer array and advances
+        every active game by one ply per step using vectorized sowing, captures and extra turns
+    moves chosen for every game at once through the choose_batch of the strategies registered
+        in strategies.py
+
+The rules mirror interface.Player._move exactly, quirks included, so that a BatchGame fed
+the same moves as an interface.Game finishes with the same board and the same winner
+"""
+import numpy as np
+
+from .geometry import shared_geometry
+from .strategies import get_strategy
+
+# codes used in BatchGame.winner
+DRAW = 0
+PLAYER1 = 1
+PLAYER2 = 2
+
+
+class BatchGame:
+    """
+    Plays N games of the same geometry at once. Column layout of the pits array follows
+    interface.Board: player1's bowls, player1's nest, player2's bowls, player2's nest
+    """
+
+    def __init__(self, games, beads_per_bowl, num_of_bowls_per_player=6):
+        """
+        :param games: number of games to play in lockstep
+        :param beads_per_bowl: denotes the number of beads in each bowl at the start of game
+        :param num_of_bowls_per_player: denotes number of bowls excluding nest usually six
+        """
+        n = num_of_bowls_per_player
+        self.games = games
+        self.bowls_per_player = n
+        self.nests = np.array([n, 2 * n + 1])
+        self.pits = np.full((games, 2 * (n + 1)), beads_per_bowl, dtype=np.int32)
+        self.pits[:, self.nests] = 0
+
+        # the sowing tables of geometry.py, one row per player: the sowing order (every column
+        # except the opponent's nest), the position of every column on it, and the landing column
+        # for every (start column, beads % ring_size)
+        geometries = [shared_geometry(n, player) for player in range(2)]
+        self.ring_size = 2 * n + 1
+        self.ring_cols = np.array([geometry.path for geometry in geometries], dtype=np.int64)
+        self.ring_pos = np.array([geometry.position for geometry in geometries], dtype=np.int64)
+        self.landing = np.zeros((2, 2 * (n + 1), self.ring_size), dtype=np.int64)
+        for player, geometry in enumerate(geometries):
+            start = geometry.own_start
+            self.landing[player, start:start + n] = np.reshape(geometry.landing, (n, self.ring_size))
+        self.opposite = np.array(geometries[0].opposite, dtype=np.int64)
+
+        self.to_move = np.zeros(games, dtype=np.int8)  # 0 for player1, 1 for player2
+        # games in the middle of an extra turn whose nest may still forfeit its single bead
+        self.pending = np.zeros(games, dtype=bool)
+        self.active = np.ones(games, dtype=bool)
+        self.winner = np.full(games, DRAW, dtype=np.int8)
+        self.scores = np.zeros((games, 2), dtype=np.int32)
+        self.plies = np.zeros(games, dtype=np.int32)
+        self.extra_turns = np.zeros(games, dtype=np.int32)
+
+    def __repr__(self):
+        return "<BatchGame games: %d; active: %d; bowls_per_player: %d>" % \
+               (self.games, int(self.active.sum()), self.bowls_per_player)
+
+    def side_beads(self, rows=None):
+        """
+        :param rows: optional array of game indices, all games by default
+        :return: (len(rows), 2) array with the beads in each player's ordinary bowls
+        """
+        n = self.bowls_per_player
+        pits = self.pits if rows is None else self.pits[rows]
+        return np.stack([pits[:, :n].sum(axis=1), pits[:, n + 1:2 * n + 1].sum(axis=1)], axis=1)
+
+    def legal_mask(self):
+        """
+        :return: (N, bowls_per_player) boolean array; True where the player to move
+        may start sowing from that bowl (relative to the start of their own side)
+        """
+        n = self.bowls_per_player
+        offsets = (self.to_move.astype(np.int64) * (n + 1))[:, None] + np.arange(n)
+        own = np.take_along_axis(self.pits, offsets, axis=1)
+        return (own > 0) & self.active[:, None]
+
+    def step(self, moves):
+        """
+        :param moves: array of N absolute pit indices, one per game; entries for finished
+            games are ignored
+        Plays one ply in every active game, i.e a single sowing by the player to move
+        """
+        moves = np.asarray(moves, dtype=np.int64)
+        rows = np.flatnonzero(self.active)
+        if not len(rows):
+            return
+        pits = self.pits
+        player = self.to_move[rows].astype(np.int64)
+        start = moves[rows]
+        nest = self.nests[player]
+
+        beads = pits[rows, start].astype(np.int64)
+        pits[rows, start] = 0
+
+        # whole laps go to every pit on the ring, the remainder to the pits right after start
+        laps, rem = np.divmod(beads, self.ring_size)
+        start_pos = self.ring_pos[player, start]
+        offset = (np.arange(self.ring_size) - start_pos[:, None] - 1) % self.ring_size
+        pits[rows[:, None], self.ring_cols[player]] += (laps[:, None] + (offset < rem[:, None])).astype(np.int32)
+
+        landing = self.landing[player, start, rem]
+        distance = nest - start
+
+        # finishing in an empty bowl on one's own side, before passing the nest, captures
+        capture = (beads > 0) & (beads < distance) & (pits[rows, landing] == 1)
+        if capture.any():
+            c_rows, c_landing, c_nest = rows[capture], landing[capture], nest[capture]
+            opposite = self.opposite[c_landing]
+            pits[c_rows, c_nest] += pits[c_rows, opposite] + 1
+            pits[c_rows, c_landing] = 0
+            pits[c_rows, opposite] = 0
+
+        # the move that ended in an empty nest has finished its extra turn; a nest still holding
+        # just that one bead loses it, as interface.Player._move does after the recursive move
+        if self.pending[rows].any():
+            done = self.pending[rows]
+            d_rows = rows[done]
+            lost = pits[d_rows, nest[done]] == 1
+            pits[d_rows[lost], nest[done][lost]] = 0
+            self.pending[d_rows] = False
+
+        extra = (beads == distance) & (pits[rows, nest] == 1)
+        self.plies[rows] += 1
+        self.extra_turns[rows] += extra
+        self.pending[rows[extra]] = True
+
+        sides = self.side_beads(rows)
+        mover_empty = sides[np.arange(len(rows)), player] == 0
+        other_empty = sides[np.arange(len(rows)), 1 - player] == 0
+
+        # an extra turn with nothing left to sow ends the game straight away
+        stuck = extra & mover_empty
+        if stuck.any():
+            s_rows, s_nest = rows[stuck], nest[stuck]
+            lost = pits[s_rows, s_nest] == 1
+            pits[s_rows[lost], s_nest[lost]] = 0
+            self.pending[s_rows] = False
+
+        self._finish(rows[mover_empty], player[mover_empty])
+        passing = ~mover_empty & ~extra
+        self._finish(rows[passing & other_empty], 1 - player[passing & other_empty])
+        still = passing & ~other_empty
+        self.to_move[rows[still]] = 1 - self.to_move[rows[still]]
+
+    def _finish(self, rows, ender):
+        """
+        :param rows: games that have just ended
+        :param ender: for each game the player who has run out of legal moves
+        Settles the score exactly as interface.Game.determine_winner does
+        """
+        if not len(rows):
+            return
+        n = self.bowls_per_player
+        other = 1 - ender
+        sides = self.side_beads(rows)
+        index = np.arange(len(rows))
+        ender_score = self.pits[rows, self.nests[ender]] + sides[index, ender] + sides[index, other]
+        other_score = self.pits[rows, self.nests[other]]
+        # the player who did not end the game has their bowls emptied
+        cols = (other * (n + 1))[:, None] + np.arange(n)
+        self.pits[rows[:, None], cols] = 0
+
+        self.scores[rows, ender] = ender_score
+        self.scores[rows, other] = other_score
+        self.winner[rows] = np.where(ender_score > other_score, ender + 1,
+                                     np.where(other_score > ender_score, other + 1, DRAW))
+        self.active[rows] = False
+        self.pending[rows] = False
+
+    def choose_moves(self, player1_strat, player2_strat, rng):
+        """
+        :param player1_strat: strategy id for player1, see strategies.py
+        :param player2_strat: strategy id for player2
+        :param rng: a numpy Generator used for random tie-breaking
+        :return: array of N absolute pit indices, picked per active game by the player to move
+            and -1 for the finished ones
+        """
+        moves = np.full(self.games, -1, dtype=np.int64)
+        for side, strategy_id in enumerate((player1_strat, player2_strat)):
+            rows = np.flatnonzero(self.active & (self.to_move == side))
+            if len(rows):
+                moves[rows] = get_strategy(strategy_id).choose_batch(self.pits[rows], self.to_move[rows], rng,
+                                                                     self.pending[rows])
+        return moves
+
+    def run(self, player1_strat, player2_strat, rng=None, max_plies=None, collector=None):
+        """
+        :param player1_strat: strategy id for player1, see strategies.py; 1 and 2 are vectorized,
+            the others play one board at a time
+        :param player2_strat: strategy id for player2
+        :param rng: a numpy Generator, a fresh unseeded one by default
+        :param max_plies: optional safety bound on the number of steps
+        :param collector: optional positions.PositionCollector given the position of every
+            active game before each ply
+        Plays every game to completion
+        """
+        rng = np.random.default_rng() if rng is None else rng
+        if collector is not None:
+            from .positions import encode_batch
+        steps = 0
+        while self.active.any() and (max_plies is None or steps < max_plies):
+            if collector is not None:
+                active = self.active
+                collector.add_batch(steps, encode_batch(self.pits[active], self.to_move[active], self.pending[active]))
+            self.step(self.choose_moves(player1_strat, player2_strat, rng))
+            steps += 1
+        return self
+
+
+def play_batch(games, beads_per_bowl, player1_strat, player2_strat, rng=None, num_of_bowls_per_player=6,
+               collector=None):
+    """
+    used to create and run a BatchGame
+    """
+    batch = BatchGame(games, beads_per_bowl, num_of_bowls_per_player)
+    return batch.run(player1_strat, player2_strat, rng, collector=collector)
@@ -0,0 +1,258 @@
+"""
+Benchmarks of the game engine, to catch slowdowns before they reach long sweeps
+Actions include:
+    timing Game.run, Player._move, Player.get_starting_index and the engine simulation loop
+    sweeping strategy pairs, beads per bowl and board sizes
+    reporting games per second, nanoseconds per move and peak traced memory as JSON
+    comparing a run against a saved baseline and flagging the regressions
+
+Run with `python -m jonkal.bench --output bench.json`, later
+`python -m jonkal.bench --compare bench.json` exits with status 1 on a regression.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from .engine import simulate
+from .interface import Game, create_board, create_player
+
+STRATEGY_PAIRS = ((1, 1), (1, 2), (2, 1), (2, 2))
+BEADS = (3, 4, 5, 6)
+BOWLS = (4, 6, 8)
+DEFAULT_THRESHOLD = 0.10
+# whether a larger value of a metric is better; metrics missing here are not compared
+HIGHER_IS_BETTER = {'games_per_second': True, 'calls_per_second': True,
+                    'ns_per_move': False, 'ns_per_call': False, 'peak_kib': False}
+
+
+def best_of(function, repeat):
+    """
+    :param function: callable timed without arguments
+    :param repeat: number of timings
+    :returns: the fastest of repeat timings in nanoseconds, the least disturbed by the system
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        function()
+        elapsed = time.perf_counter_ns() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_kib(function):
+    """:returns: peak memory traced by tracemalloc while function runs, in KiB"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def sample_positions(beads_per_bowl, num_of_bowls_per_player, count, seed=0):
+    """
+    :returns: list of (pits, sums, side) snapshots taken before every turn of random games,
+        count of them, to time single calls on realistic positions
+    """
+    random.seed(seed)
+    positions = []
+    while len(positions) < count:
+        board = create_board(beads_per_bowl, num_of_bowls_per_player)
+        players = (create_player('player1', board, 1), create_player('player2', board, 1))
+        turn = 0
+        while len(positions) < count:
+            player = players[turn % 2]
+            positions.append((board.pits[:], board.sums[:], player.side))
+            if not player.move():
+                break
+            turn += 1
+    return positions
+
+
+def bench_game_run(beads_per_bowl, num_of_bowls_per_player, player1_strat, player2_strat, games,
+                   repeat=3, seed=0):
+    """times Game.run over games whole games"""
+    turns = []
+
+    def play():
+        random.seed(seed)
+        del turns[:]
+        for _ in range(games):
+            game = Game(beads_per_bowl, player1_strat, player2_strat,
+                        num_of_bowls_per_player=num_of_bowls_per_player)
+            game.run()
+            turns.append(game.turns)
+
+    elapsed = best_of(play, repeat)
+    return {'games': games, 'games_per_second': games * 1e9 / elapsed,
+            'ns_per_move': elapsed / sum(turns), 'peak_kib': peak_kib(play)}
+
+
+def bench_calls(positions, beads_per_bowl, num_of_bowls_per_player, call, repeat=3, strategies=(1, 2)):
+    """
+    :param call: function(players, side) making the call timed on each position
+    :param strategies: strategies of player1 and player2
+    times call once per position; restoring the position is timed on its own and taken off
+    """
+    board = create_board(beads_per_bowl, num_of_bowls_per_player)
+    players = (create_player('player1', board, strategies[0]), create_player('player2', board, strategies[1]))
+    pits, sums = board.pits, board.sums
+
+    def restore_only():
+        for position_pits, position_sums, side in positions:
+            pits[:] = position_pits
+            sums[:] = position_sums
+
+    def restore_and_call():
+        for position_pits, position_sums, side in positions:
+            pits[:] = position_pits
+            sums[:] = position_sums
+            call(players, side)
+
+    elapsed = max(best_of(restore_and_call, repeat) - best_of(restore_only, repeat), 1)
+    return {'calls': len(positions), 'calls_per_second': len(positions) * 1e9 / elapsed,
+            'ns_per_call': elapsed / len(positions), 'peak_kib': peak_kib(restore_and_call)}
+
+
+def bench_move(beads_per_bowl, num_of_bowls_per_player, count, repeat=3):
+    """times Player._move from the bowl a random player would pick"""
+    positions = []
+    for position_pits, position_sums, side in sample_positions(beads_per_bowl, num_of_bowls_per_player, count):
+        start = side * (num_of_bowls_per_player + 1)
+        bowls = [index for index in range(start, start + num_of_bowls_per_player) if position_pits[index]]
+        if bowls:
+            positions.append((position_pits, position_sums, bowls[len(bowls) // 2]))
+    return bench_calls(positions, beads_per_bowl, num_of_bowls_per_player,
+                       lambda players, start: players[start > num_of_bowls_per_player]._move(start), repeat)
+
+
+def bench_starting_index(beads_per_bowl, num_of_bowls_per_player, strategy, count, repeat=3):
+    """times Player.get_starting_index of strategy 1 or 2, played by the side to move of each position"""
+    positions = sample_positions(beads_per_bowl, num_of_bowls_per_player, count)
+    return bench_calls(positions, beads_per_bowl, num_of_bowls_per_player,
+                       lambda players, side: players[side].get_starting_index(), repeat, (strategy, strategy))
+
+
+def bench_engine(beads_per_bowl, player1_strat, player2_strat, games, repeat=3, seed=0):
+    """times engine.simulate, the loop behind the command line, in this process without a plot"""
+    turns = []
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            tally = simulate(games, beads_per_bowl, player1_strat, player2_strat, workers=1, seed=seed,
+                             plot_path=None)
+        turns[:] = [tally.turns.mean * tally.games]
+
+    elapsed = best_of(run, repeat)
+    return {'games': games, 'games_per_second': games * 1e9 / elapsed,
+            'ns_per_move': elapsed / turns[0], 'peak_kib': peak_kib(run)}
+
+
+def run_suite(games=200, calls=2000, repeat=3, beads=BEADS, bowls=BOWLS, pairs=STRATEGY_PAIRS, log=None):
+    """
+    :param games: games per Game.run and engine benchmark
+    :param calls: positions per Player._move and get_starting_index benchmark
+    :param log: optional file receiving a line per finished benchmark
+    :returns: dict with the machine details under 'meta' and one entry per benchmark under 'results'
+    """
+    results = {}
+
+    def record(name, result):
+        results[name] = result
+        if log is not None:
+            print("{:<40} {}".format(name, ", ".join("{} {:.1f}".format(key, value)
+                                                       for key, value in sorted(result.items()))), file=log)
+
+    for num_of_bowls_per_player in bowls:
+        for beads_per_bowl in beads:
+            for player1_strat, player2_strat in pairs:
+                record('game_run/s{}{}/beads{}/bowls{}'.format(player1_strat, player2_strat, beads_per_bowl,
+                                                                num_of_bowls_per_player),
+                       bench_game_run(beads_per_bowl, num_of_bowls_per_player, player1_strat, player2_strat,
+                                      games, repeat))
+            record('move/beads{}/bowls{}'.format(beads_per_bowl, num_of_bowls_per_player),
+                   bench_move(beads_per_bowl, num_of_bowls_per_player, calls, repeat))
+            for strategy in (1, 2):
+                record('starting_index/s{}/beads{}/bowls{}'.format(strategy, beads_per_bowl, num_of_bowls_per_player),
+                       bench_starting_index(beads_per_bowl, num_of_bowls_per_player, strategy, calls, repeat))
+    # the engine always plays on the standard board
+    for beads_per_bowl in beads:
+        for player1_strat, player2_strat in pairs:
+            record('engine/s{}{}/beads{}'.format(player1_strat, player2_strat, beads_per_bowl),
+                   bench_engine(beads_per_bowl, player1_strat, player2_strat, games, repeat))
+    meta = {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'games': games, 'calls': calls, 'repeat': repeat}
+    return {'meta': meta, 'results': results}
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    :param baseline: a run_suite() result, as loaded from its JSON file
+    :param current: the run_suite() result to check
+    :param threshold: relative change tolerated, 0.10 lets a metric get 10% worse
+    :returns: list of (benchmark, metric, baseline value, current value, change) for every
+        metric that got worse by more than threshold; change is relative, positive means worse
+    """
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        for metric, value in sorted(result.items()):
+            if metric not in HIGHER_IS_BETTER or not reference.get(metric):
+                continue
+            before = reference[metric]
+            change = (before - value) / before if HIGHER_IS_BETTER[metric] else (value - before) / before
+            if change > threshold:
+                regressions.append((name, metric, before, value, change))
+    return regressions
+
+
+def main(argv=None):
+    """
+    :param argv: command line arguments, sys.argv[1:] by default
+    :returns: exit status, 1 when comparing found a regression
+    """
+    parser = argparse.ArgumentParser(prog='jonkal.bench', description='Kalaha engine benchmarks')
+    parser.add_argument('--output', help='JSON file the results are written to')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON file of an earlier run to check against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='relative slowdown flagged as a regression, 0.10 by default')
+    parser.add_argument('--games', type=int, default=200, help='games per game and engine benchmark')
+    parser.add_argument('--calls', type=int, default=2000, help='positions per call benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='timings per benchmark, the best is kept')
+    parser.add_argument('--quick', action='store_true', help='standard board and 4 beads only')
+    args = parser.parse_args(argv)
+
+    sweep = {'beads': (4,), 'bowls': (6,)} if args.quick else {}
+    report = run_suite(args.games, args.calls, args.repeat, log=sys.stderr, **sweep)
+    if args.output:
+        temporary = args.output + '.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(report, handle, indent=1, sort_keys=True)
+        os.replace(temporary, args.output)
+    else:
+        json.dump(report, sys.stdout, indent=1, sort_keys=True)
+        print()
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        regressions = compare(baseline, report, args.threshold)
+        for name, metric, before, value, change in regressions:
+            print("REGRESSION {} {}: {:.1f} -> {:.1f} ({:+.0%})".format(name, metric, before, value, change),
+                  file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
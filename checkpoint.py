@@ -0,0 +1,137 @@
+"""
+Checkpoints of long runs, so a preempted run resumes where it stopped
+Actions include:
+    Checkpoint: a file holding the tally of the chunks played so far, which chunks those are and
+        the run they belong to, rewritten atomically at most every interval seconds
+    DoneChunks: the indices of the chunks played, kept as a count of leading chunks plus the few
+        finished out of order
+
+The random state of a chunk is its seed, drawn from the entropy of the run (see
+parallel.chunk_seeds), so the settings, the entropy and the chunks already played are the whole
+state of a run: a resumed run rebuilds its chunks from them and plays exactly the missing ones,
+with the streams an uninterrupted run would have given them. Nothing in a checkpoint grows with
+the number of chunks.
+"""
+import os
+import pickle
+import time
+
+from .fingerprint import code_version
+from .results import Tally
+
+VERSION = 2
+
+
+class DoneChunks:
+    """
+    A set of chunk indices that is small whatever the number of chunks: chunks finish roughly in
+    order, so all but those of the last few tasks of each worker are counted by prefix
+    """
+
+    def __init__(self, prefix=0, others=()):
+        """
+        :param prefix: chunks 0 to prefix - 1 are done
+        :param others: indices of the chunks done after prefix
+        """
+        self.prefix = prefix
+        self.others = set(others)
+
+    def __repr__(self):
+        return "<DoneChunks prefix: %d; others: %d>" % (self.prefix, len(self.others))
+
+    def __contains__(self, index):
+        return index < self.prefix or index in self.others
+
+    def __len__(self):
+        return self.prefix + len(self.others)
+
+    def add(self, index):
+        self.others.add(index)
+        while self.prefix in self.others:
+            self.others.remove(self.prefix)
+            self.prefix += 1
+
+
+class Checkpoint:
+    """
+    The state of one run in a pickle file, written to a temporary file then renamed over the
+    previous one so there is always a complete checkpoint to resume from
+    """
+
+    def __init__(self, path, interval=300.0):
+        """
+        :param path: file the checkpoint is kept in
+        :param interval: least seconds between two writes while the run is going
+        """
+        self.path = path
+        self.interval = interval
+        self.config = None
+        self._state = None
+        self._saved = time.monotonic()
+
+    def __repr__(self):
+        return "<Checkpoint path: %s; interval: %ss>" % (self.path, self.interval)
+
+    def load(self):
+        """
+        :returns: dict of the checkpointed state, with keys config, tally, done (prefix and others of
+            DoneChunks) and complete
+        raises FileNotFoundError without a checkpoint and ValueError for a file that is not one
+        """
+        if self._state is None:
+            with open(self.path, 'rb') as handle:
+                state = pickle.load(handle)
+            if not isinstance(state, dict) or state.get('version') != VERSION:
+                raise ValueError("{} is not a checkpoint of this version".format(self.path))
+            self._state = state
+        return self._state
+
+    def resume_seed(self, seed):
+        """:returns: seed, or the entropy of the checkpointed run when seed is None"""
+        return self.load()['config']['entropy'] if seed is None else seed
+
+    def settings(self):
+        """:returns: (games, beads_per_bowl, player1_strat, player2_strat) of the checkpointed run"""
+        settings = self.load()['config']['settings']
+        return settings['games'], settings['beads_per_bowl'], settings['player1_strat'], settings['player2_strat']
+
+    def start(self, entropy, settings, resume=False):
+        """
+        :param entropy: entropy of the run
+        :param settings: dict of the settings the chunks of the run are built from, see
+            parallel.run_settings
+        :param resume: True to carry on from the checkpoint, which must be of the same run
+        :returns: (tally, done, complete) the tally of the chunks played, the DoneChunks of
+            their indices and whether the run had already finished
+        """
+        self.config = {'entropy': entropy, 'settings': dict(settings), 'code': code_version()}
+        if not resume:
+            tally = Tally()
+            tally.seed = entropy
+            return tally, DoneChunks(), False
+        state = self.load()
+        if state['config'] != self.config:
+            raise ValueError("{} is the checkpoint of another run, of other settings or of other code".format(
+                self.path))
+        return state['tally'], DoneChunks(*state['done']), state['complete']
+
+    def due(self):
+        """:returns: True once interval seconds have passed since the last write"""
+        return time.monotonic() - self._saved >= self.interval
+
+    def save(self, tally, done, complete=False):
+        """
+        :param tally: results.Tally of the chunks played
+        :param done: DoneChunks of those chunks
+        :param complete: True once the run is over, a resumed run then plays nothing
+        """
+        state = {'version': VERSION, 'config': self.config, 'tally': tally,
+                 'done': (done.prefix, sorted(done.others)), 'complete': complete}
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as handle:
+            pickle.dump(state, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, self.path)
+        self._state = state
+        self._saved = time.monotonic()
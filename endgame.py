@@ -0,0 +1,208 @@
+"""
+Endgame database: every position with few beads left in the bowls, solved once and kept in a
+memory mapped file
+Actions include:
+    solve: retrograde analysis of all positions up to max_beads beads for a board geometry
+    write_database: stores the solved values as a compact indexed binary file
+    EndgameTable: mmap based lookup, shared through the page cache by every process that opens it
+
+A solved position holds the beads of the player to move followed by those of the other player.
+Its value is the number of beads the player to move will still collect less the number the
+other player will, when both play perfectly. Only positions where both nests already hold a bead
+and no extra turn is in progress are covered: there the nests can no longer earn extra turns or
+lose a lone bead, so the nest counts do not affect the play and beads only change hands.
+"""
+import mmap
+import os
+import struct
+
+MAGIC = b'KEDB'
+VERSION = 1
+_HEADER = struct.Struct('<4sHHHHQ')  # magic, version, bowls per player, max beads, spare, count
+
+
+def binomials(size):
+    """:returns: Pascal's triangle as a list of lists, size rows"""
+    rows = [[1]]
+    for row in range(1, size):
+        previous = rows[-1]
+        rows.append([1] + [previous[k - 1] + previous[k] for k in range(1, row)] + [1])
+    return rows
+
+
+def position_count(num_of_bowls_per_player, max_beads):
+    """:returns: the number of positions holding at most max_beads beads in 2 * n bowls"""
+    parts = 2 * num_of_bowls_per_player
+    return binomials(max_beads + parts + 1)[max_beads + parts][parts]
+
+
+def rank(position, max_beads, table):
+    """
+    :param position: bead counts, the player to move's bowls first
+    :param max_beads: largest total the index covers
+    :param table: binomials() with at least max_beads + len(position) + 1 rows
+    :returns: index of the position among all those holding at most max_beads beads
+    """
+    index = 0
+    budget = max_beads
+    left = len(position)
+    for beads in position:
+        left -= 1
+        if beads:
+            # the positions that agree so far but hold fewer beads here come first
+            index += table[budget + left + 1][left + 1] - table[budget - beads + left + 1][left + 1]
+        budget -= beads
+    return index
+
+
+def compositions(total, parts):
+    """yields every tuple of parts non negative counts adding up to total"""
+    if parts == 1:
+        yield (total,)
+        return
+    for first in range(total, -1, -1):
+        for rest in compositions(total - first, parts - 1):
+            yield (first,) + rest
+
+
+def sow(position, start, n):
+    """
+    :param position: bead counts, the mover's n bowls then the other player's n bowls
+    :param start: the mover's bowl to sow from, 0 to n - 1
+    :returns: (gain, own, other) beads the mover put in the nest and both sides afterwards
+    """
+    ring = list(position[:n]) + [0] + list(position[n:])
+    size = 2 * n + 1
+    beads = ring[start]
+    ring[start] = 0
+    laps, rest = divmod(beads, size)
+    if laps:
+        ring = [beads_in_bowl + laps for beads_in_bowl in ring]
+    for step in range(1, rest + 1):
+        ring[(start + step) % size] += 1
+    landing = start + beads
+    if landing < n and ring[landing] == 1:
+        opposite = 2 * n - landing
+        ring[n] += ring[opposite] + 1
+        ring[landing] = 0
+        ring[opposite] = 0
+    return ring[n], ring[:n], ring[n + 1:]
+
+
+def solve(num_of_bowls_per_player, max_beads):
+    """
+    :returns: bytearray of signed values indexed by rank()
+    Works from the emptiest positions up. Within a bead count positions are taken in order of
+    how far their beads are from the nests: a move that keeps every bead in the bowls always
+    brings the mover's beads closer to the nest, so every position it leads to is already solved
+    """
+    n = num_of_bowls_per_player
+    parts = 2 * n
+    table = binomials(max_beads + parts + 2)
+    values = bytearray(position_count(n, max_beads))
+    distance = [n - index for index in range(n)] * 2
+
+    for total in range(max_beads + 1):
+        positions = sorted(compositions(total, parts),
+                           key=lambda position: sum(map(int.__mul__, position, distance)))
+        for position in positions:
+            own, other = position[:n], position[n:]
+            if not any(own):
+                # the player to move is out of moves and takes the other player's bowls
+                best = sum(other)
+            else:
+                best = None
+                for start in range(n):
+                    if not own[start]:
+                        continue
+                    gain, after_own, after_other = sow(position, start, n)
+                    if not any(after_own):
+                        value = gain + sum(after_other)
+                    elif not any(after_other):
+                        value = gain - sum(after_own)
+                    else:
+                        child = values[rank(after_other + after_own, max_beads, table)]
+                        value = gain - (child - 256 if child > 127 else child)
+                    if best is None or value > best:
+                        best = value
+            values[rank(position, max_beads, table)] = best & 0xff
+    return values
+
+
+def write_database(path, num_of_bowls_per_player, max_beads):
+    """
+    :param path: file to write, replaced atomically
+    :param num_of_bowls_per_player: board geometry the positions belong to
+    :param max_beads: every position with at most this many beads in the bowls is solved
+    """
+    if max_beads > 127:
+        raise ValueError("values are stored in a signed byte, max_beads can be at most 127")
+    values = solve(num_of_bowls_per_player, max_beads)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as handle:
+        handle.write(_HEADER.pack(MAGIC, VERSION, num_of_bowls_per_player, max_beads, 0, len(values)))
+        handle.write(values)
+    os.replace(temporary, path)
+
+
+class EndgameTable:
+    """
+    Read only view of a database file through mmap; every process mapping the same file shares
+    a single copy of it in the page cache
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, bowls, max_beads, _, count = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or len(self._map) != _HEADER.size + count:
+            self._map.close()
+            raise ValueError("%s is not an endgame database" % path)
+        self.bowls_per_player = bowls
+        self.max_beads = max_beads
+        self._table = binomials(max_beads + 2 * bowls + 2)
+
+    def __repr__(self):
+        return "<EndgameTable bowls_per_player: %d; max_beads: %d>" % (self.bowls_per_player, self.max_beads)
+
+    def close(self):
+        self._map.close()
+
+    def lookup(self, position):
+        """
+        :param position: bead counts, the player to move's bowls first
+        :returns: the solved value of the position
+        """
+        value = self._map[_HEADER.size + rank(position, self.max_beads, self._table)]
+        return value - 256 if value > 127 else value
+
+    def covers(self, board, to_move, pending=False):
+        """
+        :returns: True if the position on board with to_move to play is in the database
+        """
+        return (board.bowls_per_player == self.bowls_per_player and not pending
+                and board.sums[0] + board.sums[1] <= self.max_beads
+                and board.pits[board.nests[0]] > 0 and board.pits[board.nests[1]] > 0)
+
+    def value(self, board, to_move):
+        """
+        :returns: beads the player to move will still collect less those of the other player
+        """
+        n = self.bowls_per_player
+        pits = board.pits
+        own = to_move * (n + 1)
+        other = (1 - to_move) * (n + 1)
+        return self.lookup(tuple(pits[own:own + n]) + tuple(pits[other:other + n]))
+
+
+_opened = {}
+
+
+def open_table(path):
+    """
+    :returns: the EndgameTable for path, mapped once per process and reused afterwards
+    """
+    if path not in _opened:
+        _opened[path] = EndgameTable(path)
+    return _opened[path]
@@ -1,92 +1,286 @@
-"""Simulates the specified tries"""
+"""Simulates the specified tries
 
-from interface import Game, prompt
-import numpy as np
-import matplotlib.pyplot as plt
-import os
+Run interactively with `python -m jonkal`, or headless with
+`python -m jonkal simulate --games N --beads B --p1 S --p2 S --no-plot`.
+matplotlib is only imported once a plot is drawn, see histograms.render; numpy is imported by
+every run, as it seeds the chunks of games (see parallel.chunk_seeds).
+"""
+
+import argparse
+import json
+import sys
+
+from .interface import prompt
+from .parallel import run_parallel
+from .results import open_sink
+from .strategies import strategy_ids
+
+BEADS = range(3, 7)
 
 def get_number_of_simulation_tries():
     """prompts user for simulation turns, and validates"""
     simulation_tries_prompt = "Simulate how many games?: "
     beads_per_bowl_prompt = "How many balls in each bowl {3, 4, 5, 6}?: "
-    player1_strategy_prompt = "Which strategy should player 1 use {1, 2}?: "
-    player2_strategy_prompt = "Which strategy should player 2 use {1, 2}?: "
+    strategies = "{" + ", ".join(str(strategy) for strategy in strategy_ids()) + "}"
+    player1_strategy_prompt = "Which strategy should player 1 use {}?: ".format(strategies)
+    player2_strategy_prompt = "Which strategy should player 2 use {}?: ".format(strategies)
 
 
-    player1_strategy = prompt(player1_strategy_prompt, range(1, 3))
-    player2_strategy = prompt(player2_strategy_prompt, range(1, 3))
-    beads_per_bowl = prompt(beads_per_bowl_prompt, range(3, 7))
-    simulation_tries = prompt(simulation_tries_prompt, range(1000))
+    player1_strategy = prompt(player1_strategy_prompt, strategy_ids())
+    player2_strategy = prompt(player2_strategy_prompt, strategy_ids())
+    beads_per_bowl = prompt(beads_per_bowl_prompt, BEADS)
+    simulation_tries = prompt(simulation_tries_prompt, range(1, sys.maxsize))
 
     return simulation_tries, beads_per_bowl, player1_strategy, player2_strategy
 
 
-def file_check(filename):
-    """
-    checks if the  pdf file is already in this directory
-    if so, then delete it, otherwise we will have coflicting file names
-    """
-    this_dir = os.path.abspath(os.path.dirname(__file__))
-    file_path = os.path.join(this_dir, filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
-
-def plot_bar(diction, filename):
-    """:param: dictionary whose keys are players and values are their scores
-    plots results from simulation as percentage of wins (y-axis) against 
-    the respective player's scores on the (x-axis). Then write image to pdf file"""
-    xlabels = list(diction.keys())
-    y_values = [diction[key] for key in xlabels]
-
-    bar_width = 0.90
-
-    x = np.arange(len(y_values))
-
-    fig, ax = plt.subplots()
-    ax.bar(x, y_values, width=bar_width)
-    ax.set_xticks(x + (bar_width/2.0))
-    ax.set_xlabel('Players')
-    ax.set_ylabel('Scores')
-    ax.set_title('Kalaha Experiment')
-    ax.set_xticklabels(xlabels)
-
-    file_check(filename)
-    plt.savefig(filename)
-
-def main():
-    """Its the Main function glues everything"""
-    simulations, beads_per_bowl, player1_strat, player2_strat = get_number_of_simulation_tries()
-    all_games = []
-    games_won_by_player1 = []
-    games_won_by_player2 = []
-
-    for _ in range(simulations):
-        game = Game(beads_per_bowl, player1_strat, player2_strat)
-        game.run()
-        all_games.append(game)
-        # downside this is expensive in terms of memory should we have a sufficiently
-        # huge number of iterations
-        if game.winner and game.winner.title == 'player1':
-            games_won_by_player1.append(game)
-        elif game.winner and game.winner.title == 'player2':
-            games_won_by_player2.append(game)
-    
+def simulate(simulations, beads_per_bowl, player1_strat, player2_strat, workers=None, seed=None,
+             records_path=None, endgame_path=None, plot_path="outfall.pdf", stats_path=None, rule=None,
+             positions_path=None, outcomes_path=None, histograms_path=None, checkpoint_path=None,
+             checkpoint_interval=300.0, resume=False):
+    """plays the games, prints the summary and plots its histograms unless plot_path is None
+    :param workers: number of worker processes to spread the games over, defaults to all cpus
+    :param seed: seed of the run, the same seed reproduces the same results
+    :param records_path: optional .csv or .ndjson file receiving one record per game
+    :param endgame_path: optional endgame database that settles games once it covers them
+    :param plot_path: .pdf or .png file the outcomes, score margins, game lengths and first move
+        win rates are drawn to, None for no plot
+    :param stats_path: optional .json file receiving the counters of an instrumented run,
+        see instrument.py; the games are not instrumented without it
+    :param rule: optional stopping rule of sequential.py; simulations is then the most games
+        played and the run stops as soon as the rule is satisfied
+    :param positions_path: optional .json file receiving the distinct positions per ply and
+        overall, estimated with the sketches of positions.py
+    :param outcomes_path: optional .npz file receiving the outcome of every game; the workers
+        then write the outcomes into shared memory arrays (see outcomes.py) that the summary and
+        the plot are computed from, memory growing with the number of games
+    :param histograms_path: optional .json file receiving the histograms the plot is drawn from
+    :param checkpoint_path: optional file the state of the run is saved to every
+        checkpoint_interval seconds, see checkpoint.py
+    :param resume: True to carry on from the checkpoint of an interrupted run started with the
+        same settings, the results are those the run would have given uninterrupted
+    :returns: the results.Tally of the run"""
+    if plot_path is not None:
+        # a missing matplotlib shows before the games are played, not once they are over
+        from .histograms import require_matplotlib
+        require_matplotlib()
+    # only running counters are kept, so memory does not grow with the number of games
+    sink = open_sink(records_path) if records_path else None
+    histograms = plot_path is not None or histograms_path is not None
+    checkpoint = None
+    if checkpoint_path is not None:
+        from .checkpoint import Checkpoint
+        checkpoint = Checkpoint(checkpoint_path, checkpoint_interval)
+    outcomes = None
+    if outcomes_path is not None:
+        from .outcomes import SharedOutcomes
+        outcomes = SharedOutcomes(simulations)
+    try:
+        if rule is None:
+            tally = run_parallel(simulations, beads_per_bowl, player1_strat, player2_strat,
+                                 workers=workers, seed=seed, sink=sink, endgame_path=endgame_path,
+                                 instrumented=stats_path is not None, positions=positions_path is not None,
+                                 outcomes=outcomes, histograms=histograms, checkpoint=checkpoint, resume=resume)
+        else:
+            from .sequential import run_sequential
+            tally = run_sequential(simulations, beads_per_bowl, player1_strat, player2_strat, rule,
+                                   workers=workers, seed=seed, sink=sink, endgame_path=endgame_path,
+                                   instrumented=stats_path is not None, positions=positions_path is not None,
+                                   outcomes=outcomes, histograms=histograms, checkpoint=checkpoint, resume=resume)
+        summary = None
+        if outcomes is not None:
+            summary = outcomes.summary()
+            outcomes.save(outcomes_path)
+    finally:
+        if sink is not None:
+            sink.close()
+        if outcomes is not None:
+            outcomes.close()
+    if stats_path is not None:
+        tally.stats.write(stats_path)
+    if positions_path is not None:
+        with open(positions_path, 'w') as handle:
+            json.dump(tally.positions.as_dict(), handle, indent=1)
+    if histograms_path is not None:
+        with open(histograms_path, 'w') as handle:
+            json.dump(tally.histograms.as_dict(), handle, indent=1)
+    wins = tally.wins if summary is None else summary['wins']
+    player1_wins = wins['player1']
+    player2_wins = wins['player2']
+
     print_fmt = "{} has won {} out of {}"
-    if len(games_won_by_player1) > len(games_won_by_player2):
+    if player1_wins > player2_wins:
         overall_winner = 'player 1  '
-        tries = len(games_won_by_player1)
-    elif len(games_won_by_player1) < len(games_won_by_player2):
+        tries = player1_wins
+    elif player1_wins < player2_wins:
         overall_winner = 'player 2  '
-        tries = len(games_won_by_player2)
-    print_message = print_fmt.format(overall_winner, tries, len(all_games))
-    
-    if len(games_won_by_player1) == len(games_won_by_player2):
+        tries = player2_wins
+    if player1_wins == player2_wins:
         print_fmt = "Players drawed at {} tries out of {}"
-        print_message = print_fmt.format(len(games_won_by_player1), len(all_games))
+        print_message = print_fmt.format(player1_wins, tally.games)
+    else:
+        print_message = print_fmt.format(overall_winner, tries, tally.games)
     print(print_message)
-    filename = "outfall.pdf"
-    data = {"player1(strategy: {})".format(player1_strat): len(games_won_by_player1),
-            "player2(strategy: {})".format(player2_strat): len(games_won_by_player2)}
-    plot_bar(data, filename)
+    print("mean nest beads: player 1 {:.2f}, player 2 {:.2f}; mean game length {:.1f} turns".format(
+        tally.nests['player1'].mean, tally.nests['player2'].mean, tally.turns.mean))
+    if summary is not None:
+        print("mean sowings per game {:.1f}, of which extra turns {:.2f}".format(summary['plies'],
+                                                                                 summary['extra_turns']))
+    if tally.stopping is not None:
+        stopping = tally.stopping
+        print("{} stopping: {} of at most {} games played".format(stopping['rule'], stopping['games'], simulations))
+        print("player 1 win rate {:.4f}, {:.0%} interval [{:.4f}, {:.4f}]{}".format(
+            stopping['win_rate'], stopping['confidence'], stopping['interval'][0], stopping['interval'][1],
+            "; decision {}".format(stopping['decision']) if 'decision' in stopping else ''))
+    if plot_path is not None:
+        # the bins are fixed, drawing takes as long for any number of games
+        from .histograms import render
+        render(tally.histograms, plot_path, labels=("player1(strategy: {})".format(player1_strat),
+                                                   "player2(strategy: {})".format(player2_strat)))
+    return tally
+
+def main(workers=None, seed=None, records_path=None, endgame_path=None, outcomes_path=None, checkpoint_path=None,
+         checkpoint_interval=300.0, resume=False):
+    """Its the Main function glues everything, asking for the settings of the run
+    :param workers: number of worker processes to spread the games over, defaults to all cpus
+    :param seed: seed of the run, the same seed reproduces the same results
+    :param records_path: optional .csv or .ndjson file receiving one record per game
+    :param endgame_path: optional endgame database that settles games once it covers them
+    :param outcomes_path: optional .npz file receiving the outcome of every game, see simulate
+    :param checkpoint_path: optional file the run is checkpointed to, see simulate
+    :param resume: True to carry on from checkpoint_path; the settings are read from it instead
+        of being asked for"""
+    if resume:
+        from .checkpoint import Checkpoint
+        simulations, beads_per_bowl, player1_strat, player2_strat = Checkpoint(checkpoint_path).settings()
+    else:
+        simulations, beads_per_bowl, player1_strat, player2_strat = get_number_of_simulation_tries()
+    return simulate(simulations, beads_per_bowl, player1_strat, player2_strat, workers=workers,
+                    seed=seed, records_path=records_path, endgame_path=endgame_path, outcomes_path=outcomes_path,
+                    checkpoint_path=checkpoint_path, checkpoint_interval=checkpoint_interval, resume=resume)
+
+def play_tournament(strategies, beads, bowls, games, seed=0, workers=None, cache_dir=None, output_path=None):
+    """plays every pairing of strategies on every board configuration and prints a win rate
+    matrix per configuration, see tournament.py
+    :param cache_dir: optional directory keeping played cells, only missing or stale ones are played
+    :param output_path: optional .json file receiving the matrices
+    :returns: dict of {(beads, bowls): matrix}"""
+    from .tournament import format_matrix, run_tournament
+    matrices = run_tournament(strategies, beads, bowls, games, seed=seed, workers=workers, cache_dir=cache_dir,
+                              log=sys.stdout)
+    for matrix in matrices.values():
+        print(format_matrix(matrix))
+    if output_path:
+        with open(output_path, 'w') as handle:
+            json.dump(list(matrices.values()), handle, indent=1)
+    return matrices
+
+def positive(text):
+    """argparse type for counts of one or more"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError("expected 1 or more, got {}".format(value))
+    return value
+
+def create_parser():
+    """
+    builds the command line: `simulate` and `tournament` run without any prompt, `serve` runs the
+    local simulation service, no sub command prompts as before
+    """
+    parser = argparse.ArgumentParser(prog='jonkal', description='Kalaha simulations')
+    commands = parser.add_subparsers(dest='command')
+    simulate_parser = commands.add_parser('simulate', help='play games without prompting')
+    simulate_parser.add_argument('--games', type=positive, required=True, help='number of games, no upper bound')
+    simulate_parser.add_argument('--beads', type=int, choices=BEADS, required=True, help='beads per bowl')
+    simulate_parser.add_argument('--p1', type=int, choices=strategy_ids(), required=True, help="player 1's strategy")
+    simulate_parser.add_argument('--p2', type=int, choices=strategy_ids(), required=True, help="player 2's strategy")
+    simulate_parser.add_argument('--no-plot', dest='plot', action='store_const', const=None,
+                                 default='outfall.pdf', help='skip the plot and never import matplotlib')
+    simulate_parser.add_argument('--plot', dest='plot', help='file the plot is written to, outfall.pdf by default')
+    simulate_parser.add_argument('--stats', help='.json file receiving the totals and per game statistics of the counters')
+    simulate_parser.add_argument('--positions', help='.json file receiving the distinct positions seen per ply')
+    simulate_parser.add_argument('--histograms', help='.json file receiving the score margin, game length and first move histograms')
+    simulate_parser.add_argument('--stop', choices=('wilson', 'bayes', 'sprt'),
+                                 help='stop early once player 1\'s win rate is known well enough, --games is then the most played')
+    simulate_parser.add_argument('--precision', type=float, default=0.01, help='half width of the interval, wilson and bayes')
+    simulate_parser.add_argument('--confidence', type=float, default=0.95, help='coverage of the interval')
+    simulate_parser.add_argument('--delta', type=float, default=0.05, help='sprt: win rates 0.5 -/+ delta are tested')
+    simulate_parser.add_argument('--alpha', type=float, default=0.05, help='sprt: false positive rate')
+    simulate_parser.add_argument('--beta', type=float, default=0.05, help='sprt: false negative rate')
+    tournament_parser = commands.add_parser('tournament', help='play every pairing of strategies on every board')
+    tournament_parser.add_argument('--strategies', type=int, nargs='+', choices=strategy_ids(), default=[1, 2])
+    tournament_parser.add_argument('--beads', type=int, nargs='+', choices=BEADS, default=list(BEADS))
+    tournament_parser.add_argument('--bowls', type=positive, nargs='+', default=[6], help='bowls per player')
+    tournament_parser.add_argument('--games', type=positive, default=1000, help='games per pairing')
+    # --seed and --workers may also come before the sub command: the copies after it default to
+    # nothing so that leaving them out does not overwrite what the main parser read
+    tournament_parser.add_argument('--seed', type=int, default=argparse.SUPPRESS, help='seed of the tournament, 0 by default')
+    tournament_parser.add_argument('--workers', type=positive, default=argparse.SUPPRESS,
+                                   help='worker processes, all cpus by default')
+    tournament_parser.add_argument('--cache', help='directory caching the results of every pairing')
+    tournament_parser.add_argument('--output', help='.json file receiving the win rate matrices')
+    serve_parser = commands.add_parser('serve', help='accept simulation jobs from local clients, see service.py')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='interface to listen on')
+    serve_parser.add_argument('--port', type=int, default=8765, help='TCP port to listen on')
+    serve_parser.add_argument('--socket', help='Unix socket to listen on instead of a TCP port')
+    serve_parser.add_argument('--workers', type=positive, default=argparse.SUPPRESS,
+                              help='worker processes shared by all jobs, all cpus by default')
+    serve_parser.add_argument('--chunk', type=positive, default=500, help='games between two progress reports')
+    # the same goes for the options simulate shares with the prompt: only the main parser sets their defaults
+    for target, unset in ((parser, False), (simulate_parser, True)):
+        def default(value, unset=unset):
+            return argparse.SUPPRESS if unset else value
+        target.add_argument('--workers', type=positive, default=default(None),
+                            help='worker processes, all cpus by default')
+        target.add_argument('--seed', type=int, default=default(None), help='seed of the run')
+        target.add_argument('--records', default=default(None), help='.csv or .ndjson file receiving one record per game')
+        target.add_argument('--endgame', default=default(None), help='endgame database settling covered positions')
+        target.add_argument('--outcomes', default=default(None),
+                            help='.npz file receiving every game\'s outcome, collected in shared memory')
+        target.add_argument('--checkpoint', default=default(None), help='file the state of the run is saved to as it goes')
+        target.add_argument('--checkpoint-interval', type=float, default=default(300.0),
+                            help='seconds between two checkpoints, 300 by default')
+        target.add_argument('--resume', action='store_true', default=default(False),
+                            help='carry on from --checkpoint after an interruption')
+    return parser
+
+def run(argv=None):
+    """
+    :param argv: command line arguments, sys.argv[1:] by default
+    entry point of `python -m jonkal`
+    """
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.resume and not args.checkpoint:
+        parser.error('--resume needs the --checkpoint to resume from')
+    if args.command == 'simulate':
+        rule = None
+        if args.stop == 'sprt':
+            from .sequential import SprtRule
+            rule = SprtRule(args.delta, args.alpha, args.beta, args.confidence)
+        elif args.stop:
+            from .sequential import RULES
+            rule = RULES[args.stop](args.precision, args.confidence)
+        return simulate(args.games, args.beads, args.p1, args.p2, workers=args.workers, seed=args.seed,
+                        records_path=args.records, endgame_path=args.endgame, plot_path=args.plot,
+                        stats_path=args.stats, rule=rule, positions_path=args.positions,
+                        outcomes_path=args.outcomes, histograms_path=args.histograms,
+                        checkpoint_path=args.checkpoint, checkpoint_interval=args.checkpoint_interval,
+                        resume=args.resume)
+    if args.command == 'tournament':
+        seed = 0 if args.seed is None else args.seed
+        return play_tournament(args.strategies, args.beads, args.bowls, args.games, seed=seed,
+                               workers=args.workers, cache_dir=args.cache, output_path=args.output)
+    if args.command == 'serve':
+        import asyncio
+        from .service import serve
+        try:
+            return asyncio.run(serve(args.host, args.port, args.socket, args.workers, args.chunk))
+        except KeyboardInterrupt:
+            return None
+    return main(workers=args.workers, seed=args.seed, records_path=args.records, endgame_path=args.endgame,
+                outcomes_path=args.outcomes, checkpoint_path=args.checkpoint,
+                checkpoint_interval=args.checkpoint_interval, resume=args.resume)
 
-main()
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,23 @@
+"""
+The version of the code that plays the games, shared by everything that keeps results across runs
+Actions include:
+    code_version: a digest of the modules deciding the outcome of a game, so cached tournament
+        cells (tournament.py) and checkpoints (checkpoint.py) made by other code are not reused
+"""
+import hashlib
+import os
+
+# the modules whose code decides the outcome of a game or what a chunk collects from it; editing any of
+# them makes stored results stale
+CODE_MODULES = ('interface.py', 'parallel.py', 'results.py', 'state.py', 'search.py', 'mcts.py', 'endgame.py',
+                'strategies.py', 'geometry.py', 'instrument.py', 'histograms.py', 'positions.py')
+
+
+def code_version():
+    """:returns: hex digest of the modules that play the games"""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in CODE_MODULES:
+        with open(os.path.join(directory, name), 'rb') as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:16]
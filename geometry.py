@@ -0,0 +1,79 @@
+"""
+Sowing tables of a board geometry, computed once per (bowls per player, player) and shared by
+every game
+Actions include:
+    Geometry: the sowing path, landing pits, sowing segments, opposite bowls and ownership
+        masks of one player on one board size
+    shared_geometry: the Geometry for a board size and player, built on first use
+
+Pit indices follow interface.Board: player1's bowls, player1's nest, player2's bowls, player2's
+nest. A player's ring is the 2 * n + 1 pits they sow into, the other player's nest left out.
+"""
+
+
+class Geometry:
+    """
+    Every table a sowing needs that depends only on the board size and the player sowing
+    """
+
+    def __init__(self, num_of_bowls_per_player, side):
+        """
+        :param num_of_bowls_per_player: bowls on each side of the board, excluding the nest
+        :param side: 0 for player1, 1 for player2
+        """
+        n = num_of_bowls_per_player
+        self.bowls_per_player = n
+        self.side = side
+        self.ring_size = ring = 2 * n + 1
+        self.own_start = own_start = side * (n + 1)
+        self.other_start = other_start = (1 - side) * (n + 1)
+        self.nest = own_start + n
+        self.other_nest = other_start + n
+        # the ring in sowing order from this player's first bowl, and each pit's place on it
+        self.path = tuple(range(own_start, own_start + n + 1)) + tuple(range(other_start, other_start + n))
+        position = [-1] * (2 * n + 2)
+        for place, pit in enumerate(self.path):
+            position[pit] = place
+        self.position = tuple(position)
+        # landing[offset * ring + beads % ring]: the pit the last bead from bowl own_start + offset
+        # falls in, whole laps bring it back to where the remainder would have put it
+        self.landing = tuple(self.path[(offset + rest) % ring] for offset in range(n) for rest in range(ring))
+        # segments[offset * ring + beads % ring]: (own_stop, across, wrapped, own_gain, nest_gain)
+        # for the beads left after the whole laps: they run from the start bowl up to own_stop,
+        # over the first across bowls of the other player, then over the first wrapped of this
+        # player's; the player's bowls gain own_gain of them and the nest nest_gain
+        segments = []
+        for offset in range(n):
+            for rest in range(ring):
+                reach = offset + rest
+                own_stop = self.nest + 1 if reach >= n else own_start + reach + 1
+                across = 0 if reach <= n else (reach - n if reach < 2 * n else n)
+                wrapped = reach - 2 * n if reach > 2 * n else 0
+                own_gain = (n - 1 - offset if reach >= n else rest) + wrapped
+                segments.append((own_stop, across, wrapped, own_gain, int(reach >= n)))
+        self.segments = tuple(segments)
+        # opposite[pit] is the bowl across the board from a bowl, -1 for the nests
+        self.opposite = tuple(-1 if pit in (n, 2 * n + 1) else 2 * n - pit for pit in range(2 * n + 2))
+        # ownership masks over every pit
+        self.owns = tuple(own_start <= pit <= self.nest for pit in range(2 * n + 2))
+        self.own_bowls = tuple(own_start <= pit < self.nest for pit in range(2 * n + 2))
+
+    def __repr__(self):
+        return "<Geometry bowls_per_player: %d; side: %d>" % (self.bowls_per_player, self.side)
+
+    def land(self, start, beads):
+        """:returns: the pit the last of beads sown from the bowl start falls in"""
+        return self.landing[(start - self.own_start) * self.ring_size + beads % self.ring_size]
+
+
+_geometries = {}
+
+
+def shared_geometry(num_of_bowls_per_player, side):
+    """
+    :returns: the Geometry of the player on side for the board size, the same object every call
+    """
+    key = (num_of_bowls_per_player, side)
+    if key not in _geometries:
+        _geometries[key] = Geometry(num_of_bowls_per_player, side)
+    return _geometries[key]
@@ -0,0 +1,177 @@
+"""
+Fixed bin histograms of game results, filled as games finish and merged across workers
+Actions include:
+    Histogram: counts of integer values in bins of a fixed width, with an underflow and an
+        overflow bin so no value is ever dropped
+    GameHistograms: the score margin, game length and first move histograms of a run
+    render: draws GameHistograms to a .pdf or .png file with matplotlib's Agg backend
+    require_matplotlib: fails before a run rather than after it when render could not draw
+
+The bins are laid out before the first game, so memory and plotting time are the same for a
+hundred games as for a billion.
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+
+class Histogram:
+    """
+    Counts of values in [low, high) in bins of width; counts[0] holds the values below low
+    and counts[-1] those from high on
+    """
+
+    def __init__(self, low, high, width=1):
+        self.low = low
+        self.high = high
+        self.width = width
+        self.bins = -(-(high - low) // width)
+        self.counts = np.zeros(self.bins + 2, dtype=np.int64)
+
+    def __repr__(self):
+        return "<Histogram [%d, %d) width: %d; values: %d>" % (self.low, self.high, self.width, self.total)
+
+    def add(self, value):
+        """counts a single value"""
+        if value < self.low:
+            self.counts[0] += 1
+        elif value >= self.high:
+            self.counts[-1] += 1
+        else:
+            self.counts[(value - self.low) // self.width + 1] += 1
+
+    def add_values(self, values):
+        """counts every value of an integer array"""
+        values = np.asarray(values, dtype=np.int64)
+        index = np.where(values >= self.high, self.bins + 1, np.maximum((values - self.low) // self.width + 1, 0))
+        self.counts += np.bincount(index, minlength=self.bins + 2)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    @property
+    def edges(self):
+        """the bins + 1 edges of the bins between low and high"""
+        return self.low + self.width * np.arange(self.bins + 1)
+
+    def mean(self):
+        """:returns: mean of the values from the bin midpoints, out of range values at the edges"""
+        if not self.total:
+            return 0.0
+        centres = np.concatenate(([self.low], self.edges[:-1] + (self.width - 1) / 2, [self.high]))
+        return float((centres * self.counts).sum() / self.total)
+
+    def merge(self, other):
+        """:returns: self, now counting the values of both histograms"""
+        if (self.low, self.high, self.width) != (other.low, other.high, other.width):
+            raise ValueError("cannot merge histograms of different bins")
+        self.counts += other.counts
+        return self
+
+    def as_dict(self):
+        return {'low': self.low, 'high': self.high, 'width': self.width, 'underflow': int(self.counts[0]),
+                'counts': self.counts[1:-1].tolist(), 'overflow': int(self.counts[-1])}
+
+
+class GameHistograms:
+    """
+    Distributions of a run: player1's score minus player2's, turns per game, and player1's
+    first bowl with how often each led to a player1 win
+    """
+
+    def __init__(self, beads_per_bowl, num_of_bowls_per_player=6, max_turns=300):
+        """:param max_turns: games this long or longer share the overflow bin of the lengths"""
+        total = 2 * num_of_bowls_per_player * beads_per_bowl
+        self.margin = Histogram(-total, total + 1)
+        self.length = Histogram(0, max_turns)
+        self.first_move = Histogram(0, num_of_bowls_per_player)
+        self.first_move_wins = Histogram(0, num_of_bowls_per_player)
+
+    def __repr__(self):
+        return "<GameHistograms games: %d>" % self.margin.total
+
+    def add(self, record, first_move=None):
+        """
+        :param record: the results.game_record of a finished game
+        :param first_move: the bowl player1 opened with, when known
+        """
+        winner, player1_score, player2_score = record[:3]
+        self.margin.add(player1_score - player2_score)
+        self.length.add(record[-1])
+        if first_move is not None:
+            self.first_move.add(first_move)
+            if winner == 1:
+                self.first_move_wins.add(first_move)
+
+    def first_move_win_rate(self):
+        """:returns: array of player1's win rate after opening with each bowl, 0 for bowls never opened"""
+        games = self.first_move.counts[1:-1]
+        return np.divide(self.first_move_wins.counts[1:-1], games, out=np.zeros(len(games)), where=games > 0)
+
+    def merge(self, other):
+        for name in ('margin', 'length', 'first_move', 'first_move_wins'):
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    def as_dict(self):
+        return {'margin': self.margin.as_dict(), 'length': self.length.as_dict(),
+                'first_move': self.first_move.as_dict(), 'first_move_wins': self.first_move_wins.as_dict(),
+                'first_move_win_rate': self.first_move_win_rate().tolist()}
+
+
+def require_matplotlib():
+    """raises ImportError when matplotlib is not installed, without importing it"""
+    if importlib.util.find_spec('matplotlib') is None:
+        raise ImportError("drawing the plot needs matplotlib; install it or skip the plot (--no-plot)")
+
+
+def render(histograms, path, labels=('player1', 'player2'), title='Kalaha Experiment'):
+    """
+    :param histograms: GameHistograms of the run
+    :param path: .pdf or .png file, written atomically so a reader never sees half a plot
+    :param labels: names of the players in the legend of the outcomes
+    draws the outcomes, the score margins, the game lengths and the first move win rates
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # files only, no display needed
+    import matplotlib.pyplot as plt
+
+    margin, length = histograms.margin, histograms.length
+    counts = margin.counts[1:-1]
+    values = margin.edges[:-1]
+    outcomes = [int(counts[values > 0].sum()), int(counts[values < 0].sum()), int(counts[values == 0].sum())]
+
+    fig, axes = plt.subplots(2, 2, figsize=(11, 8))
+    fig.suptitle("{} ({} games)".format(title, margin.total))
+    ax = axes[0, 0]
+    ax.bar(range(3), outcomes)
+    ax.set_xticks(range(3))
+    ax.set_xticklabels(list(labels) + ['draws'])
+    ax.set_ylabel('Games')
+    ax.set_title('Outcomes')
+    ax = axes[0, 1]
+    ax.bar(values, counts, width=margin.width, align='edge')
+    ax.set_xlabel("{} score minus {}'s".format(*labels))
+    ax.set_ylabel('Games')
+    ax.set_title('Score margins')
+    ax = axes[1, 0]
+    ax.bar(length.edges[:-1], length.counts[1:-1], width=length.width, align='edge')
+    ax.set_xlabel('Turns (longer than {}: {} games)'.format(length.high - 1, int(length.counts[-1])))
+    ax.set_ylabel('Games')
+    ax.set_title('Game lengths')
+    ax = axes[1, 1]
+    bowls = np.arange(histograms.first_move.bins)
+    ax.bar(bowls, histograms.first_move_win_rate())
+    ax.set_xticks(bowls)
+    ax.set_xlabel("{}'s first bowl".format(labels[0]))
+    ax.set_ylabel('{} win rate'.format(labels[0]))
+    ax.set_ylim(0, 1)
+    ax.set_title('First move win rates')
+    fig.tight_layout()
+
+    temporary = path + '.tmp'
+    fig.savefig(temporary, format=os.path.splitext(path)[1][1:] or 'pdf')
+    plt.close(fig)
+    os.replace(temporary, path)
@@ -0,0 +1,162 @@
+"""
+Opt-in counters and timings of what happens inside a game
+Actions include:
+    Counters: what a single game did, sowing by sowing, and the time spent in each phase
+    Instrumentation: the counters of many games, as totals and per game statistics, mergeable
+        across workers and exported as JSON
+    InstrumentedPlayer, InstrumentedGame: drop in subclasses that fill in the counters
+
+Plain Game and Player are never touched: a run without instrumentation executes exactly the
+same code as before, so it costs nothing when it is off.
+"""
+import json
+import time
+
+from .interface import Game, Player
+from .results import RunningStats
+
+COUNTERS = ('plies', 'extra_turns', 'captures', 'beads_captured', 'sow_steps', 'nest_skips')
+PHASES = ('choose', 'sow', 'settle', 'game')
+
+
+class Counters:
+    """
+    Counters of a single game. A ply is one sowing, extra turns count the extra sowings
+    played, beads captured the beads captures put in the nests (the capturing bead included),
+    sow steps the beads dropped and nest skips the times a sowing passed over the other
+    player's nest. Phase times are in seconds: choose for picking bowls, sow for the
+    sowings, settle for ending the game and game for the whole of Game.run
+    """
+    __slots__ = COUNTERS + PHASES
+
+    def __init__(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        for name in PHASES:
+            setattr(self, name, 0.0)
+
+    def __repr__(self):
+        return "<Counters plies: %d; extra_turns: %d; captures: %d>" % (self.plies, self.extra_turns, self.captures)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in COUNTERS + PHASES}
+
+
+class Instrumentation:
+    """
+    Counters of many games: totals plus, for each counter and phase, statistics of the per
+    game values
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.totals = {name: 0 for name in COUNTERS + PHASES}
+        self.per_game = {name: RunningStats() for name in COUNTERS + PHASES}
+
+    def __repr__(self):
+        return "<Instrumentation games: %d; plies: %d>" % (self.games, self.totals['plies'])
+
+    def add(self, counters):
+        """folds the Counters of one game in"""
+        self.games += 1
+        for name in COUNTERS + PHASES:
+            value = getattr(counters, name)
+            self.totals[name] += value
+            self.per_game[name].add(value)
+
+    def merge(self, other):
+        """
+        :param other: Instrumentation of a disjoint set of games
+        :returns: self, now covering both sets
+        """
+        self.games += other.games
+        for name in COUNTERS + PHASES:
+            self.totals[name] += other.totals[name]
+            self.per_game[name].merge(other.per_game[name])
+        return self
+
+    def as_dict(self):
+        return {'games': self.games, 'totals': dict(self.totals),
+                'per_game': {name: stats.as_dict() for name, stats in self.per_game.items()}}
+
+    def write(self, path):
+        """writes as_dict() to path as JSON"""
+        with open(path, 'w') as handle:
+            json.dump(self.as_dict(), handle, indent=1, sort_keys=True)
+
+
+class InstrumentedPlayer(Player):
+    """
+    A Player that records its sowings and the time it spends choosing and sowing into counters
+    """
+
+    def __init__(self, bowls_range_start, bowls_range_end, board, strategy, title, counters):
+        super().__init__(bowls_range_start, bowls_range_end, board, strategy, title)
+        self.counters = counters
+
+    def get_starting_index(self):
+        started = time.perf_counter()
+        index = super().get_starting_index()
+        self.counters.choose += time.perf_counter() - started
+        return index
+
+    def _move(self, start_index, debug=False):
+        counters = self.counters
+        pits = self.board.pits
+        n = self.board.bowls_per_player
+        beads = pits[start_index]
+        landing = start_index + beads
+        counters.plies += 1
+        counters.sow_steps += beads
+        if self.in_extra_turn:
+            counters.extra_turns += 1
+        # beads needed to reach the last of the other player's bowls, the one before the skip
+        to_skip = 2 * n - (start_index - self.bowls_range_start)
+        if beads > to_skip:
+            counters.nest_skips += 1 + (beads - to_skip - 1) // (2 * n + 1)
+        if beads and landing < self.nest and not pits[landing]:
+            counters.captures += 1
+            counters.beads_captured += pits[self.geometry.opposite[landing]] + 1
+        started = time.perf_counter()
+        result = super()._move(start_index, debug)
+        counters.sow += time.perf_counter() - started
+        return result
+
+
+class InstrumentedGame(Game):
+    """
+    A Game whose players are InstrumentedPlayers; its Counters are in self.counters once run
+    """
+
+    def __init__(self, beads_per_bowl, player1_strat, player2_strat, endgame=None, num_of_bowls_per_player=6,
+                 seed=None, rng=None, record=False):
+        super().__init__(beads_per_bowl, player1_strat, player2_strat, endgame, num_of_bowls_per_player,
+                         seed, rng, record)
+        self.counters = Counters()
+        self.player1 = self._instrumented(self.player1)
+        self.player2 = self._instrumented(self.player2)
+
+    def _instrumented(self, player):
+        instrumented = InstrumentedPlayer(player.bowls_range_start, player.bowls_range_end, player.board,
+                                          player.strategy, player.title, self.counters)
+        instrumented.searcher = player.searcher
+        instrumented.rng = player.rng
+        instrumented.moves = player.moves
+        return instrumented
+
+    def determine_winner(self, current_player):
+        started = time.perf_counter()
+        winner = super().determine_winner(current_player)
+        self.counters.settle += time.perf_counter() - started
+        return winner
+
+    def settle_endgame(self, current_player):
+        started = time.perf_counter()
+        settled = super().settle_endgame(current_player)
+        self.counters.settle += time.perf_counter() - started
+        return settled
+
+    def run(self):
+        started = time.perf_counter()
+        super().run()
+        self.counters.game += time.perf_counter() - started
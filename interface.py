@@ -5,7 +5,11 @@ Actions include:
     implementation of an appropriate data structure to represent the bowls and the Nest
     a factory methods that take the worry out of creating objects with the right parameters
 """
-from random import choice
+from array import array
+import random
+
+from .geometry import shared_geometry
+from .strategies import get_strategy
 
 
 class Player:
@@ -17,7 +21,9 @@ class Player:
         :param bowls_range_start: lower bound index for the bowls owned by this user
         :param bowls_range_end: the upper bound index not included
         :param board: A Board obj
-        :param strategy: an integer denoting wither of the 2 strategies
+        :param strategy: an integer denoting wither of the strategies: 1 random bowl, 2 random
+            fullest bowl, 3 alpha-beta search, 4 monte carlo tree search, or any other id
+            registered with strategies.register_strategy
         """
         self.title = title
         self.board = board # player will have reference to board
@@ -25,6 +31,17 @@ class Player:
         self.bowls_range_end = bowls_range_end
         self.owned_bowls_range = range(self.bowls_range_start, self.bowls_range_end)
         self.strategy = strategy
+        self.nest = bowls_range_end - 1
+        self.side = board.owner[bowls_range_start]  # 0 for player1's side of the board, 1 for player2's
+        self.other_range_start = (1 - self.side) * (board.bowls_per_player + 1)
+        self.geometry = shared_geometry(board.bowls_per_player, self.side)  # sowing tables, shared
+        self.searcher = None  # search.AlphaBeta for strategy 3 or mcts.MonteCarlo for 4, built on first use
+        self.in_extra_turn = False
+        self.rng = random  # anything with choice and getrandbits, e.g a random.Random of the game
+        self.moves = None  # bytearray the chosen bowls are appended to, when the game records them
+        self.sowings = 0  # sowings played, extra ones included
+        self.extra_turns = 0
+        self.first_move = None  # bowl of this player's first sowing
 
     def __repr__(self):
         return "<(Player :%s) nested beads: %d; beads_in_bowls: %d; strategy: %d>" % \
@@ -34,13 +51,12 @@ class Player:
     @property
     def beads_in_nest(self):
         """gets the beads that are inside this player's Nest"""
-        return self.board.bowls[self.bowls_range_end - 1].beads
+        return self.board.pits[self.nest]
 
     @property
     def beads_in_bowls(self):
         """gets the total number of beads in ordinary bowls owned by this player"""
-        temp = [bowl.beads for bowl in self.board.bowls[self.bowls_range_start: self.bowls_range_end - 1]]
-        return sum(temp)
+        return self.board.sums[self.side]
     
     @property
     def total_beads(self):
@@ -48,72 +64,144 @@ class Player:
 
     def empty_bowls(self):
         """empties the user bowls, except for their nest"""
-        bowls = [bowl for bowl in self.board.bowls[self.bowls_range_start: self.bowls_range_end - 1]]
-        for bowl in bowls:
-            bowl.beads = 0
+        self.board.empty_side(self.side)
     
     def _move(self, start_index, debug=False):
-        """ perform a legal move"""
-        # empty bowl at index then iterate over next k bowls while adding beads
-        _bowls = self.board.bowls
-        beads_to_move = _bowls[start_index].beads  # i.e. over the next k or beads to move bowls
-        _bowls[start_index].beads = 0
-        end = start_index + beads_to_move + 1
-        start = start_index + 1
-        while start < end:
-            idx = start
-            i = idx % len(_bowls) # to create a form of loop back somewhat like a circular list
-            current_bowl = _bowls[i]
-            if current_bowl.type == 'Nest' and not self.owns_bowl(i):
-                # we check that this nest is owned by this user; if they own it proceed and
-                # place a bead in it, otherwise skip it wholly
-                end += 1
-                start += 1
-                continue
-            current_bowl.beads += 1
-            # special conditions: if this is the last bead placement then we have 2 situations
-            # :situation1: this bowl is this players nest and thus they get an extra move
-            # :situation2: this bowl is empty
-            if (current_bowl.type == 'Nest') and (current_bowl.beads == 1) and (idx == end - 1):
-                self.move() # player gets aother turn if their turn ends in the player's Nest
-            if current_bowl.beads == 1 and idx == start_index + beads_to_move and self.owns_bowl(idx):
+        """
+        perform a legal move: sow the beads of the bowl at start_index, capturing when the last
+        bead lands in an empty bowl of this player's. An extra turn earned by ending in the
+        nest is played by move(), not here
+        :returns: the result of state_checker after the sowing
+        """
+        board = self.board
+        pits, sums = board.pits, board.sums
+        beads_to_move = pits[start_index]
+        pits[start_index] = 0
+        landing = start_index + beads_to_move
+        if landing < self.nest:
+            # the usual short move that stays among this player's own bowls
+            for idx in range(start_index + 1, landing + 1):
+                pits[idx] += 1
+            if beads_to_move and pits[landing] == 1:
                 # if a player finishes his/her turn in one of their bowls that is empty
                 # capture beads in this bowl and those of the opposite bowl
-                current_bowl.beads = 0
-                _bowls[self.bowls_range_end - 1].beads += _bowls[self.opposite_bowl(i)].beads + 1
-                _bowls[self.opposite_bowl(i)].beads = 0
-            start += 1
-        return self.state_checker()
+                opposite = self.geometry.opposite[landing]
+                captured = pits[opposite]
+                pits[landing] = 0
+                pits[opposite] = 0
+                pits[self.nest] += captured + 1
+                sums[self.side] -= 1
+                sums[1 - self.side] -= captured
+                sums[2] += captured + 1
+            return bool(sums[self.side])
+
+        geometry = self.geometry
+        n = board.bowls_per_player
+        own_start = self.bowls_range_start
+        other_start = self.other_range_start
+        # the other player's nest is skipped, so a lap visits 2 * n + 1 bowls; every whole lap
+        # drops one bead in each of them at once, the start bowl included
+        laps, rest = divmod(beads_to_move, geometry.ring_size)
+        if laps:
+            for idx in range(own_start, own_start + n + 1):
+                pits[idx] += laps
+            for idx in range(other_start, other_start + n):
+                pits[idx] += laps
+        # what is left runs up this player's side into the nest, across the other player's
+        # bowls and at most back onto this player's side, short of the start bowl
+        own_stop, across, wrapped, own_gain, nest_gain = \
+            geometry.segments[(start_index - own_start) * geometry.ring_size + rest]
+        for idx in range(start_index + 1, own_stop):
+            pits[idx] += 1
+        for idx in range(other_start, other_start + across):
+            pits[idx] += 1
+        for idx in range(own_start, own_start + wrapped):
+            pits[idx] += 1
+        sums[self.side] += laps * n + own_gain - beads_to_move
+        sums[1 - self.side] += laps * n + across
+        sums[2] += laps + nest_gain
+        return bool(sums[self.side])
+
+    def _unmove(self, start_index, beads_to_move, captured=None):
+        """
+        takes back a sowing made by _move, leaving the board as it was before it
+        :param start_index: the bowl the sowing started from
+        :param beads_to_move: the beads that bowl held
+        :param captured: beads taken from the opposite bowl if the sowing ended in a capture,
+            None otherwise
+        """
+        board = self.board
+        pits, sums = board.pits, board.sums
+        geometry = self.geometry
+        n = board.bowls_per_player
+        own_start = self.bowls_range_start
+        other_start = self.other_range_start
+        if captured is not None:
+            landing = start_index + beads_to_move
+            pits[landing] = 1
+            pits[geometry.opposite[landing]] = captured
+            pits[self.nest] -= captured + 1
+            sums[self.side] += 1
+            sums[1 - self.side] += captured
+            sums[2] -= captured + 1
+
+        laps, rest = divmod(beads_to_move, geometry.ring_size)
+        if laps:
+            for idx in range(own_start, own_start + n + 1):
+                pits[idx] -= laps
+            for idx in range(other_start, other_start + n):
+                pits[idx] -= laps
+        own_stop, across, wrapped, own_gain, nest_gain = \
+            geometry.segments[(start_index - own_start) * geometry.ring_size + rest]
+        for idx in range(start_index + 1, own_stop):
+            pits[idx] -= 1
+        for idx in range(other_start, other_start + across):
+            pits[idx] -= 1
+        for idx in range(own_start, own_start + wrapped):
+            pits[idx] -= 1
+        pits[start_index] = beads_to_move
+        sums[self.side] -= laps * n + own_gain - beads_to_move
+        sums[1 - self.side] -= laps * n + across
+        sums[2] -= laps + nest_gain
 
     def get_starting_index(self):
         """
         :returns: int: an index denoting where the self player will start his game,
-        Picking this index is bound by the strategy chosen for this player
+        Picking this index is bound by the strategy chosen for this player, see strategies.py
         """
-        valid_indices = []
-        max_beads = 0
-        if self.strategy == 1:
-            # list comprehension to filter out the empty bowls in the board
-            valid_indices = [index for index in self.owned_bowls_range
-                             if self.board.bowls[index].beads and self.board.bowls[index].type == 'Bowl']
-        if self.strategy == 2:
-            # filter the bowls with the most beads
-            for index in self.owned_bowls_range:
-                if self.board.bowls[index].type == "Nest":
-                    continue # excepts the nest bowl as an invalid index to pick from
-                if self.board.bowls[index].beads == max_beads:
-                    valid_indices.append(index)
-                if self.board.bowls[index].beads > max_beads:
-                    max_beads = self.board.bowls[index].beads
-                    valid_indices = [index]
-        if len(valid_indices):
-            return choice(valid_indices)
+        return get_strategy(self.strategy).choose(self)
 
     def move(self):
+        """
+        plays this player's turn. A last bead that lands in the still empty nest earns another
+        sowing, played by this loop rather than by recursion; should the nest hold no more than
+        that single bead once the extra sowing is done, the bead is forfeited
+        :returns: False if the player could not move or is left without beads, else True
+        """
+        pits = self.board.pits
+        nest = self.nest
+        extra_turns = 0
         choosen_index = self.get_starting_index()
-        if choosen_index is not None:
-            return self._move(choosen_index)
-        return False
+        if choosen_index is None:
+            return False
+        if self.first_move is None:
+            self.first_move = choosen_index
+        while choosen_index is not None:
+            earned = pits[choosen_index] == nest - choosen_index and not pits[nest]
+            if self.moves is not None:
+                self.moves.append(choosen_index)
+            self._move(choosen_index)
+            if not earned:
+                break
+            extra_turns += 1
+            self.in_extra_turn = True
+            choosen_index = self.get_starting_index()
+        self.in_extra_turn = False
+        self.sowings += extra_turns + 1
+        self.extra_turns += extra_turns
+        if extra_turns and pits[nest] == 1:
+            self.board.set_beads(nest, 0)
+        return self.state_checker()
             
     def state_checker(self):
         """
@@ -130,30 +218,47 @@ class Player:
         Checks that a bowl located at the given bowl_index is owned by the player
         Particularly useful when dealing with the Nest bowls
         """
-        return bowl_index in self.owned_bowls_range
+        owns = self.geometry.owns
+        return 0 <= bowl_index < len(owns) and owns[bowl_index]
 
     def opposite_bowl(self, bowl_index):
         """
         :param: int: bowl_index: The index of a bowl , a _Node on the self.board.bowls list
         :return: int: index of a bowl that would be opposite the bowl indexed by the bowl_index argument
         """
-        return (len(self.board.bowls) - 2) - bowl_index
+        return (len(self.board.pits) - 2) - bowl_index
 
 
 class Board:
     """
-    use a list and a non public lightweight _Node class to represent the
-    Board and the nodes as bowls
+    use a flat array('i') of bead counts with the nests at fixed positions to represent
+    the Board; running totals of the beads in each player's bowls are kept alongside so they
+    never have to be summed up. A list of non public lightweight _Node views over the array
+    is kept for code that likes to look at the board bowl by bowl
     """
 
     class _Node:
         """
-        A storage object that represents a bowl
+        A view of a single bowl, reads and writes go straight to the board's arrays. It holds
+        the arrays rather than the board so that boards stay free of reference cycles
         """
+        __slots__ = ('_pits', '_sums', '_index', '_owner', 'type')
+
+        def __init__(self, board, index, bowl_type):
+            self._pits = board.pits
+            self._sums = board.sums
+            self._index = index
+            self._owner = board.owner[index]
+            self.type = bowl_type # defines whether this is a bowl or nest
 
-        def __init__(self, number_of_beads):
-            self.beads = number_of_beads
-            self.type = 'Bowl' # defines whether this is a bowl or nest(bowl by default)
+        @property
+        def beads(self):
+            return self._pits[self._index]
+
+        @beads.setter
+        def beads(self, number_of_beads):
+            self._sums[self._owner] += number_of_beads - self._pits[self._index]
+            self._pits[self._index] = number_of_beads
 
         def __repr__(self):
             return "<node(%s) %d>" % (self.type, self.beads)
@@ -163,22 +268,59 @@ class Board:
         :param beads_per_bowl: denotes the number of beads in each bowl at the start of game
         :param num_of_bowls_per_player: denotes number of bowls excluding nest usually six
         """
-        self.bowls = []
         total_bowls = (num_of_bowls_per_player + 1) * 2
-        for idx in range(1, total_bowls+1):
-            bowl = self._Node(beads_per_bowl)
-            if idx % (total_bowls // 2) == 0:
-                bowl.type = 'Nest'
-                bowl.beads = 0
-            self.bowls.append(bowl)
+        self.bowls_per_player = num_of_bowls_per_player
+        self.nests = (num_of_bowls_per_player, total_bowls - 1)
+        self.pits = array('i', [beads_per_bowl] * total_bowls)
+        for nest in self.nests:
+            self.pits[nest] = 0
+        # which running total a bowl counts towards: 0 and 1 for the players' bowls, 2 for the nests
+        self.owner = tuple(2 if idx in self.nests else idx // (num_of_bowls_per_player + 1)
+                           for idx in range(total_bowls))
+        self.sums = array('i', [beads_per_bowl * num_of_bowls_per_player] * 2 + [0])
+        self._bowls = None
+
+    @property
+    def bowls(self):
+        """list of _Node views over the array, built the first time it is asked for"""
+        if self._bowls is None:
+            self._bowls = [self._Node(self, idx, 'Nest' if idx in self.nests else 'Bowl')
+                           for idx in range(len(self.pits))]
+        return self._bowls
+
+    def set_beads(self, index, number_of_beads):
+        """
+        :param index: index of a bowl or nest
+        :param number_of_beads: the new bead count at that index
+        overwrites a bead count while keeping the running totals right
+        """
+        self.sums[self.owner[index]] += number_of_beads - self.pits[index]
+        self.pits[index] = number_of_beads
+
+    def copy(self):
+        """:returns: a new Board of the same geometry holding the same beads"""
+        board = Board(0, self.bowls_per_player)
+        board.pits[:] = self.pits
+        board.sums[:] = self.sums
+        return board
+
+    def empty_side(self, side):
+        """
+        :param side: 0 for player1's bowls, 1 for player2's
+        removes every bead from that side's ordinary bowls, nest excluded
+        """
+        start = side * (self.bowls_per_player + 1)
+        for idx in range(start, start + self.bowls_per_player):
+            self.pits[idx] = 0
+        self.sums[side] = 0
 
     def __repr__(self):
         """
         A console displayable representation of the board, synonymous to visualize, prints the board as
         on the console as the developer visualized it
         """
-        data = [bowl.beads for bowl in self.bowls]
-        bowls_len = len(self.bowls)
+        data = self.pits
+        bowls_len = len(self.pits)
         out_border = "".join(["+{!s:-^4}".format('-') for _ in range(bowls_len // 2 + 1 )])
         out_border += "+"
         in_border = "".join(["+"] + [" " * 4] + ['+'] + ["----+" * ((bowls_len - 1) // 2)] + [" " * 4] + ["+"])
@@ -206,33 +348,94 @@ class Game:
     interleave them together.
     Manages player turns in a single game
     """
-    def __init__(self, beads_per_bowl, player1_strat, player2_strat):
-        self.board = create_board(beads_per_bowl)
+    def __init__(self, beads_per_bowl, player1_strat, player2_strat, endgame=None, num_of_bowls_per_player=6,
+                 seed=None, rng=None, record=False):
+        """
+        :param endgame: optional endgame.EndgameTable; once the position is in it the game is
+            settled at once as if both players played perfectly from there on
+        :param num_of_bowls_per_player: bowls on each side of the board, excluding the nest
+        :param seed: seeds a random.Random private to this game, so that it can be played again
+        :param rng: a random.Random (or anything with choice and getrandbits) for the players,
+            used instead of seed; without either the module level random functions are used
+        :param record: True to keep the bowl chosen for every sowing in self.moves, see replay.py
+        """
+        self.board = create_board(beads_per_bowl, num_of_bowls_per_player)
         # defines the indexes delimiters that define bowls at certain index belong to which player
         self.player1 = create_player('player1', self.board, player1_strat)
         self.player2 = create_player('player2', self.board, player2_strat)
         self.current_player = None
         self.winner = None
+        self.scores = None
+        self.turns = 0  # turns taken, including the one that ended the game
+        self.endgame = endgame
+        self.beads_per_bowl = beads_per_bowl
+        self.strategies = (player1_strat, player2_strat)
+        self.rng = rng if rng is not None else (random.Random(seed) if seed is not None else random)
+        self.moves = bytearray() if record else None
+        for player in (self.player1, self.player2):
+            player.rng = self.rng
+            player.moves = self.moves
 
     def __repr__(self):
         return "\n{}\n\n{}\n\n{}\n".format(repr(self.player1), repr(self.board), repr(self.player2))
 
+    @property
+    def plies(self):
+        """sowings played by both players, extra ones included"""
+        return self.player1.sowings + self.player2.sowings
+
+    @property
+    def extra_turns(self):
+        """extra sowings earned by both players"""
+        return self.player1.extra_turns + self.player2.extra_turns
+
+    @property
+    def first_move(self):
+        """the bowl the game opened with, player1 always sowing first; None before any sowing"""
+        return self.player1.first_move
+
     def determine_winner(self, current_player):
         """
         :param: player who made the move that ended the game
         :Returns: player who won, else returns None if players drew
         peaks into the 2 player objects and uses number of beads to determine who won.
+        Both players' final bead counts are kept in self.scores keyed by player title.
         Called after one player has exhausted legal moves"""
         other_player = self.player1 if current_player == self.player2 else self.player2
         # winner takes it all except for beads in the loser's nest
         current_player_beads = current_player.total_beads +  other_player.beads_in_bowls
         other_player_beads = other_player.beads_in_nest
+        self.scores = {current_player.title: current_player_beads, other_player.title: other_player_beads}
         other_player.empty_bowls()
         if current_player_beads > other_player_beads:
             return current_player
         if other_player_beads > current_player_beads:
             return other_player
 
+    def settle_endgame(self, current_player):
+        """
+        :param: player about to take their turn
+        :Returns: True if the endgame table covers the position and the game was settled
+        hands the beads still in the bowls out to the nests as perfect play would and
+        determines the winner from the nests"""
+        board = self.board
+        if not self.endgame.covers(board, current_player.side):
+            return False
+        other_player = self.player1 if current_player == self.player2 else self.player2
+        remaining = board.sums[0] + board.sums[1]
+        # the remaining beads all end up in one nest or the other
+        gain = (remaining + self.endgame.value(board, current_player.side)) // 2
+        board.set_beads(current_player.nest, current_player.beads_in_nest + gain)
+        board.set_beads(other_player.nest, other_player.beads_in_nest + remaining - gain)
+        current_player.empty_bowls()
+        other_player.empty_bowls()
+        self.scores = {current_player.title: current_player.beads_in_nest,
+                       other_player.title: other_player.beads_in_nest}
+        if current_player.beads_in_nest > other_player.beads_in_nest:
+            self.winner = current_player
+        elif other_player.beads_in_nest > current_player.beads_in_nest:
+            self.winner = other_player
+        return True
 
     def run(self):
         """
@@ -245,6 +448,10 @@ class Game:
         # execute a single iteration of the game i.e each player gets their turn to play/move
         while True:
             self.current_player = players[count % len(players)]
+            if self.endgame is not None and self.settle_endgame(self.current_player):
+                self.current_player = None
+                break
+            self.turns += 1
             action = self.current_player.move()
             if action:
                 # Truthy value denotes player move executed successfully and still has legal moves
@@ -261,26 +468,30 @@ class Game:
 
 # factory methods, that abstract details of object creation
 
-def create_board(beads_per_bowl):
+def create_board(beads_per_bowl, num_of_bowls_per_player=6):
     """
     used to create a Board object
     """
-    new_board = Board(beads_per_bowl)
+    new_board = Board(beads_per_bowl, num_of_bowls_per_player)
     return new_board
 
-def create_player(name, board, player_strategy):
+def create_player(name, board, player_strategy, searcher=None):
     """
     :params: name: either player1 or player2;
         helps define the indexes ranges for bowls that the player will own
     :params: board: a instance of Board class
     :params: player_strategy: the strategy for this player
+    :params: searcher: optional search.AlphaBeta for strategy 3, to set its depth, time budget
+        or table size; the player builds its own otherwise. For strategy 4
+        an mcts.MonteCarlo, to set its playouts or milliseconds per move
     Factory method to create and return a player with the required instance fields
     populated with required data
     """
     title = 'player1' if '1' in name else 'player2'
-    start = 0 if '1' in name else len(board.bowls) // 2
-    end = len(board.bowls) // 2 if '1' in name else  len(board.bowls)
+    start = 0 if '1' in name else len(board.pits) // 2
+    end = len(board.pits) // 2 if '1' in name else  len(board.pits)
     new_player = Player(start, end, board, player_strategy, title)
+    new_player.searcher = searcher
     return new_player
 
 def prompt(to_prompt, range):
@@ -297,4 +508,5 @@ def prompt(to_prompt, range):
             if user_input in range:
                 return user_input
         except ValueError as error:
-            _prompt = "Accepted_values {}, ".format(str(list(range))) + to_prompt
\ No newline at end of file
+            accepted = list(range) if len(range) <= 10 else "{} and up".format(range[0])
+            _prompt = "Accepted_values {}, ".format(str(accepted)) + to_prompt
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Monte Carlo tree search, the engine behind player strategy 4
+Actions include:
+    Node: a compact tree node
+    MonteCarlo: UCT search within a budget of playouts or milliseconds per move, with random
+        playouts on a single scratch State and the tree kept from one move to the next
+"""
+import math
+import random
+import time
+
+from .state import State
+
+DEFAULT_PLAYOUTS = 200
+EXPLORATION = math.sqrt(2)
+
+
+class Node:
+    """
+    A position in the tree, reached by move. reward adds up the playout results seen from
+    the side of the player who made that move: 1 for a win, 0.5 for a draw
+    """
+    __slots__ = ('move', 'mover', 'parent', 'children', 'untried', 'visits', 'reward')
+
+    def __init__(self, move, mover, parent, untried):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children = []
+        self.untried = untried  # legal moves not expanded yet
+        self.visits = 0
+        self.reward = 0.0
+
+    def __repr__(self):
+        return "<Node move: %s; visits: %d; reward: %.1f>" % (self.move, self.visits, self.reward)
+
+    def select(self):
+        """:returns: the child with the highest upper confidence bound"""
+        log_visits = math.log(self.visits)
+        best, best_score = None, -1.0
+        for child in self.children:
+            score = child.reward / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+
+class MonteCarlo:
+    """
+    Picks moves by UCT. Each playout walks the tree on a scratch State reset from the root in
+    place, expands one node and finishes the game with random moves; no Board or Player is
+    built after the first move
+    """
+
+    def __init__(self, playouts=DEFAULT_PLAYOUTS, milliseconds=None, rng=None):
+        """
+        :param playouts: playouts per move, used when milliseconds is not given
+        :param milliseconds: time budget per move
+        :param rng: random.Random for the playouts; by default one seeded from the random
+            module, so seeding random makes the searcher reproducible too
+        """
+        self.playouts = playouts
+        self.milliseconds = milliseconds
+        self.rng = rng if rng is not None else random.Random(random.getrandbits(64))
+        self.root = None
+        self.root_state = None
+        self.scratch = None
+        self.total_playouts = 0
+        self.reused_visits = 0  # visits inherited from the previous move's tree
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return "<MonteCarlo playouts: %d; reused visits: %d>" % (self.total_playouts, self.reused_visits)
+
+    def stats(self):
+        """:returns: dict of counters accumulated over every move so far"""
+        return {'playouts': self.total_playouts, 'seconds': self.seconds,
+                'playouts_per_second': self.total_playouts / self.seconds if self.seconds else 0.0,
+                'reused_visits': self.reused_visits}
+
+    def choose(self, board, to_move, pending=False):
+        """
+        :param board: the Board to move on, left untouched
+        :param to_move: 0 for player1, 1 for player2
+        :param pending: True when the move is the extra sowing of a turn
+        :returns: index of the bowl to sow from, None when there is no legal move
+        """
+        started = time.perf_counter()
+        self._set_root(board, to_move, pending)
+        root = self.root
+        if not root.children and len(root.untried) < 2:
+            return root.untried[0] if root.untried else None
+        state, scratch = self.root_state, self.scratch
+        deadline = started + self.milliseconds / 1000.0 if self.milliseconds else None
+        playouts = 0
+        # at least one playout, so the root has a child to pick however small the budget
+        while not playouts or ((playouts < self.playouts) if deadline is None else (time.perf_counter() < deadline)):
+            scratch.copy_from(state)
+            self._playout(root, scratch)
+            playouts += 1
+        self.total_playouts += playouts
+        self.seconds += time.perf_counter() - started
+        return max(root.children, key=lambda child: child.visits).move
+
+    def _set_root(self, board, to_move, pending):
+        """reuses the subtree of the previous search that reached this position, if any"""
+        if self.root_state is None or len(self.root_state.pits) != len(board.pits):
+            self.root_state = State.from_board(board, to_move, pending)
+            self.scratch = State.from_board(board, to_move, pending)
+            self.root = None
+        else:
+            previous = self.root
+            self.scratch.copy_from(self.root_state)
+            self.root_state.pits[:] = board.pits
+            self.root_state.sums[:] = board.sums
+            self.root_state.to_move, self.root_state.pending = to_move, pending
+            self.root_state.ender = None if board.sums[to_move] else to_move
+            self.root = self._find(previous, self.scratch, self.root_state, 4) if previous else None
+        if self.root is None:
+            self.root = Node(None, None, None, self.root_state.legal_moves())
+        else:
+            self.root.parent = None
+            self.reused_visits += self.root.visits
+
+    def _find(self, node, state, target, depth):
+        """:returns: the node under node, at most depth moves down, whose position is target"""
+        if (state.to_move == target.to_move and state.pending == target.pending
+                and state.pits == target.pits):
+            return node
+        if depth == 0:
+            return None
+        for child in node.children:
+            token = state.apply(child.move)
+            found = self._find(child, state, target, depth - 1)
+            state.undo(token)
+            if found is not None:
+                return found
+        return None
+
+    def _playout(self, node, state):
+        """selection, expansion, random playout and backpropagation of a single playout"""
+        while not node.untried and node.children:
+            node = node.select()
+            state.apply(node.move)
+        if node.untried:
+            move = node.untried.pop(self.rng.randrange(len(node.untried)))
+            mover = state.to_move
+            state.apply(move)
+            child = Node(move, mover, node, state.legal_moves())
+            node.children.append(child)
+            node = child
+
+        players = state.players
+        randrange = self.rng.randrange
+        pits = state.pits
+        while state.ender is None:
+            player = players[state.to_move]
+            # a random non empty bowl, found without building a list of moves
+            while True:
+                move = player.bowls_range_start + randrange(player.nest - player.bowls_range_start)
+                if pits[move]:
+                    break
+            state.apply(move)
+
+        player1, player2 = state.scores()
+        while node is not None:
+            node.visits += 1
+            if node.mover is not None:
+                if player1 == player2:
+                    node.reward += 0.5
+                elif (player1 > player2) == (node.mover == 0):
+                    node.reward += 1.0
+            node = node.parent
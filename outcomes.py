@@ -0,0 +1,140 @@
+"""
+Per game outcomes of a parallel run in shared memory
+Actions include:
+    SharedOutcomes: one numpy array per outcome field, all laid out in a single
+        multiprocessing.shared_memory block that worker processes write into in place
+    shared_outcomes: the SharedOutcomes of a block by name, attached once per process
+
+Workers write the outcome of every game at its index in the run and hand back nothing per
+game, the parent then aggregates the arrays where they are. The arrays take OUTCOME_BYTES
+per game, so unlike a Tally they grow with the run.
+"""
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .results import RECORD_FIELDS
+
+# the fields of results.game_record, then the sowings of the game and the extra ones among them
+OUTCOME_FIELDS = RECORD_FIELDS + ('plies', 'extra_turns')
+DTYPES = {'winner': np.int8, 'player1_score': np.int16, 'player2_score': np.int16, 'player1_nest': np.int16,
+          'player2_nest': np.int16, 'turns': np.int32, 'plies': np.int32, 'extra_turns': np.int32}
+OUTCOME_BYTES = sum(np.dtype(dtype).itemsize for dtype in DTYPES.values())
+UNPLAYED = -1  # winner of the games not played yet
+
+_segments = {}  # the blocks this process created or attached, by name
+
+
+class SharedOutcomes:
+    """
+    The outcomes of games played so far, winner 0 for a draw, 1 or 2, UNPLAYED before a
+    game is written
+    """
+
+    def __init__(self, games, name=None):
+        """
+        :param games: games in the run
+        :param name: name of an existing block to attach to, None creates a new one
+        """
+        self.games = games
+        self.owner = name is None
+        if self.owner:
+            self._memory = shared_memory.SharedMemory(create=True, size=max(1, games * OUTCOME_BYTES))
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            # the creator unlinks the block, the resource tracker must not do it when this process exits
+            resource_tracker.unregister(self._memory._name, 'shared_memory')
+        self.arrays = {}
+        offset = 0
+        # widest first, so every array is aligned
+        for field in sorted(OUTCOME_FIELDS, key=lambda field: -np.dtype(DTYPES[field]).itemsize):
+            self.arrays[field] = np.ndarray(games, DTYPES[field], buffer=self._memory.buf, offset=offset)
+            offset += games * np.dtype(DTYPES[field]).itemsize
+        self.columns = [self.arrays[field] for field in OUTCOME_FIELDS]
+        if self.owner:
+            self.arrays['winner'][:] = UNPLAYED
+        _segments[self.name] = self
+
+    def __repr__(self):
+        return "<SharedOutcomes games: %d; played: %d>" % (self.games, self.played)
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    @property
+    def played(self):
+        return int(np.count_nonzero(self.arrays['winner'] != UNPLAYED))
+
+    def write(self, index, values):
+        """
+        :param index: index of the game in the run
+        :param values: the fields of OUTCOME_FIELDS, a game_record followed by plies and extra turns
+        """
+        for column, value in zip(self.columns, values):
+            column[index] = value
+
+    def fill(self, tally, start=0, stop=None):
+        """
+        :param tally: results.Tally the games from start to stop are added to, in place
+        :returns: tally
+        """
+        arrays = {field: array[start:stop] for field, array in self.arrays.items()}
+        counts = np.bincount(arrays['winner'], minlength=3)
+        tally.games += len(arrays['winner'])
+        tally.draws += int(counts[0])
+        tally.wins['player1'] += int(counts[1])
+        tally.wins['player2'] += int(counts[2])
+        for title in ('player1', 'player2'):
+            tally.scores[title] += int(arrays[title + '_score'].sum(dtype=np.int64))
+            tally.nests[title].add_values(arrays[title + '_nest'])
+        tally.turns.add_values(arrays['turns'])
+        return tally
+
+    def discard(self, start):
+        """marks the games from start on as not played"""
+        self.arrays['winner'][start:] = UNPLAYED
+
+    def summary(self):
+        """:returns: dict of the games played, their winners and the mean of every other field"""
+        played = self.arrays['winner'] != UNPLAYED
+        games = int(np.count_nonzero(played))
+        counts = np.bincount(self.arrays['winner'][played], minlength=3)
+        summary = {'games': games, 'draws': int(counts[0]),
+                   'wins': {'player1': int(counts[1]), 'player2': int(counts[2])}}
+        for field in OUTCOME_FIELDS[1:]:
+            summary[field] = float(self.arrays[field][played].mean()) if games else 0.0
+        return summary
+
+    def save(self, path):
+        """writes the outcomes of the games played to a numpy .npz file"""
+        played = self.arrays['winner'] != UNPLAYED
+        np.savez_compressed(path, **{field: array[played] for field, array in self.arrays.items()})
+
+    def close(self):
+        """
+        releases the block, and removes it once its creator is done with it; the arrays are
+        invalid from then on, copy anything still needed first
+        """
+        _segments.pop(self.name, None)
+        self.arrays = {}
+        self.columns = []
+        self._memory.close()
+        if self.owner:
+            self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def shared_outcomes(name, games):
+    """
+    :returns: the SharedOutcomes of the block name, attached on first use in this process; a
+        forked worker finds the one its parent created
+    """
+    if name not in _segments:
+        SharedOutcomes(games, name)
+    return _segments[name]
@@ -0,0 +1,240 @@
+"""
+Runs simulations on several worker processes
+Actions include:
+    splitting the requested number of games into fixed size chunks, built one at a time as the
+        workers take them so memory stays flat however many games are requested
+    seeding every chunk with its own independent random stream so runs can be reproduced
+    merging the per chunk tallies returned by the workers, or aggregating the per game outcomes
+        they wrote into shared memory, see outcomes.py
+    checkpointing the chunks played so far, so an interrupted run can be resumed, see checkpoint.py
+"""
+import multiprocessing
+import os
+import random
+from collections import namedtuple
+
+from .checkpoint import DoneChunks
+from .endgame import open_table
+from .interface import Game
+from .results import Tally, game_record
+
+
+def chunk_sizes(games, chunk_size):
+    """
+    :param games: total number of games to simulate
+    :param chunk_size: number of games handled by a single task
+    :returns: list with the number of games in each chunk
+    """
+    full, rest = divmod(games, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def chunk_count(games, chunk_size):
+    """:returns: the number of chunks chunk_sizes splits games into"""
+    return -(-games // chunk_size)
+
+
+def chunk_seeds(seed, chunks):
+    """
+    :param seed: the seed of the whole run, None draws fresh entropy
+    :param chunks: number of chunks
+    :returns: (entropy, seeds) the entropy that reproduces the run and an iterator of one
+        integer seed per chunk
+    Uses numpy's SeedSequence so the chunk streams are statistically independent. Each child is
+    made as its seed is drawn, the very child SeedSequence.spawn would give, so no list of
+    children is built up front
+    """
+    import numpy as np  # imported on first use, so importing this module stays cheap
+    sequence = np.random.SeedSequence(seed)
+    children = (np.random.SeedSequence(sequence.entropy, spawn_key=sequence.spawn_key + (chunk,),
+                                       pool_size=sequence.pool_size) for chunk in range(chunks))
+    return sequence.entropy, (int(child.generate_state(2, np.uint64)[0]) for child in children)
+
+
+# a chunk of games for play_chunk; only the first five fields have to be given
+ChunkTask = namedtuple('ChunkTask', ('games', 'beads_per_bowl', 'player1_strat', 'player2_strat', 'seed',
+                                     'keep_records', 'endgame_path', 'instrumented', 'num_of_bowls_per_player',
+                                     'positions', 'outcomes', 'histograms'),
+                       defaults=(False, None, False, 6, False, None, False))
+
+
+def play_chunk(task):
+    """
+    :param task: ChunkTask of the games to play
+    :returns: (tally, records) Tally for the chunk and, when keep_records is set, the list
+        of compact per game records (see results.game_record), otherwise None. Instrumented
+        chunks play instrument.InstrumentedGame and leave the counters in tally.stats, chunks
+        collecting positions leave a positions.PositionCollector in tally.positions. With
+        outcomes, (name, games, offset) of an outcomes.SharedOutcomes block, the outcome of
+        every game is written there from index offset on and the tally holds no game. Chunks
+        keeping histograms leave a histograms.GameHistograms in tally.histograms
+    Executed in a worker process. The games of the chunk share one random.Random seeded
+    from task.seed, so the chunk has its own stream and the module level one is left alone
+    """
+    beads_per_bowl, num_of_bowls_per_player = task.beads_per_bowl, task.num_of_bowls_per_player
+    instrumented, positions, histograms = task.instrumented, task.positions, task.histograms
+    rng = random.Random(task.seed)
+    # mapped once per worker, the pages are shared with every other worker
+    endgame = open_table(task.endgame_path) if task.endgame_path else None
+    tally = Tally()
+    records = [] if task.keep_records else None
+    game_class = Game
+    if instrumented:
+        from .instrument import InstrumentedGame, Instrumentation
+        game_class = InstrumentedGame
+        tally.stats = Instrumentation()
+    if positions:
+        from .positions import PositionCollector, game_keys
+        tally.positions = PositionCollector()
+    if histograms:
+        from .histograms import GameHistograms
+        tally.histograms = GameHistograms(beads_per_bowl, num_of_bowls_per_player)
+    outcomes = None
+    if task.outcomes is not None:
+        from .outcomes import shared_outcomes
+        name, total, offset = task.outcomes
+        outcomes = shared_outcomes(name, total)
+    for index in range(task.games):
+        game = game_class(beads_per_bowl, task.player1_strat, task.player2_strat, endgame, num_of_bowls_per_player,
+                          rng=rng, record=positions)
+        game.run()
+        if instrumented:
+            tally.stats.add(game.counters)
+        if positions:
+            # the positions are played back from the move log, once the game is over
+            tally.positions.add_game(game_keys(game.moves, beads_per_bowl, num_of_bowls_per_player))
+        record = game_record(game)
+        if histograms:
+            tally.histograms.add(record, game.first_move)
+        if outcomes is None:
+            tally.add_record(record)
+        else:
+            outcomes.write(offset + index, record + (game.plies, game.extra_turns))
+        if records is not None:
+            records.append(record)
+    return tally, records
+
+
+def play_numbered(item):
+    """:returns: (index, play_chunk(task)) of an (index, task) item, so results can arrive in any order"""
+    index, task = item
+    return index, play_chunk(task)
+
+
+def chunk_tasks(games, beads_per_bowl, player1_strat, player2_strat, seed, chunk_size, keep_records=False,
+                endgame_path=None, instrumented=False, num_of_bowls_per_player=6, positions=False, outcomes=None,
+                histograms=False):
+    """
+    :param outcomes: optional outcomes.SharedOutcomes of the run, each chunk writing its own slice
+    :param histograms: True for every chunk to fill a histograms.GameHistograms
+    :returns: (entropy, tasks) the entropy that reproduces the run and a generator of its ChunkTasks,
+        each built only once it is taken
+    """
+    entropy, seeds = chunk_seeds(seed, chunk_count(games, chunk_size))
+    return entropy, (ChunkTask(min(chunk_size, games - offset), beads_per_bowl, player1_strat, player2_strat,
+                               chunk_seed, keep_records=keep_records, endgame_path=endgame_path,
+                               instrumented=instrumented, num_of_bowls_per_player=num_of_bowls_per_player,
+                               positions=positions,
+                               outcomes=None if outcomes is None else (outcomes.name, outcomes.games, offset),
+                               histograms=histograms)
+                     for offset, chunk_seed in zip(range(0, games, chunk_size), seeds))
+
+
+def run_settings(games, beads_per_bowl, player1_strat, player2_strat, chunk_size, keep_records=False,
+                 endgame_path=None, instrumented=False, num_of_bowls_per_player=6, positions=False, histograms=False):
+    """
+    :returns: dict of the settings that, with the entropy, decide every chunk of a run; a
+        checkpoint keeps them to check and rebuild the run it is resumed into
+    """
+    return {'games': games, 'beads_per_bowl': beads_per_bowl, 'player1_strat': player1_strat,
+            'player2_strat': player2_strat, 'chunk_size': chunk_size, 'keep_records': keep_records,
+            'endgame_path': endgame_path, 'instrumented': instrumented,
+            'num_of_bowls_per_player': num_of_bowls_per_player, 'positions': positions, 'histograms': histograms}
+
+
+def run_parallel(games, beads_per_bowl, player1_strat, player2_strat, workers=None, seed=None,
+                 chunk_size=1000, sink=None, endgame_path=None, instrumented=False, num_of_bowls_per_player=6,
+                 positions=False, outcomes=None, histograms=False, checkpoint=None, resume=False):
+    """
+    :param games: number of games to simulate
+    :param beads_per_bowl: beads in each bowl at the start of a game
+    :param player1_strat: strategy for player1
+    :param player2_strat: strategy for player2
+    :param workers: number of worker processes, defaults to the number of cpus; 1 runs in process
+    :param seed: seed of the run; the same seed and chunk_size give the same tally for any
+        number of workers
+    :param chunk_size: games per task, small enough to keep every worker busy until the end
+    :param sink: optional results sink; receives every game record as its chunk finishes,
+        so at most one chunk of records per worker is ever held in memory
+    :param endgame_path: optional endgame database; games are settled by it as soon as
+        their position is covered
+    :param instrumented: True to count plies, extra turns, captures, sowing steps and nest
+        skips and time each phase, see instrument.py; off by default as it slows games down
+    :param num_of_bowls_per_player: bowls on each side of the board, excluding the nest
+    :param positions: True to count the distinct positions at every ply and how often each
+        occurs with the bounded sketches of positions.py
+    :param outcomes: optional outcomes.SharedOutcomes of at least games games; the workers write
+        every outcome into it and the tally is aggregated from it, with no game sent back
+    :param histograms: True to fill fixed bin histograms of the score margins, game lengths and
+        first moves as games finish, see histograms.py
+    :param checkpoint: optional checkpoint.Checkpoint written as chunks finish and once at the end
+    :param resume: True to play only the chunks missing from checkpoint, which must be of this
+        very run; without a seed the run's own entropy is taken from it
+    :returns: Tally merged from every chunk, with the entropy of the run in tally.seed and,
+        when instrumented, the counters in tally.stats, when collecting positions, their
+        sketches in tally.positions, with histograms, them in tally.histograms
+    """
+    workers = workers or os.cpu_count() or 1
+    if resume and checkpoint is not None:
+        seed = checkpoint.resume_seed(seed)
+    entropy, tasks = chunk_tasks(games, beads_per_bowl, player1_strat, player2_strat, seed, chunk_size,
+                                 sink is not None, endgame_path, instrumented, num_of_bowls_per_player, positions,
+                                 outcomes, histograms)
+
+    settings = run_settings(games, beads_per_bowl, player1_strat, player2_strat, chunk_size, sink is not None,
+                            endgame_path, instrumented, num_of_bowls_per_player, positions, histograms)
+    tally, done, complete = start_checkpoint(checkpoint, resume, entropy, settings, sink, outcomes)
+    left = 0 if complete else chunk_count(games, chunk_size) - len(done)
+    # the pool draws the chunks from the generator as it goes, none is built ahead of its turn
+    pending = iter(()) if complete else ((index, task) for index, task in enumerate(tasks) if index not in done)
+    if workers == 1 or left <= 1:
+        _collect(map(play_numbered, pending), tally, sink, done, checkpoint)
+    else:
+        with multiprocessing.Pool(min(workers, left)) as pool:
+            _collect(pool.imap_unordered(play_numbered, pending), tally, sink, done, checkpoint)
+    if outcomes is not None:
+        outcomes.fill(tally, 0, games)
+    if checkpoint is not None:
+        checkpoint.save(tally, done, complete=True)
+    return tally
+
+
+def start_checkpoint(checkpoint, resume, entropy, settings, sink=None, outcomes=None):
+    """
+    :returns: (tally, done, complete) to start the run from, see checkpoint.Checkpoint.start;
+        a fresh tally without a checkpoint
+    """
+    if checkpoint is None:
+        if resume:
+            raise ValueError("there is nothing to resume from without a checkpoint")
+        tally = Tally()
+        tally.seed = entropy
+        return tally, DoneChunks(), False
+    if outcomes is not None:
+        raise ValueError("shared outcome arrays are not checkpointed")
+    if resume and sink is not None:
+        raise ValueError("the records of the chunks played before the checkpoint cannot be written again")
+    return checkpoint.start(entropy, settings, resume)
+
+
+def _collect(results, tally, sink, done=None, checkpoint=None):
+    """merges numbered chunk results into tally, forwards their records to sink and checkpoints"""
+    for index, (chunk_tally, records) in results:
+        tally.merge(chunk_tally)
+        if sink is not None:
+            for record in records:
+                sink.write(record)
+        if checkpoint is not None:
+            done.add(index)
+            if checkpoint.due():
+                checkpoint.save(tally, done)
@@ -0,0 +1,271 @@
+"""
+Canonical position keys and memory bounded statistics of the positions a run goes through
+Actions include:
+    encode_key, encode, decode: a position (pits, player to move, extra turn flag) as a fixed
+        width bytes key or the int it spells, and back
+    encode_batch: the same keys for a whole (N, pits) array of boards at once, with numpy
+    hash_keys: 64 bit hashes of keys, the input of the sketches
+    HyperLogLog: distinct count estimate in 2 ** precision bytes
+    CountMin: frequency estimates in a fixed table of counters
+    PositionCollector: distinct positions per ply and position frequencies over a run,
+        mergeable across workers
+
+A key holds one byte per pit in board order followed by a flags byte: bit 0 set when player2
+is to move, bit 1 when an extra turn is in progress. Two positions share a key exactly when
+they are the same position.
+"""
+import numpy as np
+
+from .state import State
+from .interface import Board
+
+PLAYER2 = 1
+PENDING = 2
+
+
+def encode_key(pits, to_move, pending=False):
+    """
+    :param pits: bead counts of every pit, in board order, each at most 255
+    :param to_move: 0 for player1, 1 for player2
+    :param pending: True when the player to move is playing an extra turn
+    :returns: the bytes key of the position
+    """
+    # through a list, as bytes() of an array would copy its raw machine ints
+    return bytes(list(pits)) + bytes((to_move * PLAYER2 | (PENDING if pending else 0),))
+
+
+def encode(pits, to_move, pending=False):
+    """:returns: the key of the position as a non negative int"""
+    return int.from_bytes(encode_key(pits, to_move, pending), 'little')
+
+
+def decode(key, num_of_bowls_per_player=6):
+    """
+    :param key: bytes key or int as returned by encode_key or encode
+    :returns: (pits, to_move, pending) of the position
+    """
+    width = 2 * num_of_bowls_per_player + 3
+    if isinstance(key, int):
+        key = key.to_bytes(width, 'little')
+    if len(key) != width:
+        raise ValueError("a key of this board size holds %d bytes, not %d" % (width, len(key)))
+    return list(key[:-1]), key[-1] & PLAYER2, bool(key[-1] & PENDING)
+
+
+def encode_batch(pits, to_move, pending=None):
+    """
+    :param pits: (N, pits) integer array of boards
+    :param to_move: N players to move
+    :param pending: optional N extra turn flags
+    :returns: (N, pits + 1) uint8 array, row i the bytes key of board i
+    """
+    pits = np.asarray(pits)
+    if pits.size and (pits.min() < 0 or pits.max() > 255):
+        raise ValueError("a pit holds more beads than a key byte can")
+    keys = np.empty((pits.shape[0], pits.shape[1] + 1), dtype=np.uint8)
+    keys[:, :-1] = pits
+    flags = np.asarray(to_move, dtype=np.uint8) * PLAYER2
+    if pending is not None:
+        flags |= np.asarray(pending, dtype=bool).astype(np.uint8) * PENDING
+    keys[:, -1] = flags
+    return keys
+
+
+def hash_keys(keys):
+    """
+    :param keys: (N, width) uint8 array of keys, or a single bytes key
+    :returns: N uint64 hashes, the bytes folded in one at a time with the splitmix64 finaliser
+    """
+    if isinstance(keys, (bytes, bytearray)):
+        keys = np.frombuffer(keys, dtype=np.uint8)[None, :]
+    hashes = np.full(len(keys), 0x9e3779b97f4a7c15, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in range(keys.shape[1]):
+            hashes ^= keys[:, column].astype(np.uint64)
+            hashes += np.uint64(0x9e3779b97f4a7c15)
+            hashes ^= hashes >> np.uint64(30)
+            hashes *= np.uint64(0xbf58476d1ce4e5b9)
+            hashes ^= hashes >> np.uint64(27)
+            hashes *= np.uint64(0x94d049bb133111eb)
+            hashes ^= hashes >> np.uint64(31)
+    return hashes
+
+
+def _leading_zeros(values):
+    """:returns: number of leading zero bits of each uint64, exact"""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xffffffff)).astype(np.float64)
+    # below 2 ** 32 a float64 log2 never rounds up to the next power of two
+    with np.errstate(divide='ignore'):
+        zeros = np.where(high > 0, 31 - np.floor(np.log2(high)), 63 - np.floor(np.log2(low)))
+    return np.where(values == 0, 64, zeros).astype(np.int64)
+
+
+class HyperLogLog:
+    """
+    Estimates the number of distinct hashes added, within about 1.04 / sqrt(2 ** precision)
+    """
+
+    def __init__(self, precision=12):
+        """:param precision: 4 to 18, the sketch takes 2 ** precision bytes"""
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def __repr__(self):
+        return "<HyperLogLog precision: %d; estimate: %d>" % (self.precision, self.estimate())
+
+    def add(self, hashes):
+        """:param hashes: uint64 array of hashes, see hash_keys"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = hashes << p
+        rank = np.minimum(_leading_zeros(rest) + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self):
+        """:returns: the estimated number of distinct hashes"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)  # linear counting is the better estimate when small
+        return raw
+
+    def merge(self, other):
+        """:returns: self, now estimating the union of both streams"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+
+class CountMin:
+    """
+    Frequency estimates that never fall short and overshoot by at most about
+    e / width of all the counts with probability 1 - exp(-depth)
+    """
+
+    def __init__(self, width=1 << 14, depth=4):
+        self.width = width
+        self.depth = depth
+        self.counts = np.zeros((depth, width), dtype=np.int64)
+
+    def __repr__(self):
+        return "<CountMin width: %d; depth: %d; total: %d>" % (self.width, self.depth, self.counts[0].sum())
+
+    def _columns(self, hashes):
+        """one column per row for each hash, from two halves of it (Kirsch and Mitzenmacher)"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        first = (hashes & np.uint64(0xffffffff)).astype(np.int64)
+        second = (hashes >> np.uint64(32)).astype(np.int64) | 1
+        rows = np.arange(self.depth, dtype=np.int64)[:, None]
+        return (first[None, :] + rows * second[None, :]) % self.width
+
+    def add(self, hashes):
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            np.add.at(self.counts[row], columns[row], 1)
+
+    def query(self, hashes):
+        """:returns: the estimated count of every hash"""
+        columns = self._columns(hashes)
+        return np.min(self.counts[np.arange(self.depth)[:, None], columns], axis=0)
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+
+def game_keys(moves, beads_per_bowl, num_of_bowls_per_player=6):
+    """
+    :param moves: bowls chosen in a game recorded with interface.Game(record=True)
+    :returns: (plies, width) uint8 array, the key of the position before every ply
+    """
+    state = State(Board(beads_per_bowl, num_of_bowls_per_player))
+    keys = np.empty((len(moves), 2 * num_of_bowls_per_player + 3), dtype=np.uint8)
+    plies = 0
+    for move in moves:
+        if state.ender is not None:
+            # the game is over once a side is empty, a strategy may still pick an empty bowl
+            break
+        keys[plies, :-1] = state.pits
+        keys[plies, -1] = state.to_move * PLAYER2 | (PENDING if state.pending else 0)
+        plies += 1
+        state.apply(move)
+    return keys[:plies]
+
+
+class PositionCollector:
+    """
+    Distinct positions seen at every ply, distinct positions overall and how often each
+    position occurred, in memory that does not grow with the run: a HyperLogLog per ply (the
+    last one takes every ply from max_plies on), one for the whole run and a CountMin
+    """
+
+    def __init__(self, max_plies=200, precision=12, width=1 << 14, depth=4):
+        self.max_plies = max_plies
+        self.per_ply = [HyperLogLog(precision) for _ in range(max_plies)]
+        self.overall = HyperLogLog(precision)
+        self.frequency = CountMin(width, depth)
+        self.positions = 0
+        self.plies_seen = 0  # one past the deepest ply added
+
+    def __repr__(self):
+        return "<PositionCollector positions: %d; distinct: %d>" % (self.positions, self.overall.estimate())
+
+    def add_batch(self, ply, keys):
+        """
+        :param ply: ply of every position, 0 before the first move
+        :param keys: (N, width) uint8 keys of the positions, see encode_batch
+        """
+        if not len(keys):
+            return
+        hashes = hash_keys(keys)
+        self.per_ply[min(ply, self.max_plies - 1)].add(hashes)
+        self.overall.add(hashes)
+        self.frequency.add(hashes)
+        self.positions += len(keys)
+        self.plies_seen = max(self.plies_seen, ply + 1)
+
+    def add_game(self, keys):
+        """:param keys: keys of the positions before each ply of one game, as game_keys returns"""
+        if not len(keys):
+            return
+        hashes = hash_keys(keys)
+        plies = np.minimum(np.arange(len(keys)), self.max_plies - 1)
+        for ply in range(int(plies[-1]) + 1):
+            self.per_ply[ply].add(hashes[plies == ply])
+        self.overall.add(hashes)
+        self.frequency.add(hashes)
+        self.positions += len(keys)
+        self.plies_seen = max(self.plies_seen, len(keys))
+
+    def count(self, key):
+        """:returns: estimated number of times the position of the bytes key occurred"""
+        return int(self.frequency.query(hash_keys(key))[0])
+
+    def distinct_per_ply(self):
+        """:returns: list of the estimated distinct positions at each ply reached"""
+        return [int(round(sketch.estimate())) for sketch in self.per_ply[:min(self.plies_seen, self.max_plies)]]
+
+    def merge(self, other):
+        """:returns: self, now describing the positions of both collectors"""
+        for mine, theirs in zip(self.per_ply, other.per_ply):
+            mine.merge(theirs)
+        self.overall.merge(other.overall)
+        self.frequency.merge(other.frequency)
+        self.positions += other.positions
+        self.plies_seen = max(self.plies_seen, other.plies_seen)
+        return self
+
+    @property
+    def nbytes(self):
+        """memory taken by the sketches"""
+        return sum(sketch.registers.nbytes for sketch in self.per_ply) + self.overall.registers.nbytes + \
+            self.frequency.counts.nbytes
+
+    def as_dict(self):
+        return {'positions': self.positions, 'distinct': int(round(self.overall.estimate())),
+                'distinct_per_ply': self.distinct_per_ply(), 'sketch_bytes': self.nbytes}
@@ -0,0 +1,86 @@
+"""
+Compact move logs of recorded games and their exact replay
+Actions include:
+    encode: packs a game recorded with Game(..., record=True) into bytes, a small header with
+        the board geometry and strategies followed by one byte per sowing
+    replay: plays a log again, feeding the logged bowls to the players instead of asking
+        their strategies
+    append_log, iter_logs: archive many logs in a single file, each prefixed with its length
+"""
+import functools
+import struct
+
+from .interface import Game
+
+MAGIC = b'KLOG'
+VERSION = 1
+ENDGAME = 1  # flag: the game was settled by an endgame database
+_HEADER = struct.Struct('<4sBBBBBB')  # magic, version, beads, bowls per player, strategies, flags
+_LENGTH = struct.Struct('<I')
+
+
+def encode(game):
+    """
+    :param game: an interface.Game created with record=True, usually finished
+    :returns: bytes of the move log
+    """
+    if game.moves is None:
+        raise ValueError("the game was not recorded, create it with record=True")
+    flags = ENDGAME if game.endgame is not None else 0
+    player1_strat, player2_strat = game.strategies
+    return _HEADER.pack(MAGIC, VERSION, game.beads_per_bowl, game.board.bowls_per_player,
+                        player1_strat, player2_strat, flags) + bytes(game.moves)
+
+
+def read_header(log):
+    """
+    :param log: bytes of a move log
+    :returns: (beads_per_bowl, num_of_bowls_per_player, player1_strat, player2_strat, flags)
+    """
+    if len(log) < _HEADER.size:
+        raise ValueError("not a move log, too short for the header")
+    magic, version, beads, bowls, player1_strat, player2_strat, flags = _HEADER.unpack_from(log)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a move log of version %d" % VERSION)
+    return beads, bowls, player1_strat, player2_strat, flags
+
+
+def replay(log, endgame=None):
+    """
+    :param log: bytes of a move log, as returned by encode
+    :param endgame: the endgame.EndgameTable the game was played with, needed when it had one
+    :returns: the finished interface.Game, in exactly the state the recorded game ended in
+    Extra turns, captures and the end of the game follow from the rules as they did in the
+    recorded game, so only the bowls need to be logged. Strategies are never consulted
+    """
+    beads, bowls, player1_strat, player2_strat, flags = read_header(log)
+    if flags & ENDGAME and endgame is None:
+        raise ValueError("the game was settled by an endgame database, pass the same one to replay it")
+    game = Game(beads, player1_strat, player2_strat, endgame if flags & ENDGAME else None, bowls)
+    # None once the log is used up, just as a strategy without a move would answer
+    next_move = functools.partial(next, iter(memoryview(log)[_HEADER.size:]), None)
+    game.player1.get_starting_index = next_move
+    game.player2.get_starting_index = next_move
+    game.run()
+    return game
+
+
+def append_log(handle, log):
+    """writes log to the binary file handle, after its length"""
+    handle.write(_LENGTH.pack(len(log)))
+    handle.write(log)
+
+
+def iter_logs(handle):
+    """yields every log appended to the binary file handle, in order"""
+    while True:
+        prefix = handle.read(_LENGTH.size)
+        if not prefix:
+            return
+        if len(prefix) < _LENGTH.size:
+            raise ValueError("truncated move log archive")
+        size, = _LENGTH.unpack(prefix)
+        log = handle.read(size)
+        if len(log) < size:
+            raise ValueError("truncated move log archive")
+        yield log
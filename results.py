@@ -0,0 +1,244 @@
+"""
+Collects the outcome of simulated games without keeping the games themselves around
+Actions include:
+    RunningStats: online mean and variance that can be merged across worker processes
+    Tally: win, draw and score counters plus running statistics of nests and game length
+    CsvSink/NdjsonSink: optional writers of one compact record per finished game
+Everything here has a fixed size, so memory stays flat however many games are simulated
+"""
+import csv
+import json
+import math
+
+RECORD_FIELDS = ('winner', 'player1_score', 'player2_score', 'player1_nest', 'player2_nest', 'turns')
+
+
+def game_record(game):
+    """
+    :param game: a finished interface.Game
+    :returns: tuple of values named by RECORD_FIELDS; winner is 0 for a draw, else 1 or 2
+    """
+    winner = 0 if game.winner is None else (1 if game.winner.title == 'player1' else 2)
+    return (winner, game.scores['player1'], game.scores['player2'],
+            game.player1.beads_in_nest, game.player2.beads_in_nest, game.turns)
+
+
+class RunningStats:
+    """
+    Count, mean, variance, minimum and maximum of a stream of numbers, updated one value
+    at a time with Welford's method
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def __repr__(self):
+        return "<RunningStats count: %d; mean: %.3f; std: %.3f>" % (self.count, self.mean, self.std)
+
+    def add(self, value):
+        """folds a single value into the statistics"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def add_values(self, values):
+        """
+        :param values: numpy array of values
+        :returns: self, with the whole array folded in at once
+        """
+        if not len(values):
+            return self
+        other = RunningStats()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other._m2 = float(((values - other.mean) ** 2).sum())
+        other.minimum, other.maximum = values.min().item(), values.max().item()
+        return self.merge(other)
+
+    def merge(self, other):
+        """
+        :param other: statistics of a disjoint stream
+        :returns: self, now describing both streams
+        """
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def variance(self):
+        """sample variance, 0 for fewer than two values"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'variance': self.variance,
+                'min': self.minimum, 'max': self.maximum}
+
+
+class Tally:
+    """
+    Aggregated outcome of a number of games, small enough to send between processes
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.draws = 0
+        self.wins = {'player1': 0, 'player2': 0}
+        self.scores = {'player1': 0, 'player2': 0}
+        self.nests = {'player1': RunningStats(), 'player2': RunningStats()}
+        self.turns = RunningStats()
+        self.seed = None  # entropy that reproduces the run, when it is known
+        self.stats = None  # instrument.Instrumentation of the games, when the run was instrumented
+        self.stopping = None  # report of the sequential.py rule that ended the run, if any
+        self.positions = None  # positions.PositionCollector of the games, when the run collected them
+        self.histograms = None  # histograms.GameHistograms of the games, when the run kept them
+
+    def __repr__(self):
+        return "<Tally games: %d; player1 wins: %d; player2 wins: %d; draws: %d>" % \
+               (self.games, self.wins['player1'], self.wins['player2'], self.draws)
+
+    def add(self, game):
+        """
+        :param game: a finished interface.Game
+        counts the winner and the final scores of the game
+        """
+        self.add_record(game_record(game))
+
+    def add_record(self, record):
+        """
+        :param record: tuple as returned by game_record
+        counts a game from its compact record
+        """
+        winner, player1_score, player2_score, player1_nest, player2_nest, turns = record
+        self.games += 1
+        if winner == 0:
+            self.draws += 1
+        else:
+            self.wins['player%d' % winner] += 1
+        self.scores['player1'] += player1_score
+        self.scores['player2'] += player2_score
+        self.nests['player1'].add(player1_nest)
+        self.nests['player2'].add(player2_nest)
+        self.turns.add(turns)
+
+    def merge(self, other):
+        """
+        :param other: another Tally, e.g one returned by a worker process
+        :returns: self, with the counts of other added in
+        """
+        self.games += other.games
+        self.draws += other.draws
+        for title in self.wins:
+            self.wins[title] += other.wins[title]
+            self.scores[title] += other.scores[title]
+            self.nests[title].merge(other.nests[title])
+        self.turns.merge(other.turns)
+        if other.stats is not None:
+            self.stats = other.stats if self.stats is None else self.stats.merge(other.stats)
+        if other.positions is not None:
+            self.positions = other.positions if self.positions is None else self.positions.merge(other.positions)
+        if other.histograms is not None:
+            self.histograms = other.histograms if self.histograms is None else \
+                self.histograms.merge(other.histograms)
+        return self
+
+    def win_rate(self, title):
+        """
+        :param title: player1 or player2
+        :returns: fraction of the games won by that player
+        """
+        return self.wins[title] / self.games if self.games else 0.0
+
+    @property
+    def draw_rate(self):
+        return self.draws / self.games if self.games else 0.0
+
+    def as_dict(self):
+        """summary of the tally as plain data, ready for json"""
+        summary = {'games': self.games, 'draws': self.draws, 'wins': dict(self.wins),
+                   'scores': dict(self.scores), 'seed': self.seed,
+                   'win_rate': {title: self.win_rate(title) for title in self.wins},
+                   'nests': {title: stats.as_dict() for title, stats in self.nests.items()},
+                   'turns': self.turns.as_dict()}
+        if self.stats is not None:
+            summary['stats'] = self.stats.as_dict()
+        if self.stopping is not None:
+            summary['stopping'] = self.stopping
+        if self.positions is not None:
+            summary['positions'] = self.positions.as_dict()
+        if self.histograms is not None:
+            summary['histograms'] = self.histograms.as_dict()
+        return summary
+
+
+class CsvSink:
+    """
+    Appends one csv row per finished game, header first
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(RECORD_FIELDS)
+
+    def write(self, record):
+        """:param record: tuple as returned by game_record"""
+        self._writer.writerow(record)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NdjsonSink(CsvSink):
+    """
+    Appends one json object per line for every finished game
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w')
+
+    def write(self, record):
+        """:param record: tuple as returned by game_record"""
+        self._file.write(json.dumps(dict(zip(RECORD_FIELDS, record)), separators=(',', ':')))
+        self._file.write('\n')
+
+
+def open_sink(path):
+    """
+    :param path: file to write per game records to; .ndjson/.jsonl give json lines, anything else csv
+    :returns: a sink object with write(record) and close()
+    """
+    if path.endswith(('.ndjson', '.jsonl')):
+        return NdjsonSink(path)
+    return CsvSink(path)
@@ -0,0 +1,324 @@
+"""
+Alpha-beta search, the engine behind player strategy 3
+Actions include:
+    Zobrist: random keys that hash a State into a 64 bit integer, updated move by move
+    TranspositionTable: fixed size, array backed store of earlier search results
+    AlphaBeta: iterative deepening negamax with move ordering over a State, reporting
+        nodes per second and the table hit rate
+"""
+from array import array
+import random
+import time
+
+from .state import State
+
+DEFAULT_DEPTH = 4
+DEFAULT_TABLE_MEGABYTES = 4
+
+EXACT, LOWER, UPPER = 0, 1, 2
+WIN = 1000  # added to the final margin of a finished game so any win beats any evaluation
+
+
+def final_value(margin):
+    """:returns: search value of a game settled with the given margin for the player to move"""
+    return margin + (WIN if margin > 0 else -WIN if margin < 0 else 0)
+
+
+class _Timeout(Exception):
+    """raised inside the search once the time budget of a move is spent"""
+
+
+class Zobrist:
+    """
+    One random 64 bit key per (bowl, bead count) pair plus keys for the player to move and an
+    extra turn in progress; the hash of a position is the xor of the keys that describe it
+    """
+
+    def __init__(self, total_bowls, max_beads, seed=0):
+        """
+        :param total_bowls: bowls on the board, nests included
+        :param max_beads: the largest bead count a single bowl can hold
+        :param seed: keys are drawn from a private generator seeded with this value
+        """
+        rng = random.Random(seed)
+        self.max_beads = max_beads
+        self.keys = [[rng.getrandbits(64) for _ in range(max_beads + 1)] for _ in range(total_bowls)]
+        self.player2 = rng.getrandbits(64)
+        self.pending = rng.getrandbits(64)
+        self._turns = (0, self.player2, self.pending, self.player2 ^ self.pending)
+        self._rings = {}  # each side's sowing path twice over, so a sowing's pits are a slice
+
+    def hash(self, state):
+        """:returns: 64 bit hash of the state"""
+        key = self._turns[state.to_move | state.pending << 1]
+        for keys, beads in zip(self.keys, state.pits):
+            key ^= keys[beads]
+        return key
+
+    def play(self, state, move, key):
+        """
+        :param key: hash of state
+        :returns: (token, key) the undo token of state.apply(move) and the hash of the state it
+            leaves, updated from the pits the sowing can change: the sown ones, the mover's nest
+            and the bowl a capture would empty. Sowing whole laps changes them all, so the hash is
+            recomputed then. Taking the move back needs no update, the caller keeps key
+        """
+        pits = state.pits
+        geometry = state.players[state.to_move].geometry
+        beads = pits[move]
+        ring = geometry.ring_size
+        if beads >= ring:
+            token = state.apply(move)
+            return token, self.hash(state)
+        rings = self._rings.get(geometry.side)
+        if rings is None:
+            rings = self._rings[geometry.side] = geometry.path * 2
+        start = geometry.position[move]
+        touched = rings[start:start + beads + 1]
+        if start + beads < geometry.bowls_per_player:
+            # the last bead stays on the mover's side, short of the nest: a capture may take the bowl opposite
+            touched += (geometry.nest, geometry.opposite[touched[-1]])
+        keys, turns = self.keys, self._turns
+        key ^= turns[state.to_move | state.pending << 1]
+        for pit in touched:
+            key ^= keys[pit][pits[pit]]
+        token = state.apply(move)
+        for pit in touched:
+            key ^= keys[pit][pits[pit]]
+        return token, key ^ turns[state.to_move | state.pending << 1]
+
+
+class TranspositionTable:
+    """
+    A fixed number of slots in flat typed arrays, sized from a memory budget. A slot keeps a
+    single entry; a new result replaces it when it comes from a search at least as deep or the
+    entry left in the slot belongs to an earlier search (depth preferred, oldest out)
+    """
+    ENTRY_BYTES = 8 + 1 + 4 + 1 + 2 + 2  # key, depth, value, flag, move, generation
+
+    def __init__(self, megabytes=DEFAULT_TABLE_MEGABYTES):
+        """:param megabytes: memory budget of the table"""
+        slots = 1
+        while slots * 2 * self.ENTRY_BYTES <= megabytes * 2 ** 20:
+            slots *= 2
+        self.size = slots
+        self.mask = slots - 1
+        # repeating a one item array is far quicker than converting a buffer, a table is built per player
+        self.keys = array('Q', [0]) * slots
+        self.depths = array('b', [-1]) * slots
+        self.values = array('i', [0]) * slots
+        self.flags = array('B', [0]) * slots
+        self.moves = array('h', [-1]) * slots  # bowl indices go past 127 on boards of 64 bowls a side
+        self.generations = array('H', [0]) * slots
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def __repr__(self):
+        return "<TranspositionTable slots: %d; hit rate: %.3f>" % (self.size, self.hit_rate)
+
+    def new_search(self):
+        """ages every stored entry by one search"""
+        self.generation = (self.generation + 1) & 0xffff
+
+    def probe(self, key):
+        """
+        :param key: Zobrist hash of a position
+        :returns: slot holding that position, or -1 when it is not in the table
+        """
+        self.probes += 1
+        slot = key & self.mask
+        if self.keys[slot] == key and self.depths[slot] >= 0:
+            self.hits += 1
+            return slot
+        return -1
+
+    def store(self, key, depth, value, flag, move):
+        """keeps a search result unless the slot holds a deeper result of the current search"""
+        slot = key & self.mask
+        if self.generations[slot] == self.generation and self.depths[slot] > depth:
+            return
+        self.keys[slot] = key
+        self.depths[slot] = min(depth, 127)
+        self.values[slot] = value
+        self.flags[slot] = flag
+        self.moves[slot] = move
+        self.generations[slot] = self.generation
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+
+class AlphaBeta:
+    """
+    Picks moves by iterative deepening alpha-beta search. An extra turn keeps the move with the
+    same player, so such children are searched without swapping sides
+    """
+
+    def __init__(self, depth=DEFAULT_DEPTH, time_budget=None, table_megabytes=DEFAULT_TABLE_MEGABYTES,
+                 endgame=None):
+        """
+        :param depth: deepest iteration, in single sowings
+        :param time_budget: optional seconds per move; the best move of the last finished
+            iteration is played once it runs out
+        :param table_megabytes: memory budget of the transposition table
+        :param endgame: optional endgame.EndgameTable; positions it covers are not searched
+            further but take their exact value from it
+        """
+        self.depth = depth
+        self.endgame = endgame
+        self.time_budget = time_budget
+        self.table = TranspositionTable(table_megabytes)
+        self.zobrist = None
+        self.state = None
+        self.nodes = 0
+        self.seconds = 0.0
+        self.reached_depth = 0
+        self._deadline = None
+
+    def __repr__(self):
+        return "<AlphaBeta depth: %d; nodes: %d; nodes/sec: %.0f; tt hit rate: %.3f>" % \
+               (self.depth, self.nodes, self.nodes_per_second, self.table.hit_rate)
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    def stats(self):
+        """:returns: dict of counters accumulated over every search made so far"""
+        return {'nodes': self.nodes, 'seconds': self.seconds, 'nodes_per_second': self.nodes_per_second,
+                'tt_probes': self.table.probes, 'tt_hits': self.table.hits,
+                'tt_hit_rate': self.table.hit_rate, 'reached_depth': self.reached_depth}
+
+    def choose(self, board, to_move, pending=False):
+        """
+        :param board: the Board to move on, left untouched
+        :param to_move: 0 for player1, 1 for player2
+        :param pending: True when the move is the extra sowing of a turn
+        :returns: index of the bowl to sow from, None when there is no legal move
+        """
+        state = State.from_board(board, to_move, pending)
+        moves = state.legal_moves()
+        if len(moves) < 2:
+            return moves[0] if moves else None
+        total = sum(state.pits)
+        if self.zobrist is None or self.zobrist.max_beads < total or len(self.zobrist.keys) != len(state.pits):
+            # new keys make every stored hash meaningless, so the table starts afresh too
+            self.zobrist = Zobrist(len(state.pits), total)
+            if self.table.probes:
+                self.table = TranspositionTable(self.table.size * TranspositionTable.ENTRY_BYTES / 2 ** 20)
+        self.state = state
+        self.table.new_search()
+        started = time.perf_counter()
+        self._deadline = started + self.time_budget if self.time_budget else None
+        best = moves[0]
+        try:
+            for depth in range(1, self.depth + 1):
+                best = self._root(depth, moves, best)
+                self.reached_depth = depth
+        except _Timeout:
+            pass
+        self.seconds += time.perf_counter() - started
+        self.state = None
+        return best
+
+    def _root(self, depth, moves, previous_best):
+        """searches every root move to depth, the previous iteration's best first"""
+        state = self.state
+        mover = state.to_move
+        alpha, beta = -10 * WIN, 10 * WIN
+        best = previous_best
+        key = self.zobrist.hash(state)
+        for move in [previous_best] + [move for move in moves if move != previous_best]:
+            token, child = self.zobrist.play(state, move, key)
+            if state.to_move == mover:
+                value = self._search(depth - 1, alpha, beta, child)
+            else:
+                value = -self._search(depth - 1, -beta, -alpha, child)
+            state.undo(token)
+            if value > alpha:
+                alpha = value
+                best = move
+        return best
+
+    def _search(self, depth, alpha, beta, key=None):
+        """
+        :param key: Zobrist hash of the current state, kept up to date move by move; computed
+            afresh when not given
+        :returns: value of the current state for the player to move
+        """
+        self.nodes += 1
+        state = self.state
+        if state.ender is not None:
+            player1, player2 = state.scores()
+            return final_value(player2 - player1 if state.to_move else player1 - player2)
+        endgame = self.endgame
+        if endgame is not None and endgame.covers(state.board, state.to_move, state.pending):
+            return final_value(state.nest_difference() + endgame.value(state.board, state.to_move))
+        if depth <= 0:
+            return state.nest_difference()
+        if self._deadline is not None and not self.nodes & 1023 and time.perf_counter() > self._deadline:
+            raise _Timeout()
+
+        table = self.table
+        if key is None:
+            key = self.zobrist.hash(state)
+        slot = table.probe(key)
+        hint = -1
+        if slot >= 0:
+            hint = table.moves[slot]
+            if table.depths[slot] >= depth:
+                value, flag = table.values[slot], table.flags[slot]
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value > alpha:
+                    alpha = value
+                elif flag == UPPER and value < beta:
+                    beta = value
+                if alpha >= beta:
+                    return value
+
+        original_alpha = alpha
+        mover = state.to_move
+        best_value, best_move = -10 * WIN, -1
+        play = self.zobrist.play
+        for move in self._ordered(state, hint):
+            token, child = play(state, move, key)
+            if state.to_move == mover:
+                value = self._search(depth - 1, alpha, beta, child)
+            else:
+                value = -self._search(depth - 1, -beta, -alpha, child)
+            state.undo(token)
+            if value > best_value:
+                best_value, best_move = value, move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table.store(key, depth, best_value, flag, best_move)
+        return best_value
+
+    def _ordered(self, state, hint):
+        """
+        :returns: legal moves with the table's best move first, then moves ending in the
+        player's own nest, then captures, then the rest
+        """
+        pits = state.pits
+        nest = state.players[state.to_move].nest
+        first, rest = [], []
+        for move in state.legal_moves():
+            landing = move + pits[move]
+            if move == hint:
+                first.insert(0, move)
+            elif landing == nest or (landing < nest and not pits[landing]):
+                first.append(move)
+            else:
+                rest.append(move)
+        return first + rest
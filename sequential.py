@@ -0,0 +1,246 @@
+"""
+Sequential early stopping: play games in chunks and stop as soon as player1's win rate is known
+well enough
+Actions include:
+    WilsonRule: stops once the Wilson score interval is narrow enough
+    BayesRule: stops once the equal tailed credible interval of a Beta posterior is narrow enough
+    SprtRule: Wald's sequential probability ratio test of player1 being better or worse than even
+    run_sequential: run_parallel that checks a rule after every chunk, in order, and stops early
+
+Draws count as games player1 did not win.
+"""
+import itertools
+import math
+import multiprocessing
+import os
+
+from .parallel import chunk_count, chunk_tasks, play_numbered, run_settings, start_checkpoint
+
+
+def normal_quantile(probability):
+    """:returns: z with P(Z <= z) = probability for a standard normal Z, by bisection"""
+    low, high = -10.0, 10.0
+    for _ in range(100):
+        middle = (low + high) / 2
+        if 0.5 * math.erfc(-middle / math.sqrt(2)) < probability:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def wilson_interval(wins, games, confidence=0.95):
+    """:returns: (low, high) Wilson score interval of a binomial proportion"""
+    if not games:
+        return 0.0, 1.0
+    z = normal_quantile(0.5 + confidence / 2)
+    rate = wins / games
+    denominator = 1 + z * z / games
+    centre = (rate + z * z / (2 * games)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+def _beta_fraction(a, b, x):
+    """continued fraction of the incomplete beta function, modified Lentz's method"""
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    fraction = d
+    for m in range(1, 500):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                          -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            fraction *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return fraction
+
+
+def beta_cdf(x, a, b):
+    """:returns: the regularized incomplete beta function I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(log_front) * _beta_fraction(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _beta_fraction(b, a, 1 - x) / b
+
+
+def beta_quantile(probability, a, b):
+    """:returns: x with beta_cdf(x, a, b) = probability, by bisection"""
+    low, high = 0.0, 1.0
+    for _ in range(60):
+        middle = (low + high) / 2
+        if beta_cdf(middle, a, b) < probability:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class WilsonRule:
+    """
+    Stops once the Wilson interval of player1's win rate is at most 2 * precision wide
+    """
+    name = 'wilson'
+
+    def __init__(self, precision=0.01, confidence=0.95, min_games=100):
+        """
+        :param precision: half width of the interval to reach
+        :param confidence: coverage of the interval
+        :param min_games: games played before the rule may stop the run
+        """
+        self.precision = precision
+        self.confidence = confidence
+        self.min_games = min_games
+
+    def __repr__(self):
+        return "<%s precision: %s; confidence: %s>" % (type(self).__name__, self.precision, self.confidence)
+
+    def interval(self, tally):
+        return wilson_interval(tally.wins['player1'], tally.games, self.confidence)
+
+    def done(self, tally):
+        """:returns: True once tally is conclusive"""
+        low, high = self.interval(tally)
+        return tally.games >= self.min_games and high - low <= 2 * self.precision
+
+    def report(self, tally):
+        """:returns: dict of the rule, the games used, the rate and the final interval"""
+        low, high = self.interval(tally)
+        return {'rule': self.name, 'games': tally.games, 'win_rate': tally.win_rate('player1'),
+                'interval': [low, high], 'confidence': self.confidence, 'done': self.done(tally)}
+
+
+class BayesRule(WilsonRule):
+    """
+    Stops once the equal tailed credible interval of player1's win rate under a uniform
+    Beta(1, 1) prior is at most 2 * precision wide
+    """
+    name = 'bayes'
+
+    def interval(self, tally):
+        wins = tally.wins['player1']
+        a, b = 1 + wins, 1 + tally.games - wins
+        tail = (1 - self.confidence) / 2
+        return beta_quantile(tail, a, b), beta_quantile(1 - tail, a, b)
+
+
+class SprtRule:
+    """
+    Wald's sequential probability ratio test of H0: player1 wins with probability 0.5 - delta
+    against H1: 0.5 + delta, with error rates alpha and beta. Stops when either is accepted
+    """
+    name = 'sprt'
+
+    def __init__(self, delta=0.05, alpha=0.05, beta=0.05, confidence=0.95):
+        """
+        :param delta: distance from an even match of both hypotheses
+        :param alpha: probability of accepting H1 when H0 holds
+        :param beta: probability of accepting H0 when H1 holds
+        :param confidence: coverage of the Wilson interval reported alongside
+        """
+        self.delta = delta
+        self.alpha = alpha
+        self.beta = beta
+        self.confidence = confidence
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+
+    def __repr__(self):
+        return "<SprtRule delta: %s; alpha: %s; beta: %s>" % (self.delta, self.alpha, self.beta)
+
+    def llr(self, tally):
+        """:returns: log likelihood ratio of H1 over H0 given the tally"""
+        p0, p1 = 0.5 - self.delta, 0.5 + self.delta
+        wins = tally.wins['player1']
+        return wins * math.log(p1 / p0) + (tally.games - wins) * math.log((1 - p1) / (1 - p0))
+
+    def decision(self, tally):
+        """:returns: 'H1' (player1 is better), 'H0' (worse) or None while undecided"""
+        llr = self.llr(tally)
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def done(self, tally):
+        return self.decision(tally) is not None
+
+    def report(self, tally):
+        low, high = wilson_interval(tally.wins['player1'], tally.games, self.confidence)
+        return {'rule': self.name, 'games': tally.games, 'win_rate': tally.win_rate('player1'),
+                'interval': [low, high], 'confidence': self.confidence, 'done': self.done(tally),
+                'llr': self.llr(tally), 'bounds': [self.lower, self.upper], 'decision': self.decision(tally)}
+
+
+RULES = {'wilson': WilsonRule, 'bayes': BayesRule, 'sprt': SprtRule}
+
+
+def run_sequential(games, beads_per_bowl, player1_strat, player2_strat, rule, workers=None, seed=None,
+                   chunk_size=200, sink=None, endgame_path=None, instrumented=False, num_of_bowls_per_player=6,
+                   positions=False, outcomes=None, histograms=False, checkpoint=None, resume=False):
+    """
+    :param games: the most games to play
+    :param rule: a WilsonRule, BayesRule or SprtRule checked after every chunk
+    :param chunk_size: games between two checks
+    the other parameters are those of parallel.run_parallel, outcomes included: its slice of a
+    chunk is aggregated as soon as the chunk is merged. Chunks are merged in order, so
+    the run stops after the same games whatever the number of workers, or however many times it
+    was interrupted and resumed from checkpoint
+    :returns: Tally of the games played, with the entropy of the run in tally.seed and the
+        rule's report in tally.stopping
+    """
+    workers = workers or os.cpu_count() or 1
+    if resume and checkpoint is not None:
+        seed = checkpoint.resume_seed(seed)
+    entropy, tasks = chunk_tasks(games, beads_per_bowl, player1_strat, player2_strat, seed, chunk_size,
+                                 sink is not None, endgame_path, instrumented, num_of_bowls_per_player, positions,
+                                 outcomes, histograms)
+    settings = run_settings(games, beads_per_bowl, player1_strat, player2_strat, chunk_size, sink is not None,
+                            endgame_path, instrumented, num_of_bowls_per_player, positions, histograms)
+    tally, done, complete = start_checkpoint(checkpoint, resume, entropy, settings, sink, outcomes)
+    # chunks are merged in order, so the ones done are always the first ones
+    left = 0 if complete else chunk_count(games, chunk_size) - len(done)
+    # games is only a cap, the chunks are built as they are taken and those past the stop never are
+    pending = iter(()) if complete else itertools.islice(enumerate(tasks), len(done), None)
+    if workers == 1 or left <= 1:
+        _collect_until(map(play_numbered, pending), tally, sink, rule, games, chunk_size, outcomes, done,
+                       checkpoint)
+    else:
+        # leaving the block terminates the workers still playing chunks past the stop
+        with multiprocessing.Pool(min(workers, left)) as pool:
+            _collect_until(pool.imap(play_numbered, pending), tally, sink, rule, games, chunk_size, outcomes, done,
+                           checkpoint)
+    if outcomes is not None:
+        # chunks played past the stop wrote their games too, the pool is gone so none still does
+        outcomes.discard(tally.games)
+    if checkpoint is not None:
+        checkpoint.save(tally, done, complete=True)
+    tally.stopping = rule.report(tally)
+    return tally
+
+
+def _collect_until(results, tally, sink, rule, games, chunk_size, outcomes=None, done=None, checkpoint=None):
+    """merges numbered chunk results of a run of games in order until rule is satisfied"""
+    for index, (chunk_tally, records) in results:
+        if outcomes is not None:
+            # the chunk's games follow the ones merged so far, chunk_tally holds none of them
+            outcomes.fill(tally, tally.games, min(tally.games + chunk_size, games))
+        tally.merge(chunk_tally)
+        if sink is not None:
+            for record in records:
+                sink.write(record)
+        if checkpoint is not None:
+            done.add(index)
+        if rule.done(tally):
+            return
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save(tally, done)
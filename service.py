@@ -0,0 +1,245 @@
+"""
+A local simulation service shared by everyone on the machine
+Actions include:
+    SimulationService: an asyncio server on a TCP port or a Unix socket that takes simulation
+        jobs, plays their chunks on one shared pool of worker processes and streams progress
+        and the final tally back; a job identical to one in flight is joined, not played again
+    simulate_remote: the client side, yielding the events of a job
+
+The protocol is newline delimited json. A client sends a single job line such as
+    {"games": 10000, "beads": 4, "player1": 1, "player2": 2, "seed": 7}
+("bowls" and "seed" are optional) and receives event lines until the job ends:
+    {"event": "accepted", "job": 3, "joined": false, "games": 10000}
+    {"event": "progress", "job": 3, "played": 2000, "games": 10000, "wins": {...}, "draws": 0}
+    {"event": "done", "job": 3, "tally": {...}}
+or {"event": "error", "message": "..."} when the job is refused or fails.
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .parallel import chunk_tasks, play_chunk
+from .results import Tally
+from .strategies import strategy_ids
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def parse_job(line):
+    """
+    :param line: a job line sent by a client
+    :returns: (games, beads, player1, player2, seed, bowls) of the job
+    raises ValueError when the job is malformed
+    """
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError("a job is a json object")
+    try:
+        games, beads = int(request['games']), int(request['beads'])
+        player1, player2 = int(request['player1']), int(request['player2'])
+    except (KeyError, TypeError, ValueError, OverflowError):  # int() of 1e400 overflows, of NaN or "x" fails
+        raise ValueError("a job needs integer games, beads, player1 and player2")
+    try:
+        bowls = int(request.get('bowls', 6))
+        seed = request.get('seed')
+        if seed is not None:
+            seed = int(seed)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("bowls and seed are integers when given")
+    if games < 1 or beads < 1 or bowls < 1:
+        raise ValueError("games, beads and bowls must be positive")
+    if player1 not in strategy_ids() or player2 not in strategy_ids():
+        raise ValueError("strategies are {}".format(strategy_ids()))
+    return games, beads, player1, player2, seed, bowls
+
+
+class Job:
+    """
+    A simulation in progress and the queues of the clients following it
+    """
+
+    def __init__(self, number, key):
+        self.number = number
+        self.key = key
+        self.games = key[0]
+        self.tally = Tally()
+        self.subscribers = []
+
+    def __repr__(self):
+        return "<Job %d: %d of %d games>" % (self.number, self.tally.games, self.games)
+
+    def progress(self):
+        return {'event': 'progress', 'job': self.number, 'played': self.tally.games, 'games': self.games,
+                'wins': dict(self.tally.wins), 'draws': self.tally.draws}
+
+    def subscribe(self):
+        """:returns: an asyncio.Queue receiving every event from now on"""
+        queue = asyncio.Queue()
+        self.subscribers.append(queue)
+        return queue
+
+    def publish(self, event):
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+
+class SimulationService:
+    """
+    Serves simulation jobs from a single process pool, sized to the machine so that however
+    many clients there are the cores are never oversubscribed
+    """
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param workers: worker processes of the shared pool, the number of cpus by default
+        :param chunk_size: games per pool task; progress is reported after every chunk
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.pool = None
+        self.server = None
+        self.jobs = {}  # in flight jobs by key, for joining identical ones
+        self.jobs_started = 0
+
+    def __repr__(self):
+        return "<SimulationService workers: %d; jobs in flight: %d>" % (self.workers, len(self.jobs))
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        """
+        :param host: interface to listen on, only the local machine by default
+        :param port: TCP port, 0 picks a free one (see self.address)
+        :param path: Unix socket path to listen on instead of a TCP port
+        :returns: the asyncio server
+        """
+        self.pool = ProcessPoolExecutor(self.workers)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    @property
+    def address(self):
+        """the (host, port) or socket path the server listens on"""
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        # waiting for the workers to exit blocks, so it is done off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, lambda: self.pool.shutdown(cancel_futures=True))
+
+    def submit(self, games, beads, player1, player2, seed=None, bowls=6):
+        """
+        :returns: (job, joined) the job playing these games, joined is True when an identical
+            job was already in flight. Only seeded jobs are identical: unseeded ones are each
+            meant to be a fresh sample
+        """
+        key = (games, beads, player1, player2, seed, bowls)
+        if seed is not None and key in self.jobs:
+            return self.jobs[key], True
+        self.jobs_started += 1
+        job = Job(self.jobs_started, key)
+        if seed is not None:
+            self.jobs[key] = job
+        asyncio.get_running_loop().create_task(self._run(job))
+        return job, False
+
+    async def _run(self, job):
+        """plays the chunks of job on the shared pool and publishes each as it completes"""
+        games, beads, player1, player2, seed, bowls = job.key
+        loop = asyncio.get_running_loop()
+        try:
+            entropy, tasks = chunk_tasks(games, beads, player1, player2, seed, self.chunk_size,
+                                         num_of_bowls_per_player=bowls)
+            job.tally.seed = entropy
+            # a window of chunks in flight keeps every worker busy without queueing the whole job
+            futures = set()
+            for task in tasks:
+                futures.add(loop.run_in_executor(self.pool, play_chunk, task))
+                if len(futures) >= 2 * self.workers:
+                    futures = await self._merge_finished(job, futures)
+            while futures:
+                futures = await self._merge_finished(job, futures)
+            job.publish({'event': 'done', 'job': job.number, 'tally': job.tally.as_dict()})
+        except Exception as error:
+            job.publish({'event': 'error', 'job': job.number, 'message': str(error)})
+        finally:
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+
+    @staticmethod
+    async def _merge_finished(job, futures):
+        """waits for at least one chunk of futures, merges and publishes it and returns the others"""
+        finished, futures = await asyncio.wait(futures, return_when=asyncio.FIRST_COMPLETED)
+        for future in finished:
+            chunk_tally, _ = future.result()
+            job.tally.merge(chunk_tally)
+            job.publish(job.progress())
+        return futures
+
+    async def handle(self, reader, writer):
+        """serves one client connection: reads a job line, streams its events back"""
+        job = queue = None
+        try:
+            line = await reader.readline()
+            try:
+                job, joined = self.submit(*parse_job(line))
+            except ValueError as error:
+                await self._send(writer, {'event': 'error', 'message': str(error)})
+                return
+            queue = job.subscribe()
+            await self._send(writer, {'event': 'accepted', 'job': job.number, 'joined': joined, 'games': job.games})
+            if joined and job.tally.games:
+                await self._send(writer, job.progress())
+            while True:
+                event = await queue.get()
+                await self._send(writer, event)
+                if event['event'] in ('done', 'error'):
+                    break
+        except ConnectionError:
+            pass  # the client went away, the job still finishes for the others
+        finally:
+            if queue is not None:
+                job.subscribers.remove(queue)
+            writer.close()
+
+    @staticmethod
+    async def _send(writer, event):
+        writer.write(json.dumps(event).encode() + b'\n')
+        await writer.drain()
+
+
+async def simulate_remote(job, host='127.0.0.1', port=None, path=None):
+    """
+    :param job: dict of the job, see the module docstring
+    :param port: TCP port of the service, or path its Unix socket
+    yields every event the service sends for the job, the last one done or error
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(json.dumps(job).encode() + b'\n')
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            event = json.loads(line)
+            yield event
+            if event['event'] in ('done', 'error'):
+                return
+    finally:
+        writer.close()
+
+
+async def serve(host='127.0.0.1', port=8765, path=None, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """runs a SimulationService until it is interrupted"""
+    service = SimulationService(workers, chunk_size)
+    server = await service.start(host, port, path)
+    print("serving simulations on {}".format(service.address))
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,160 @@
+"""
+A game position that search strategies can walk without copying boards
+Actions include:
+    State: a Board plus whose turn it is, with legal move generation and moves that are
+        applied in place and taken back with an undo token
+    a factory method for the starting position
+
+One move is a single sowing. Ending in the empty nest keeps the turn with the same player,
+exactly as interface.Player.move plays it, including the forfeit of a lone nest bead after
+the extra sowing.
+"""
+from .interface import Board, create_player
+
+# layout of an undo token, an int packing everything a move changed: three 16 bit fields, the bowl
+# sown, the beads it held and the captured bowl, then the flags
+_BEADS_SHIFT = 16
+_CAPTURED_SHIFT = 32
+_PENDING_BIT = 1 << 48
+_FORFEIT_BIT = 1 << 49
+_MOVER_BIT = 1 << 50
+_FIELD = 0xffff
+
+
+class State:
+    """
+    Represents a position: the beads on a board, the player to move (0 for player1,
+    1 for player2) and whether that player is playing an extra turn
+    """
+    __slots__ = ('board', 'pits', 'sums', 'players', 'to_move', 'pending', 'ender')
+
+    def __init__(self, board, to_move=0, pending=False):
+        """
+        :param board: a Board, owned and mutated by this state from now on
+        :param to_move: 0 if player1 moves next, 1 for player2
+        :param pending: True when the player to move is playing an extra turn
+        """
+        self.board = board
+        self.pits = board.pits
+        self.sums = board.sums
+        self.players = (create_player('player1', board, None), create_player('player2', board, None))
+        self.to_move = to_move
+        self.pending = pending
+        self.ender = None  # the player who ran out of moves, once the game is over
+        if not board.sums[to_move]:
+            self.ender = to_move
+
+    def __repr__(self):
+        return "<State to_move: player%d; pending: %s; over: %s>\n%r" % \
+               (self.to_move + 1, self.pending, self.is_over, self.board)
+
+    @classmethod
+    def from_board(cls, board, to_move=0, pending=False):
+        """:returns: a State over a copy of board, leaving board itself untouched"""
+        return cls(board.copy(), to_move, pending)
+
+    def copy_from(self, other):
+        """
+        :param other: a State of the same geometry
+        overwrites this state with other in place, reusing the arrays, so that a scratch
+        state can be reset for every playout without building a new Board
+        """
+        self.pits[:] = other.pits
+        self.sums[:] = other.sums
+        self.to_move = other.to_move
+        self.pending = other.pending
+        self.ender = other.ender
+
+    @property
+    def is_over(self):
+        return self.ender is not None
+
+    def legal_moves(self):
+        """:returns: list of the non empty bowls the player to move may sow from"""
+        if self.ender is not None:
+            return []
+        player = self.players[self.to_move]
+        pits = self.pits
+        return [index for index in range(player.bowls_range_start, player.nest) if pits[index]]
+
+    def apply(self, move):
+        """
+        :param move: index of a non empty bowl of the player to move
+        :returns: an undo token for undo()
+        plays a single sowing in place, then hands the turn over or ends the game
+        """
+        pits, sums = self.pits, self.sums
+        mover = self.to_move
+        player = self.players[mover]
+        nest = player.nest
+        beads = pits[move]
+        landing = move + beads
+        earned = landing == nest and not pits[nest]
+        captured = pits[player.geometry.opposite[landing]] if landing < nest and not pits[landing] else -1
+        token = move | beads << _BEADS_SHIFT | (captured + 1) << _CAPTURED_SHIFT
+        if mover:
+            token |= _MOVER_BIT
+        if self.pending:
+            token |= _PENDING_BIT
+
+        player._move(move)
+        if (self.pending or (earned and not sums[mover])) and pits[nest] == 1:
+            # the extra turn is over (or cannot be played) and the nest holds a lone bead
+            pits[nest] = 0
+            sums[2] -= 1
+            token |= _FORFEIT_BIT
+
+        if earned and sums[mover]:
+            self.pending = True
+            return token
+        self.pending = False
+        if not sums[mover]:
+            self.ender = mover
+        elif not sums[1 - mover]:
+            self.ender = 1 - mover
+        else:
+            self.to_move = 1 - mover
+        return token
+
+    def undo(self, token):
+        """
+        :param token: the value returned by the apply() call to take back
+        restores beads, captures, nests, the player to move and the extra turn flag exactly
+        """
+        mover = 1 if token & _MOVER_BIT else 0
+        player = self.players[mover]
+        if token & _FORFEIT_BIT:
+            self.pits[player.nest] += 1
+            self.sums[2] += 1
+        captured = (token >> _CAPTURED_SHIFT & _FIELD) - 1
+        player._unmove(token & _FIELD, token >> _BEADS_SHIFT & _FIELD, captured if captured >= 0 else None)
+        self.to_move = mover
+        self.pending = bool(token & _PENDING_BIT)
+        self.ender = None
+
+    def scores(self):
+        """
+        :returns: (player1 beads, player2 beads) as interface.Game.determine_winner counts them
+        once the game is over: the player who ran out of moves also takes the beads left in the
+        other player's bowls
+        """
+        nests = self.board.nests
+        player1 = self.pits[nests[0]]
+        player2 = self.pits[nests[1]]
+        if self.ender == 0:
+            player1 += self.sums[0] + self.sums[1]
+        elif self.ender == 1:
+            player2 += self.sums[0] + self.sums[1]
+        return player1, player2
+
+    def nest_difference(self):
+        """:returns: beads in the player to move's nest less those in the other player's nest"""
+        nests = self.board.nests
+        return self.pits[nests[self.to_move]] - self.pits[nests[1 - self.to_move]]
+
+
+def create_state(beads_per_bowl, num_of_bowls_per_player=6):
+    """
+    used to create the State at the start of a game, player1 to move
+    """
+    return State(Board(beads_per_bowl, num_of_bowls_per_player))
@@ -0,0 +1,186 @@
+"""
+The strategies players choose their moves with, registered under the integer ids engine.py
+prompts for
+Actions include:
+    Strategy: a policy; choose picks the move of one interface.Player, choose_batch the moves
+        for a whole array of boards at once
+    RandomBowl (1) and FullestBowl (2): choose_batch as numpy masks and an argmax over random
+        keys, which breaks ties uniformly
+    AlphaBetaSearch (3) and MonteCarloSearch (4): the searches of search.py and mcts.py, played
+        one board at a time
+    register_strategy, get_strategy, strategy_ids: the registry, so a new strategy is a plug in
+        rather than an edit to interface.Player
+
+numpy is imported by choose_batch only, interface.Player never needs it.
+"""
+import random
+
+NO_MOVE = -1  # move of a board whose player has nothing to choose from
+
+
+class Strategy:
+    """
+    A policy. Subclasses implement choose and may override choose_batch with a vectorized form
+    """
+    name = 'strategy'
+
+    def __repr__(self):
+        return "<%s %s>" % (type(self).__name__, self.name)
+
+    def choose(self, player):
+        """
+        :param player: an interface.Player about to sow, on its board
+        :returns: index of the bowl to sow from, None when there is none
+        """
+        raise NotImplementedError
+
+    def choose_batch(self, pits, to_move, rng, pending=None):
+        """
+        :param pits: (N, pits) integer array of boards, columns in interface.Board order
+        :param to_move: N players to move, 0 for player1 and 1 for player2
+        :param rng: a numpy Generator
+        :param pending: optional N flags of boards in the middle of an extra turn
+        :returns: N int64 pit indices, NO_MOVE where there is none
+        By default the boards are played one at a time through choose, on a scratch board
+        """
+        import numpy as np
+        from .interface import Board, create_player
+        pits = np.asarray(pits)
+        board = Board(0, (pits.shape[1] - 2) // 2)
+        players = [create_player('player1', board, None), create_player('player2', board, None)]
+        player_rng = random.Random(int(rng.integers(1 << 63)))
+        moves = np.full(len(pits), NO_MOVE, dtype=np.int64)
+        for row, side in enumerate(np.asarray(to_move).tolist()):
+            for index, beads in enumerate(pits[row].tolist()):
+                board.set_beads(index, beads)
+            player = players[side]
+            player.rng = player_rng
+            player.in_extra_turn = bool(pending[row]) if pending is not None else False
+            move = self.choose(player)
+            if move is not None:
+                moves[row] = move
+        return moves
+
+
+def own_bowls(pits, to_move):
+    """:returns: (offsets, own) the pit index and the beads of each bowl of the player to move"""
+    import numpy as np
+    n = (pits.shape[1] - 2) // 2
+    offsets = (np.asarray(to_move, dtype=np.int64) * (n + 1))[:, None] + np.arange(n)
+    return offsets, np.take_along_axis(pits, offsets, axis=1)
+
+
+def pick(candidates, offsets, rng):
+    """
+    :param candidates: (N, bowls) boolean array of the bowls each board may sow from
+    :returns: for each board the pit index of a candidate drawn uniformly, NO_MOVE without any
+    """
+    import numpy as np
+    # the candidate with the highest random key wins
+    keys = np.where(candidates, rng.random(candidates.shape), -1.0)
+    moves = offsets[np.arange(len(offsets)), keys.argmax(axis=1)]
+    moves[~candidates.any(axis=1)] = NO_MOVE
+    return moves
+
+
+class RandomBowl(Strategy):
+    """
+    Sows from any bowl holding beads, uniformly at random
+    """
+    name = 'random bowl'
+
+    def choose(self, player):
+        pits = player.board.pits
+        # the nest closes the owned range, so it is never a valid index to pick from
+        valid_indices = [index for index in range(player.bowls_range_start, player.nest) if pits[index]]
+        if valid_indices:
+            return player.rng.choice(valid_indices)
+
+    def choose_batch(self, pits, to_move, rng, pending=None):
+        offsets, own = own_bowls(pits, to_move)
+        return pick(own > 0, offsets, rng)
+
+
+class FullestBowl(Strategy):
+    """
+    Sows from one of the fullest bowls, at random among ties; with every bowl empty they are
+    all the fullest
+    """
+    name = 'fullest bowl'
+
+    def choose(self, player):
+        pits = player.board.pits
+        valid_indices = []
+        max_beads = 0
+        for index in range(player.bowls_range_start, player.nest):
+            if pits[index] == max_beads:
+                valid_indices.append(index)
+            if pits[index] > max_beads:
+                max_beads = pits[index]
+                valid_indices = [index]
+        return player.rng.choice(valid_indices)
+
+    def choose_batch(self, pits, to_move, rng, pending=None):
+        offsets, own = own_bowls(pits, to_move)
+        return pick(own == own.max(axis=1, keepdims=True), offsets, rng)
+
+
+class AlphaBetaSearch(Strategy):
+    """
+    The move search.AlphaBeta finds, with one searcher and table per player kept from move to
+    move; nothing is carried from one game to the next, so a game plays the same moves whatever
+    the process played before
+    """
+    name = 'alpha-beta search'
+
+    def choose(self, player):
+        if player.searcher is None:
+            from .search import AlphaBeta  # imported here as search builds on interface
+            player.searcher = AlphaBeta()
+        return player.searcher.choose(player.board, player.side, player.in_extra_turn)
+
+
+class MonteCarloSearch(Strategy):
+    """
+    The move mcts.MonteCarlo finds, with one tree per player kept from move to move
+    """
+    name = 'monte carlo tree search'
+
+    def choose(self, player):
+        if player.searcher is None:
+            from .mcts import MonteCarlo
+            player.searcher = MonteCarlo(rng=random.Random(player.rng.getrandbits(64)))
+        return player.searcher.choose(player.board, player.side, player.in_extra_turn)
+
+
+_strategies = {}
+
+
+def register_strategy(strategy_id, strategy):
+    """
+    :param strategy_id: the integer players and the command line refer to the strategy by
+    :param strategy: a Strategy; replaces any registered under the same id
+    """
+    _strategies[strategy_id] = strategy
+
+
+def get_strategy(strategy_id):
+    """
+    :returns: the Strategy registered under strategy_id
+    raises ValueError for an id nothing is registered under
+    """
+    try:
+        return _strategies[strategy_id]
+    except KeyError:
+        raise ValueError("no strategy {}, choose from {}".format(strategy_id, strategy_ids()))
+
+
+def strategy_ids():
+    """:returns: sorted list of the registered ids"""
+    return sorted(_strategies)
+
+
+register_strategy(1, RandomBowl())
+register_strategy(2, FullestBowl())
+register_strategy(3, AlphaBetaSearch())
+register_strategy(4, MonteCarloSearch())
@@ -0,0 +1,71 @@
+import random
+import unittest
+from unittest.mock import patch
+import numpy as np
+from .interface import Game, Player
+from .batch import BatchGame, play_batch, DRAW, PLAYER1, PLAYER2
+
+
+class BatchGameTest(unittest.TestCase):
+    """
+    Checks the vectorized engine against the object model in interface
+    """
+
+    def play_recorded(self, beads_per_bowl, player1_strat, player2_strat):
+        """plays an interface.Game and returns it with the pit indices it sowed from, in order"""
+        game = Game(beads_per_bowl, player1_strat, player2_strat)
+        moves = []
+        original = Player._move
+
+        def recording(player, start_index, *args):
+            moves.append(start_index)
+            return original(player, start_index, *args)
+
+        with patch.object(Player, '_move', recording):
+            game.run()
+        return game, moves
+
+    def test_initial_layout(self):
+        batch = BatchGame(4, 3, 3)
+        self.assertEqual(batch.pits.shape, (4, 8))
+        self.assertListEqual(batch.pits[2].tolist(), [3, 3, 3, 0, 3, 3, 3, 0])
+        self.assertTrue(batch.legal_mask().all())
+
+    def test_single_moves(self):
+        """same moves as PlayerTest.test_two_players_moves"""
+        batch = BatchGame(1, 3, 3)
+        expected = [(1, [3, 0, 4, 1, 4, 3, 3, 0]), (4, [4, 0, 4, 1, 0, 4, 4, 1]),
+                    (0, [0, 1, 5, 2, 1, 4, 4, 1]), (6, [1, 2, 6, 2, 1, 4, 0, 2])]
+        for move, board in expected:
+            batch.step([move])
+            self.assertListEqual(batch.pits[0].tolist(), board)
+
+    def test_matches_interface_game(self):
+        """replaying the moves of random interface games gives the same boards and winners"""
+        random.seed(7)
+        for index in range(300):
+            beads = 3 + index % 4
+            game, moves = self.play_recorded(beads, 1 + index % 2, 1 + (index // 2) % 2)
+            batch = BatchGame(1, beads)
+            for move in moves:
+                if not batch.active[0]:
+                    break
+                batch.step([move])
+            winner = DRAW if game.winner is None else (PLAYER1 if game.winner.title == 'player1' else PLAYER2)
+            self.assertFalse(batch.active[0])
+            self.assertEqual(batch.winner[0], winner)
+            self.assertListEqual(batch.pits[0].tolist(), [bowl.beads for bowl in game.board.bowls])
+
+    def test_run_finishes_every_game(self):
+        batch = play_batch(500, 4, 1, 2, np.random.default_rng(3))
+        self.assertFalse(batch.active.any())
+        self.assertTrue((batch.plies > 0).all())
+        self.assertTrue(set(batch.winner.tolist()) <= {DRAW, PLAYER1, PLAYER2})
+        # no bead is created by the rules, a few may be lost to the nest quirk
+        self.assertTrue((batch.scores.sum(axis=1) <= 4 * 12).all())
+
+    def test_run_is_reproducible(self):
+        first = play_batch(200, 3, 2, 2, np.random.default_rng(11))
+        second = play_batch(200, 3, 2, 2, np.random.default_rng(11))
+        self.assertListEqual(first.winner.tolist(), second.winner.tolist())
+        self.assertListEqual(first.pits.tolist(), second.pits.tolist())
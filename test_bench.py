@@ -0,0 +1,33 @@
+import copy
+import unittest
+from .bench import compare, run_suite, sample_positions
+
+
+class BenchTest(unittest.TestCase):
+    """
+    Runs a tiny benchmark sweep and checks the regression check
+    """
+
+    def test_suite_reports_every_benchmark(self):
+        report = run_suite(games=3, calls=20, repeat=1, beads=(3,), bowls=(4,), pairs=((1, 2),))
+        self.assertListEqual(sorted(report['results']), ['engine/s12/beads3', 'game_run/s12/beads3/bowls4',
+                                                         'move/beads3/bowls4', 'starting_index/s1/beads3/bowls4',
+                                                         'starting_index/s2/beads3/bowls4'])
+        for result in report['results'].values():
+            self.assertGreater(result['peak_kib'], 0)
+        self.assertGreater(report['results']['game_run/s12/beads3/bowls4']['games_per_second'], 0)
+        self.assertEqual(len(sample_positions(3, 4, 50)), 50)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': {'a': {'games_per_second': 100.0, 'ns_per_move': 50.0, 'games': 10},
+                                'b': {'ns_per_call': 10.0}}}
+        current = copy.deepcopy(baseline)
+        self.assertListEqual(compare(baseline, current), [])
+        current['results']['a']['games_per_second'] = 85.0
+        current['results']['a']['ns_per_move'] = 54.0
+        current['results']['b']['ns_per_call'] = 12.0
+        current['results']['new'] = {'ns_per_call': 1.0}
+        regressions = compare(baseline, current, threshold=0.10)
+        self.assertListEqual([(name, metric) for name, metric, _, _, _ in regressions],
+                             [('a', 'games_per_second'), ('b', 'ns_per_call')])
+        self.assertAlmostEqual(regressions[0][4], 0.15)
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
-from .interface import Board, create_board, prompt
+from array import array
+from .interface import Board, Game, create_board, prompt
 
 class BoardTest(unittest.TestCase):
     """Verifies the internal representational structure of the board
@@ -58,3 +59,33 @@ class BoardTest(unittest.TestCase):
         board = create_board(4)
         self.assertEqual(board.bowls[0].beads, 4)
 
+    def test_array_representation(self):
+        """the bowl views read and write the flat array, running totals follow every write"""
+        board = Board(4, 3)
+        self.assertIsInstance(board.pits, array)
+        self.assertEqual(board.nests, (3, 7))
+        self.assertListEqual(list(board.pits), [4, 4, 4, 0, 4, 4, 4, 0])
+        self.assertListEqual(list(board.sums), [12, 12, 0])
+        board.bowls[1].beads = 9
+        board.bowls[3].beads += 2
+        self.assertEqual(board.pits[1], 9)
+        self.assertListEqual(list(board.sums), [17, 12, 2])
+        board.empty_side(1)
+        self.assertListEqual(list(board.pits), [4, 9, 4, 2, 0, 0, 0, 0])
+        self.assertListEqual(list(board.sums), [17, 0, 2])
+
+    def test_running_totals_after_games(self):
+        """running totals agree with a fresh count at the end of whole games"""
+        for strategies in [(1, 1), (1, 2), (2, 1), (2, 2)]:
+            game = Game(5, *strategies)
+            game.run()
+            pits = game.board.pits
+            self.assertEqual(game.board.sums[0], sum(pits[0:6]))
+            self.assertEqual(game.board.sums[1], sum(pits[7:13]))
+            self.assertEqual(game.board.sums[2], pits[6] + pits[13])
+
+    def test_games_leave_the_bowl_views_unbuilt(self):
+        """the _Node views are only built when board.bowls is asked for"""
+        game = Game(4, 1, 2)
+        game.run()
+        self.assertIsNone(game.board._bowls)
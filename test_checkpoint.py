@@ -0,0 +1,117 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from .checkpoint import Checkpoint, DoneChunks
+from .engine import run
+from .parallel import run_parallel
+from .sequential import WilsonRule, run_sequential
+
+
+class Preempted(Exception):
+    pass
+
+
+class PreemptedCheckpoint(Checkpoint):
+    """a checkpoint whose run is stopped right after its first saves"""
+
+    def __init__(self, path, saves):
+        super().__init__(path, interval=0)
+        self.saves = saves
+
+    def save(self, tally, done, complete=False):
+        super().save(tally, done, complete)
+        self.saves -= 1
+        if not self.saves:
+            raise Preempted
+
+
+class CheckpointTest(unittest.TestCase):
+    """
+    Interrupts runs and checks that resuming them gives the results of an uninterrupted run
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'run.ckpt')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameResults(self, tally, expected):
+        self.assertEqual(tally.games, expected.games)
+        self.assertEqual(tally.seed, expected.seed)
+        self.assertDictEqual(tally.wins, expected.wins)
+        self.assertDictEqual(tally.scores, expected.scores)
+        for title in ('player1', 'player2'):
+            self.assertAlmostEqual(tally.nests[title].mean, expected.nests[title].mean)
+        self.assertAlmostEqual(tally.turns.variance, expected.turns.variance)
+
+    def test_done_chunks(self):
+        done = DoneChunks()
+        for index in (1, 3, 0, 5):
+            done.add(index)
+        self.assertEqual((done.prefix, done.others), (2, {3, 5}))
+        self.assertEqual(len(done), 4)
+        self.assertListEqual([index for index in range(7) if index not in done], [2, 4, 6])
+        done.add(2)
+        self.assertEqual((done.prefix, done.others), (4, {5}))
+
+    def test_resume(self):
+        expected = run_parallel(500, 4, 1, 2, workers=1, seed=12, chunk_size=100, histograms=True)
+        with self.assertRaises(Preempted):
+            run_parallel(500, 4, 1, 2, workers=1, seed=12, chunk_size=100, histograms=True,
+                         checkpoint=PreemptedCheckpoint(self.path, 2))
+        state = Checkpoint(self.path).load()
+        self.assertEqual(state['done'], (2, []))
+        self.assertNotIn('tasks', state['config'])
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+        tally = run_parallel(500, 4, 1, 2, workers=2, seed=12, chunk_size=100, histograms=True,
+                             checkpoint=Checkpoint(self.path), resume=True)
+        self.assertSameResults(tally, expected)
+        self.assertListEqual(tally.histograms.margin.counts.tolist(), expected.histograms.margin.counts.tolist())
+        self.assertTrue(Checkpoint(self.path).load()['complete'])
+        # a finished run resumes to the same results without playing again
+        again = run_parallel(500, 4, 1, 2, workers=1, seed=12, chunk_size=100, histograms=True,
+                             checkpoint=Checkpoint(self.path), resume=True)
+        self.assertSameResults(again, expected)
+
+    def test_unseeded_run_resumes_its_own_streams(self):
+        with self.assertRaises(Preempted):
+            run_parallel(300, 3, 2, 1, workers=1, chunk_size=100, checkpoint=PreemptedCheckpoint(self.path, 1))
+        entropy = Checkpoint(self.path).load()['config']['entropy']
+        tally = run_parallel(300, 3, 2, 1, workers=1, chunk_size=100, checkpoint=Checkpoint(self.path), resume=True)
+        self.assertSameResults(tally, run_parallel(300, 3, 2, 1, workers=1, seed=entropy, chunk_size=100))
+
+    def test_other_run_is_refused(self):
+        run_parallel(200, 3, 1, 1, workers=1, seed=1, chunk_size=100, checkpoint=Checkpoint(self.path))
+        for settings in ({'seed': 2}, {'seed': 1, 'histograms': True}):
+            with self.assertRaises(ValueError):
+                run_parallel(200, 3, 1, 1, workers=1, chunk_size=100, checkpoint=Checkpoint(self.path), resume=True,
+                             **settings)
+        with self.assertRaises(ValueError):
+            run_parallel(200, 3, 1, 1, workers=1, seed=1, resume=True)
+
+    def test_sequential_resume(self):
+        rule = WilsonRule(precision=0.05, min_games=100)
+        expected = run_sequential(3000, 4, 2, 1, rule, workers=1, seed=7, chunk_size=100)
+        with self.assertRaises(Preempted):
+            run_sequential(3000, 4, 2, 1, rule, workers=1, seed=7, chunk_size=100,
+                           checkpoint=PreemptedCheckpoint(self.path, 2))
+        tally = run_sequential(3000, 4, 2, 1, rule, workers=2, seed=7, chunk_size=100,
+                               checkpoint=Checkpoint(self.path), resume=True)
+        self.assertSameResults(tally, expected)
+        self.assertDictEqual(tally.stopping, expected.stopping)
+
+    def test_command_line(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                run(['simulate', '--games', '10', '--beads', '3', '--p1', '1', '--p2', '2', '--resume'])
+        arguments = ['simulate', '--games', '300', '--beads', '3', '--p1', '1', '--p2', '2', '--no-plot',
+                     '--workers', '1', '--checkpoint', self.path]
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = run(arguments)
+            resumed = run(arguments + ['--resume'])
+        self.assertSameResults(resumed, first)
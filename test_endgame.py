@@ -0,0 +1,107 @@
+import os
+import random
+import tempfile
+import unittest
+from .interface import Board, Game
+from .endgame import (EndgameTable, binomials, compositions, open_table, position_count, rank,
+                      write_database)
+from .search import AlphaBeta, Zobrist, final_value, WIN
+from .state import State
+
+
+def perfect_play(state):
+    """exhaustive search of the final margin for the player to move"""
+    if state.ender is not None:
+        player1, player2 = state.scores()
+        return player2 - player1 if state.to_move else player1 - player2
+    mover = state.to_move
+    best = None
+    for move in state.legal_moves():
+        token = state.apply(move)
+        value = perfect_play(state)
+        value = value if state.to_move == mover else -value
+        state.undo(token)
+        best = value if best is None else max(best, value)
+    return best
+
+
+def endgame_board(own, other, nests=(4, 2)):
+    """a board with both nests filled, own on player1's side and other on player2's"""
+    n = len(own)
+    board = Board(0, n)
+    for index in range(n):
+        board.bowls[index].beads = own[index]
+        board.bowls[n + 1 + index].beads = other[index]
+    board.bowls[n].beads, board.bowls[2 * n + 1].beads = nests
+    return board
+
+
+class EndgameTest(unittest.TestCase):
+    """
+    Builds small databases and checks them against exhaustive search
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'endgame.db')
+        write_database(self.path, 3, 6)
+        self.table = EndgameTable(self.path)
+
+    def tearDown(self):
+        self.table.close()
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def test_rank_is_a_bijection(self):
+        table = binomials(16)
+        ranks = sorted(rank(position, 5, table) for total in range(6) for position in compositions(total, 4))
+        self.assertListEqual(ranks, list(range(position_count(2, 5))))
+
+    def test_values_match_perfect_play(self):
+        rng = random.Random(4)
+        for total in range(7):
+            for position in compositions(total, 6):
+                if rng.random() > 0.25:
+                    continue
+                board = endgame_board(position[:3], position[3:])
+                self.assertTrue(self.table.covers(board, 0))
+                expected = perfect_play(State.from_board(board)) - 2
+                self.assertEqual(self.table.value(board, 0), expected)
+
+    def test_coverage(self):
+        self.assertFalse(self.table.covers(endgame_board((3, 3, 1), (0, 0, 0)), 0))
+        self.assertFalse(self.table.covers(endgame_board((1, 0, 0), (0, 1, 0), (0, 5)), 0))
+        self.assertFalse(self.table.covers(endgame_board((1, 0, 0), (0, 1, 0)), 0, pending=True))
+        self.assertFalse(self.table.covers(Board(1, 6), 0))
+
+    def test_rejects_other_files(self):
+        other = os.path.join(self.directory, 'other.db')
+        with open(other, 'wb') as handle:
+            handle.write(b'not a database at all')
+        with self.assertRaises(ValueError):
+            EndgameTable(other)
+        self.assertIs(open_table(self.path), open_table(self.path))
+        open_table(self.path).close()
+
+    def test_search_uses_table(self):
+        board = endgame_board((1, 2, 0), (2, 0, 1))
+        searcher = AlphaBeta(depth=1, endgame=self.table)
+        searcher.zobrist = Zobrist(8, 20)
+        searcher.state = State.from_board(board)
+        margin = perfect_play(State.from_board(board))
+        self.assertEqual(searcher._search(1, -10 * WIN, 10 * WIN), final_value(margin))
+
+    def test_games_settle_from_the_table(self):
+        path = os.path.join(self.directory, 'six.db')
+        write_database(path, 6, 4)
+        table = EndgameTable(path)
+        random.seed(9)
+        for _ in range(30):
+            game = Game(3, 1, 2, endgame=table)
+            game.run()
+            self.assertEqual(game.board.sums[0] + game.board.sums[1], 0)
+            self.assertLessEqual(sum(game.scores.values()), 36)
+            if game.winner is not None:
+                self.assertGreater(game.scores[game.winner.title], min(game.scores.values()))
+        table.close()
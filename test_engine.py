@@ -0,0 +1,61 @@
+import contextlib
+import importlib.util
+import io
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+from .engine import create_parser, run
+
+
+class EngineTest(unittest.TestCase):
+    """
+    Checks the headless command line
+    """
+
+    def test_simulate_without_plot(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            tally = run(['simulate', '--games', '1500', '--beads', '3', '--p1', '2', '--p2', '1',
+                         '--no-plot', '--workers', '1', '--seed', '4'])
+        self.assertEqual(tally.games, 1500)
+        self.assertIn('out of 1500', output.getvalue())
+        self.assertNotIn('matplotlib', sys.modules)
+
+    def test_missing_matplotlib_fails_before_playing(self):
+        output = io.StringIO()
+        with patch.object(importlib.util, 'find_spec', return_value=None), contextlib.redirect_stdout(output):
+            with self.assertRaises(ImportError):
+                run(['simulate', '--games', '10', '--beads', '3', '--p1', '1', '--p2', '1', '--workers', '1'])
+        self.assertEqual(output.getvalue(), '')
+
+    def test_parser(self):
+        parser = create_parser()
+        args = parser.parse_args(['simulate', '--games', '10', '--beads', '6', '--p1', '4', '--p2', '3'])
+        self.assertEqual((args.games, args.beads, args.p1, args.p2), (10, 6, 4, 3))
+        self.assertEqual(args.plot, 'outfall.pdf')
+        with contextlib.redirect_stderr(io.StringIO()):
+            for bad in (['--games', '0', '--beads', '3'], ['--games', '5', '--beads', '9']):
+                with self.assertRaises(SystemExit):
+                    parser.parse_args(['simulate', '--p1', '1', '--p2', '1'] + bad)
+
+    def test_parser_options_before_the_sub_command(self):
+        parser = create_parser()
+        simulate = ['simulate', '--games', '10', '--beads', '6', '--p1', '1', '--p2', '2']
+        args = parser.parse_args(['--seed', '5', '--workers', '2', '--checkpoint-interval', '9'] + simulate)
+        self.assertEqual((args.seed, args.workers, args.checkpoint_interval), (5, 2, 9.0))
+        args = parser.parse_args(simulate + ['--seed', '6'])
+        self.assertEqual((args.seed, args.workers, args.checkpoint_interval, args.resume), (6, None, 300.0, False))
+        args = parser.parse_args(['--seed', '5', 'tournament'])
+        self.assertEqual((args.seed, args.workers), (5, None))
+        self.assertEqual(parser.parse_args(['tournament', '--workers', '3']).workers, 3)
+        self.assertEqual(parser.parse_args(['--workers', '4', 'serve']).workers, 4)
+        self.assertIsNone(parser.parse_args([]).seed)
+
+    def test_import_is_light(self):
+        package = __name__.rpartition('.')[0]
+        code = "import sys, {}.engine; print(any(name in sys.modules for name in ('numpy', 'matplotlib')))"
+        result = subprocess.run([sys.executable, '-c', code.format(package)], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), 'False')
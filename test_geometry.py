@@ -0,0 +1,59 @@
+import unittest
+from .geometry import Geometry, shared_geometry
+from .interface import Board, create_player
+
+
+def naive_sow(pits, start, side, n):
+    """bead by bead sowing that skips the other player's nest, without captures"""
+    pits = list(pits)
+    other_nest = 2 * n + 1 if side == 0 else n
+    beads, pits[start] = pits[start], 0
+    index = start
+    for _ in range(beads):
+        index = (index + 1) % len(pits)
+        if index == other_nest:
+            index = (index + 1) % len(pits)
+        pits[index] += 1
+    return pits, index
+
+
+class GeometryTest(unittest.TestCase):
+    """
+    Checks the sowing tables against bead by bead sowing
+    """
+
+    def test_tables(self):
+        for n in (1, 3, 6):
+            for side in (0, 1):
+                geometry = Geometry(n, side)
+                self.assertEqual(len(geometry.path), 2 * n + 1)
+                self.assertNotIn(geometry.other_nest, geometry.path)
+                self.assertEqual(sum(geometry.owns), n + 1)
+                self.assertEqual(sum(geometry.own_bowls), n)
+                for start in range(geometry.own_start, geometry.nest):
+                    self.assertEqual(geometry.opposite[geometry.opposite[start]], start)
+                    for beads in range(1, 4 * (2 * n + 1)):
+                        pits = [0] * (2 * n + 2)
+                        pits[start] = beads
+                        self.assertEqual(geometry.land(start, beads), naive_sow(pits, start, side, n)[1])
+
+    def test_moves_match_naive_sowing(self):
+        for n in (2, 4, 6):
+            for side, name in ((0, 'player1'), (1, 'player2')):
+                for beads in range(1, 3 * (2 * n + 1)):
+                    for offset in range(n):
+                        # no bowl is empty, so no sowing ends in a capture
+                        board = Board(1, n)
+                        player = create_player(name, board, 1)
+                        start = player.bowls_range_start + offset
+                        board.set_beads(start, beads)
+                        expected, _ = naive_sow(board.pits, start, side, n)
+                        player._move(start)
+                        self.assertListEqual(list(board.pits), expected)
+                        self.assertEqual(board.sums[side], sum(expected[player.bowls_range_start:player.nest]))
+
+    def test_shared(self):
+        self.assertIs(shared_geometry(6, 1), shared_geometry(6, 1))
+        self.assertIsNot(shared_geometry(6, 0), shared_geometry(6, 1))
+        board = Board(4)
+        self.assertIs(create_player('player2', board, 1).geometry, create_player('player2', Board(3), 2).geometry)
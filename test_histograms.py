@@ -0,0 +1,63 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from .histograms import GameHistograms, Histogram, render
+from .parallel import run_parallel
+
+
+class HistogramTest(unittest.TestCase):
+    """
+    Checks the bins, merging and the histograms a run fills
+    """
+
+    def test_bins(self):
+        histogram = Histogram(-4, 5, width=2)
+        values = [-9, -4, -3, -1, 0, 4, 5, 30]
+        for value in values:
+            histogram.add(value)
+        self.assertListEqual(histogram.counts.tolist(), [1, 2, 1, 1, 0, 1, 2])
+        vectorized = Histogram(-4, 5, width=2)
+        vectorized.add_values(np.array(values))
+        self.assertListEqual(vectorized.counts.tolist(), histogram.counts.tolist())
+        self.assertListEqual(histogram.edges.tolist(), [-4, -2, 0, 2, 4, 6])
+        self.assertEqual(histogram.total, 8)
+        self.assertEqual(histogram.merge(vectorized).total, 16)
+        with self.assertRaises(ValueError):
+            histogram.merge(Histogram(-4, 5))
+
+    def test_mean(self):
+        histogram = Histogram(0, 100)
+        histogram.add_values(np.arange(10))
+        self.assertAlmostEqual(histogram.mean(), 4.5)
+
+    def test_run_histograms(self):
+        tally = run_parallel(120, 4, 1, 2, workers=1, seed=6, chunk_size=50, histograms=True)
+        merged = run_parallel(120, 4, 1, 2, workers=2, seed=6, chunk_size=50, histograms=True)
+        histograms = tally.histograms
+        self.assertIsInstance(histograms, GameHistograms)
+        self.assertEqual(histograms.margin.total, 120)
+        self.assertListEqual(histograms.margin.counts.tolist(), merged.histograms.margin.counts.tolist())
+        self.assertListEqual(histograms.length.counts.tolist(), merged.histograms.length.counts.tolist())
+        values = histograms.margin.edges[:-1]
+        counts = histograms.margin.counts[1:-1]
+        self.assertEqual(int(counts[values > 0].sum()), tally.wins['player1'])
+        self.assertEqual(int(counts[values < 0].sum()), tally.wins['player2'])
+        self.assertEqual(histograms.first_move.total, 120)
+        self.assertEqual(histograms.first_move_wins.total, tally.wins['player1'])
+        rates = histograms.first_move_win_rate()
+        self.assertTrue(((rates >= 0) & (rates <= 1)).all())
+        self.assertIn('histograms', tally.as_dict())
+
+    @unittest.skipUnless(importlib.util.find_spec('matplotlib'), 'matplotlib is not installed')
+    def test_render(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        tally = run_parallel(30, 3, 2, 1, workers=1, seed=1, histograms=True)
+        for name in ('report.png', 'report.pdf'):
+            path = os.path.join(directory, name)
+            render(tally.histograms, path)
+            self.assertGreater(os.path.getsize(path), 0)
+        self.assertListEqual(sorted(os.listdir(directory)), ['report.pdf', 'report.png'])
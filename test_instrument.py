@@ -0,0 +1,63 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from .interface import Board, Game
+from .instrument import Counters, InstrumentedGame, InstrumentedPlayer, Instrumentation
+from .parallel import run_parallel
+
+
+class InstrumentTest(unittest.TestCase):
+    """
+    Checks the counters against known sowings and that games play out unchanged
+    """
+
+    def test_sowing_counters(self):
+        board = Board(0, 3)
+        counters = Counters()
+        player = InstrumentedPlayer(0, 4, board, 1, 'player1', counters)
+        board.set_beads(0, 20)
+        player._move(0)  # three laps short of one bead, passing the other nest twice
+        self.assertEqual((counters.plies, counters.sow_steps, counters.nest_skips), (1, 20, 2))
+        board = Board(0, 3)
+        for index, beads in enumerate([1, 0, 0, 0, 0, 4, 0, 0]):
+            board.set_beads(index, beads)
+        counters = Counters()
+        player = InstrumentedPlayer(0, 4, board, 1, 'player1', counters)
+        player._move(0)
+        self.assertEqual((counters.captures, counters.beads_captured, counters.nest_skips), (1, 5, 0))
+        self.assertEqual(board.pits[3], 5)
+
+    def test_games_are_unchanged(self):
+        for seed in range(20):
+            random.seed(seed)
+            plain = Game(4, 1, 2)
+            plain.run()
+            random.seed(seed)
+            instrumented = InstrumentedGame(4, 1, 2)
+            instrumented.run()
+            self.assertEqual(list(plain.board.pits), list(instrumented.board.pits))
+            self.assertEqual(plain.turns, instrumented.turns)
+            counters = instrumented.counters
+            self.assertGreaterEqual(counters.plies, instrumented.turns)
+            self.assertLessEqual(counters.extra_turns, counters.plies - instrumented.turns + 1)
+            self.assertGreater(counters.game, counters.sow)
+
+    def test_run_parallel_exports(self):
+        tally = run_parallel(120, 3, 1, 2, workers=1, seed=8, chunk_size=50, instrumented=True)
+        self.assertEqual(tally.stats.games, 120)
+        self.assertEqual(tally.stats.per_game['plies'].count, 120)
+        self.assertIsNone(run_parallel(10, 3, 1, 2, workers=1, seed=8).stats)
+        again = run_parallel(120, 3, 1, 2, workers=1, seed=8, chunk_size=50)
+        self.assertEqual(again.wins, tally.wins)
+        merged = Instrumentation().merge(tally.stats)
+        self.assertEqual(merged.totals['sow_steps'], tally.stats.totals['sow_steps'])
+        path = os.path.join(tempfile.mkdtemp(), 'stats.json')
+        tally.stats.write(path)
+        with open(path) as handle:
+            exported = json.load(handle)
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+        self.assertEqual(exported['totals']['plies'], tally.stats.totals['plies'])
+        self.assertIn('stats', tally.as_dict())
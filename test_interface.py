@@ -0,0 +1,23 @@
+import unittest
+from .interface import Game
+
+
+class GameTest(unittest.TestCase):
+    """
+    Checks whole games on boards of other sizes
+    """
+
+    def test_game_board_size(self):
+        game = Game(3, 1, 2, num_of_bowls_per_player=4)
+        game.run()
+        self.assertEqual(len(game.board.pits), 10)
+        self.assertLessEqual(sum(game.scores.values()), 24)  # a forfeited nest bead leaves the board
+
+    def test_first_move(self):
+        recorded = Game(4, 1, 2, seed=3, record=True)
+        recorded.run()
+        game = Game(4, 1, 2, seed=3)
+        self.assertIsNone(game.first_move)
+        game.run()
+        self.assertIsNone(game.moves)
+        self.assertEqual(game.first_move, recorded.moves[0])
@@ -0,0 +1,69 @@
+import random
+import unittest
+from .interface import Board, Game, create_player
+from .mcts import MonteCarlo
+from .state import create_state
+
+
+class MonteCarloTest(unittest.TestCase):
+    """
+    Checks the budgets, tree reuse and play strength of the Monte Carlo search
+    """
+
+    def test_copy_from(self):
+        state = create_state(3, 4)
+        scratch = create_state(3, 4)
+        state.apply(1)
+        scratch.copy_from(state)
+        self.assertEqual(scratch.pits, state.pits)
+        self.assertEqual(scratch.sums, state.sums)
+        self.assertEqual((scratch.to_move, scratch.pending), (state.to_move, state.pending))
+        scratch.apply(scratch.legal_moves()[0])
+        self.assertNotEqual(scratch.pits, state.pits)
+
+    def test_playout_budget(self):
+        searcher = MonteCarlo(playouts=50, rng=random.Random(1))
+        board = Board(4)
+        move = searcher.choose(board, 0)
+        self.assertIn(move, range(6))
+        self.assertListEqual(list(board.pits), [4] * 6 + [0] + [4] * 6 + [0])
+        self.assertEqual(searcher.root.visits, 50)
+        self.assertEqual(searcher.stats()['playouts'], 50)
+
+    def test_tiny_budget_still_moves(self):
+        for searcher in (MonteCarlo(milliseconds=0.0001, rng=random.Random(2)), MonteCarlo(playouts=0)):
+            self.assertIn(searcher.choose(Board(4), 0), range(6))
+            self.assertGreaterEqual(searcher.total_playouts, 1)
+
+    def test_time_budget(self):
+        searcher = MonteCarlo(milliseconds=30, rng=random.Random(1))
+        self.assertIn(searcher.choose(Board(6), 0), range(6))
+        self.assertGreater(searcher.total_playouts, 0)
+        self.assertLess(searcher.seconds, 0.5)
+
+    def test_tree_is_reused(self):
+        searcher = MonteCarlo(playouts=200, rng=random.Random(3))
+        state = create_state(3, 4)
+        searcher.choose(state.board, 0)
+        child = max(searcher.root.children, key=lambda node: node.visits)
+        grandchild = max(child.children, key=lambda node: node.visits)
+        state.apply(child.move)
+        state.apply(grandchild.move)
+        visits = grandchild.visits
+        searcher.choose(state.board, state.to_move, state.pending)
+        self.assertIs(searcher.root, grandchild)
+        self.assertIsNone(grandchild.parent)
+        self.assertEqual(searcher.reused_visits, visits)
+        self.assertEqual(grandchild.visits, visits + 200)
+
+    def test_strategy_four_in_games(self):
+        random.seed(6)
+        wins = 0
+        for _ in range(10):
+            game = Game(3, 4, 1)
+            game.player1.searcher = MonteCarlo(playouts=100)
+            game.run()
+            wins += game.winner is game.player1
+        self.assertGreaterEqual(wins, 8)
+        player = create_player('player2', Board(3), 4, MonteCarlo(playouts=10))
+        self.assertIn(player.get_starting_index(), range(7, 13))
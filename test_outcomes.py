@@ -0,0 +1,56 @@
+import unittest
+from multiprocessing import shared_memory
+from .outcomes import OUTCOME_FIELDS, SharedOutcomes, shared_outcomes
+from .parallel import run_parallel
+from .sequential import WilsonRule, run_sequential
+
+
+class SharedOutcomesTest(unittest.TestCase):
+    """
+    Checks that the shared arrays give the same results as the tallies sent back by the workers
+    """
+
+    def test_matches_tallies(self):
+        expected = run_parallel(300, 4, 1, 2, workers=2, seed=5, chunk_size=70)
+        with SharedOutcomes(300) as outcomes:
+            tally = run_parallel(300, 4, 1, 2, workers=2, seed=5, chunk_size=70, outcomes=outcomes)
+            summary = outcomes.summary()
+            self.assertEqual(outcomes.played, 300)
+        self.assertEqual(tally.games, 300)
+        self.assertDictEqual(tally.wins, expected.wins)
+        self.assertDictEqual(tally.scores, expected.scores)
+        self.assertEqual(tally.draws, expected.draws)
+        for title in ('player1', 'player2'):
+            self.assertAlmostEqual(tally.nests[title].mean, expected.nests[title].mean)
+            self.assertAlmostEqual(tally.nests[title].variance, expected.nests[title].variance)
+            self.assertEqual(tally.nests[title].maximum, expected.nests[title].maximum)
+        self.assertAlmostEqual(tally.turns.mean, expected.turns.mean)
+        self.assertDictEqual(summary['wins'], expected.wins)
+        self.assertAlmostEqual(summary['turns'], expected.turns.mean)
+
+    def test_plies_and_extra_turns(self):
+        instrumented = run_parallel(40, 3, 2, 1, workers=1, seed=8, instrumented=True)
+        with SharedOutcomes(40) as outcomes:
+            run_parallel(40, 3, 2, 1, workers=1, seed=8, outcomes=outcomes)
+            self.assertEqual(int(outcomes.arrays['plies'].sum()), instrumented.stats.totals['plies'])
+            self.assertEqual(int(outcomes.arrays['extra_turns'].sum()), instrumented.stats.totals['extra_turns'])
+
+    def test_sequential_keeps_only_merged_games(self):
+        rule = WilsonRule(precision=0.1, min_games=50)
+        expected = run_sequential(2000, 4, 2, 1, rule, workers=1, seed=3, chunk_size=50)
+        with SharedOutcomes(2000) as outcomes:
+            tally = run_sequential(2000, 4, 2, 1, rule, workers=2, seed=3, chunk_size=50, outcomes=outcomes)
+            self.assertEqual(outcomes.played, tally.games)
+        self.assertEqual(tally.games, expected.games)
+        self.assertDictEqual(tally.wins, expected.wins)
+
+    def test_block_lifetime(self):
+        outcomes = SharedOutcomes(10)
+        self.assertIs(shared_outcomes(outcomes.name, 10), outcomes)
+        outcomes.write(3, range(len(OUTCOME_FIELDS)))
+        self.assertEqual(outcomes.played, 1)
+        self.assertEqual(int(outcomes.arrays['extra_turns'][3]), len(OUTCOME_FIELDS) - 1)
+        name = outcomes.name
+        outcomes.close()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
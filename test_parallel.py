@@ -0,0 +1,72 @@
+import random
+import unittest
+import numpy as np
+from .interface import Game
+from .parallel import ChunkTask, chunk_count, chunk_seeds, chunk_sizes, chunk_tasks, play_chunk, run_parallel
+from .results import Tally
+
+
+class ParallelTest(unittest.TestCase):
+    """
+    Checks how runs are split over workers and that seeded runs are reproducible
+    """
+
+    def test_chunk_sizes(self):
+        self.assertListEqual(chunk_sizes(2500, 1000), [1000, 1000, 500])
+        self.assertListEqual(chunk_sizes(2000, 1000), [1000, 1000])
+        self.assertListEqual(chunk_sizes(0, 1000), [])
+
+    def test_chunk_seeds_are_distinct_and_reproducible(self):
+        entropy, seeds = chunk_seeds(42, 8)
+        seeds = list(seeds)
+        self.assertEqual(entropy, 42)
+        self.assertEqual(len(set(seeds)), 8)
+        self.assertListEqual(list(chunk_seeds(42, 8)[1]), seeds)
+        fresh_entropy, fresh_seeds = chunk_seeds(None, 8)
+        self.assertListEqual(list(chunk_seeds(fresh_entropy, 8)[1]), list(fresh_seeds))
+        # the children are those of SeedSequence.spawn, so runs seeded before still reproduce
+        spawned = np.random.SeedSequence(42).spawn(8)
+        self.assertListEqual([int(child.generate_state(2, np.uint64)[0]) for child in spawned], seeds)
+
+    def test_chunk_tasks_are_built_lazily(self):
+        entropy, tasks = chunk_tasks(10 ** 12, 4, 1, 2, 3, 1000)
+        first = next(tasks)
+        self.assertEqual((first.games, first.seed), (1000, next(chunk_seeds(3, 1)[1])))
+        self.assertEqual(chunk_count(2500, 1000), len(chunk_sizes(2500, 1000)))
+
+    def test_play_chunk(self):
+        tally, records = play_chunk(ChunkTask(50, 4, 1, 2, 123))
+        self.assertIsNone(records)
+        self.assertEqual(tally.games, 50)
+        self.assertEqual(tally.wins['player1'] + tally.wins['player2'] + tally.draws, 50)
+        again, records = play_chunk(ChunkTask(50, 4, 1, 2, 123, keep_records=True))
+        self.assertEqual(len(records), 50)
+        self.assertDictEqual(again.wins, tally.wins)
+        self.assertDictEqual(again.scores, tally.scores)
+        # the chunk plays from its own stream, the module level one is not reseeded
+        state = random.getstate()
+        play_chunk(ChunkTask(5, 4, 1, 2, 123))
+        self.assertEqual(random.getstate(), state)
+
+    def test_same_seed_same_tally_for_any_worker_count(self):
+        single = run_parallel(300, 3, 1, 2, workers=1, seed=5, chunk_size=70)
+        several = run_parallel(300, 3, 1, 2, workers=3, seed=5, chunk_size=70)
+        self.assertEqual(single.games, 300)
+        self.assertDictEqual(single.wins, several.wins)
+        self.assertDictEqual(single.scores, several.scores)
+        self.assertEqual(single.draws, several.draws)
+        self.assertEqual(several.seed, 5)
+        # strategy 3 keeps no table between games, so chunks do not depend on the process they ran in
+        single = run_parallel(40, 3, 3, 1, workers=1, seed=5, chunk_size=10)
+        several = run_parallel(40, 3, 3, 1, workers=2, seed=5, chunk_size=10)
+        self.assertDictEqual(single.scores, several.scores)
+
+    def test_tally_merge(self):
+        first, second = Tally(), Tally()
+        game = Game(3, 1, 1)
+        game.run()
+        first.add(game)
+        second.add(game)
+        merged = Tally().merge(first).merge(second)
+        self.assertEqual(merged.games, 2)
+        self.assertEqual(sum(merged.scores.values()), 2 * sum(game.scores.values()))
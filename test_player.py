@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 from .interface import Player, create_player, Board
 
 class PlayerTest(unittest.TestCase):
@@ -103,3 +104,47 @@ class PlayerTest(unittest.TestCase):
         res = player2._move(4)
         self.assertListEqual(self.list_rep(board), move8)
         self.assertTrue(res)
+
+    def sow_bead_by_bead(self, beads, start_index, skip):
+        """reference sowing without captures, one bead at a time skipping the index skip"""
+        beads = list(beads)
+        to_move, beads[start_index] = beads[start_index], 0
+        idx = start_index
+        while to_move:
+            idx = (idx + 1) % len(beads)
+            if idx != skip:
+                beads[idx] += 1
+                to_move -= 1
+        return beads
+
+    def test_move_with_whole_laps(self):
+        """large bowls are sown a lap at a time and match sowing bead by bead"""
+        for start_index, title in [(0, 'player1'), (2, 'player1'), (5, 'player2'), (6, 'player2')]:
+            for beads in [6, 7, 13, 20, 41]:
+                board = Board(3, 3)
+                board.bowls[start_index].beads = beads
+                player = self._utility(1, board, title)
+                skip = board.nests[1 - player.side]
+                expected = self.sow_bead_by_bead(self.list_rep(board), start_index, skip)
+                player._move(start_index)
+                self.assertListEqual(self.list_rep(board), expected)
+                self.assertEqual(player.beads_in_bowls, sum(expected[player.bowls_range_start:player.nest]))
+
+    def test_extra_turn(self):
+        """ending in the empty nest plays a second sowing within the same turn"""
+        board = Board(3, 3)
+        player = self._utility(1, board)
+        with patch.object(Player, 'get_starting_index', side_effect=[0, 1]):
+            self.assertTrue(player.move())
+        self.assertListEqual(self.list_rep(board), [0, 0, 5, 2, 4, 4, 3, 0])
+
+    def test_extra_turn_single_bead_forfeit(self):
+        """a nest still holding only the bead that earned the extra turn gives it up"""
+        board = Board(3, 3)
+        board.bowls[1].beads = 0
+        board.bowls[2].beads = 0
+        player = self._utility(1, board)
+        with patch.object(Player, 'get_starting_index', side_effect=[0, 1]):
+            self.assertTrue(player.move())
+        self.assertListEqual(self.list_rep(board), [0, 0, 2, 0, 3, 3, 3, 0])
+        self.assertEqual(player.beads_in_bowls, 2)
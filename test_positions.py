@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from .batch import play_batch
+from .interface import Game
+from .parallel import run_parallel
+from .positions import (CountMin, HyperLogLog, PositionCollector, decode, encode, encode_batch, encode_key,
+                        game_keys, hash_keys)
+from .state import create_state
+
+
+class PositionsTest(unittest.TestCase):
+    """
+    Checks the keys, the sketches and the collector
+    """
+
+    def test_keys(self):
+        state = create_state(4)
+        state.apply(2)
+        key = encode_key(state.pits, state.to_move, state.pending)
+        self.assertEqual(len(key), 15)
+        self.assertEqual(decode(key), (list(state.pits), state.to_move, state.pending))
+        self.assertEqual(decode(encode(state.pits, 1, True)), (list(state.pits), 1, True))
+        self.assertNotEqual(encode(state.pits, 0), encode(state.pits, 1))
+        boards = np.array([list(state.pits), [4] * 6 + [0] + [4] * 6 + [0]])
+        keys = encode_batch(boards, [1, 0], [True, False])
+        self.assertEqual(keys[0].tobytes(), encode_key(state.pits, 1, True))
+        self.assertEqual(keys[1].tobytes(), encode_key(boards[1], 0))
+        self.assertEqual(hash_keys(keys)[0], hash_keys(encode_key(state.pits, 1, True))[0])
+        with self.assertRaises(ValueError):
+            encode_batch(np.array([[256, 0]]), [0])
+
+    def test_sketches(self):
+        hashes = hash_keys(np.arange(60000, dtype=np.uint32).view(np.uint8).reshape(-1, 4))
+        self.assertEqual(len(set(hashes.tolist())), 60000)
+        first, second = HyperLogLog(12), HyperLogLog(12)
+        first.add(hashes[:40000])
+        second.add(hashes[20000:])
+        self.assertAlmostEqual(first.estimate() / 40000, 1, delta=0.06)
+        self.assertAlmostEqual(first.merge(second).estimate() / 60000, 1, delta=0.06)
+        small = HyperLogLog(12)
+        small.add(np.concatenate([hashes[:100]] * 3))
+        self.assertAlmostEqual(small.estimate(), 100, delta=3)
+        counts = CountMin(width=512, depth=4)
+        repeated = np.concatenate([hashes[:5]] * 7 + [hashes[5:3000]])
+        counts.add(repeated)
+        estimates = counts.query(hashes[:5])
+        self.assertTrue(np.all(estimates >= 7))
+        self.assertTrue(np.all(counts.query(hashes[5:3000]) >= 1))
+
+    def test_collector(self):
+        collector = PositionCollector(max_plies=50)
+        play_batch(300, 3, 1, 1, np.random.default_rng(4), collector=collector)
+        distinct = collector.distinct_per_ply()
+        self.assertEqual(distinct[0], 1)
+        self.assertEqual(distinct[1], 6)
+        start = encode_key(create_state(3).pits, 0)
+        self.assertGreaterEqual(collector.count(start), 300)
+        game = Game(3, 1, 2, seed=4, record=True)
+        game.run()
+        keys = game_keys(game.moves, 3)
+        self.assertEqual(keys[0].tobytes(), start)
+        self.assertLessEqual(len(keys), len(game.moves))
+
+    def test_run_parallel_collects(self):
+        tally = run_parallel(150, 3, 1, 2, workers=1, seed=2, chunk_size=50, positions=True)
+        summary = tally.as_dict()['positions']
+        self.assertEqual(summary['distinct_per_ply'][:2], [1, 6])
+        self.assertGreater(summary['positions'], 150)
+        self.assertEqual(tally.positions.count(encode_key(create_state(3).pits, 0)), 150)
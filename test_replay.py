@@ -0,0 +1,69 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from .interface import Game
+from .endgame import EndgameTable, write_database
+from .replay import append_log, encode, iter_logs, read_header, replay
+
+
+class ReplayTest(unittest.TestCase):
+    """
+    Checks seeded games and that move logs replay them exactly
+    """
+
+    def test_seeded_games_repeat(self):
+        random.seed(1)
+        first = Game(4, 1, 2, seed=77)
+        first.run()
+        random.seed(2)
+        second = Game(4, 1, 2, rng=random.Random(77))
+        second.run()
+        self.assertEqual(list(first.board.pits), list(second.board.pits))
+        self.assertEqual((first.turns, first.scores), (second.turns, second.scores))
+
+    def test_replay_matches(self):
+        for seed in range(40):
+            strategies = (seed % 2 + 1, seed // 2 % 2 + 1)
+            game = Game(3 + seed % 4, *strategies, num_of_bowls_per_player=4 + seed % 3, seed=seed,
+                        record=True)
+            game.run()
+            log = encode(game)
+            self.assertEqual(len(log), 10 + len(game.moves))
+            self.assertEqual(read_header(log)[:4], (3 + seed % 4, 4 + seed % 3) + strategies)
+            again = replay(log)
+            self.assertEqual(list(again.board.pits), list(game.board.pits))
+            self.assertEqual((again.turns, again.scores), (game.turns, game.scores))
+            self.assertEqual(again.winner and again.winner.title, game.winner and game.winner.title)
+
+    def test_replay_with_endgame(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'endgame.db')
+        write_database(path, 6, 3)
+        table = EndgameTable(path)
+        game = Game(3, 1, 2, endgame=table, seed=5, record=True)
+        game.run()
+        log = encode(game)
+        with self.assertRaises(ValueError):
+            replay(log)
+        self.assertEqual(replay(log, table).scores, game.scores)
+        table.close()
+        os.remove(path)
+        os.rmdir(directory)
+
+    def test_archive(self):
+        logs = []
+        for seed in range(5):
+            game = Game(4, 2, 1, seed=seed, record=True)
+            game.run()
+            logs.append(encode(game))
+        handle = io.BytesIO()
+        for log in logs:
+            append_log(handle, log)
+        handle.seek(0)
+        self.assertListEqual(list(iter_logs(handle)), logs)
+        with self.assertRaises(ValueError):
+            encode(Game(4, 1, 1))
+        with self.assertRaises(ValueError):
+            replay(b'nope' + bytes(6))
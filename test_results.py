@@ -0,0 +1,88 @@
+import csv
+import json
+import os
+import statistics
+import tempfile
+import unittest
+from .interface import Game
+from .results import RunningStats, Tally, CsvSink, NdjsonSink, open_sink, game_record, RECORD_FIELDS
+
+
+class RunningStatsTest(unittest.TestCase):
+    """
+    Compares the online statistics against the statistics module
+    """
+
+    def test_mean_and_variance(self):
+        values = [3, 7, 7, 19, 24, 1, 0, 12]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        self.assertEqual(stats.count, len(values))
+        self.assertAlmostEqual(stats.mean, statistics.mean(values))
+        self.assertAlmostEqual(stats.variance, statistics.variance(values))
+        self.assertEqual(stats.minimum, 0)
+        self.assertEqual(stats.maximum, 24)
+
+    def test_merge_matches_single_stream(self):
+        values = list(range(40)) + [100, -5]
+        first, second, empty = RunningStats(), RunningStats(), RunningStats()
+        for value in values[:13]:
+            first.add(value)
+        for value in values[13:]:
+            second.add(value)
+        first.merge(second).merge(empty)
+        self.assertEqual(first.count, len(values))
+        self.assertAlmostEqual(first.mean, statistics.mean(values))
+        self.assertAlmostEqual(first.variance, statistics.variance(values))
+        self.assertEqual(RunningStats().merge(second).count, second.count)
+
+
+class TallyTest(unittest.TestCase):
+
+    def test_add_games(self):
+        tally = Tally()
+        for _ in range(20):
+            game = Game(4, 1, 2)
+            game.run()
+            tally.add(game)
+        self.assertEqual(tally.games, 20)
+        self.assertEqual(tally.turns.count, 20)
+        self.assertAlmostEqual(tally.win_rate('player1') + tally.win_rate('player2') + tally.draw_rate, 1.0)
+        self.assertEqual(json.loads(json.dumps(tally.as_dict()))['games'], 20)
+
+
+class SinkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        game = Game(3, 1, 1)
+        game.run()
+        self.record = game_record(game)
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def test_csv_sink(self):
+        path = os.path.join(self.directory, 'games.csv')
+        with open_sink(path) as sink:
+            self.assertIsInstance(sink, CsvSink)
+            sink.write(self.record)
+            sink.write(self.record)
+        with open(path) as handle:
+            rows = list(csv.reader(handle))
+        self.assertListEqual(rows[0], list(RECORD_FIELDS))
+        self.assertEqual(len(rows), 3)
+        self.assertListEqual([int(value) for value in rows[1]], list(self.record))
+
+    def test_ndjson_sink(self):
+        path = os.path.join(self.directory, 'games.ndjson')
+        with open_sink(path) as sink:
+            self.assertIsInstance(sink, NdjsonSink)
+            sink.write(self.record)
+        with open(path) as handle:
+            lines = handle.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertDictEqual(json.loads(lines[0]), dict(zip(RECORD_FIELDS, self.record)))
@@ -0,0 +1,126 @@
+import random
+import unittest
+from .interface import Board, Game, create_player
+from .search import AlphaBeta, TranspositionTable, Zobrist, final_value, EXACT, LOWER, WIN
+from .state import create_state
+
+
+def minimax(state, depth):
+    """plain minimax without pruning or table, the reference for the search"""
+    if state.ender is not None:
+        player1, player2 = state.scores()
+        return final_value(player2 - player1 if state.to_move else player1 - player2)
+    if depth <= 0:
+        return state.nest_difference()
+    mover = state.to_move
+    best = -10 * WIN
+    for move in state.legal_moves():
+        token = state.apply(move)
+        value = minimax(state, depth - 1)
+        best = max(best, value if state.to_move == mover else -value)
+        state.undo(token)
+    return best
+
+
+class SearchTest(unittest.TestCase):
+    """
+    Checks hashing, the table and the search itself
+    """
+
+    def test_zobrist_hash(self):
+        zobrist = Zobrist(8, 24)
+        state = create_state(3, 3)
+        key = zobrist.hash(state)
+        token = state.apply(1)
+        self.assertNotEqual(zobrist.hash(state), key)
+        state.undo(token)
+        self.assertEqual(zobrist.hash(state), key)
+        state.to_move = 1
+        self.assertEqual(zobrist.hash(state), key ^ zobrist.player2)
+
+    def test_zobrist_play_matches_hash(self):
+        rng = random.Random(4)
+        for beads, bowls in ((4, 6), (9, 3), (2, 70)):
+            state = create_state(beads, bowls)
+            zobrist = Zobrist(len(state.pits), sum(state.pits))
+            key = zobrist.hash(state)
+            while not state.is_over:
+                # laps, captures, extra turns and the end of the game all go through here
+                token, key = zobrist.play(state, rng.choice(state.legal_moves()), key)
+                self.assertEqual(key, zobrist.hash(state))
+
+    def test_table_keeps_moves_of_large_boards(self):
+        table = TranspositionTable(megabytes=0.01)
+        table.store(7, 2, 0, EXACT, 140)
+        self.assertEqual(table.moves[table.probe(7)], 140)
+
+    def test_table_replacement(self):
+        table = TranspositionTable(megabytes=0.01)
+        self.assertLessEqual(table.size * table.ENTRY_BYTES, 0.01 * 2 ** 20)
+        key = 12345
+        self.assertEqual(table.probe(key), -1)
+        table.store(key, 5, 10, EXACT, 2)
+        slot = table.probe(key)
+        self.assertEqual((table.depths[slot], table.values[slot], table.moves[slot]), (5, 10, 2))
+        # a shallower result of the same search does not push out a deeper one ...
+        table.store(key + table.size, 3, -4, LOWER, 1)
+        self.assertEqual(table.probe(key), slot)
+        # ... but it does once the entry is left over from an earlier search
+        table.new_search()
+        table.store(key + table.size, 3, -4, LOWER, 1)
+        self.assertEqual(table.probe(key), -1)
+        self.assertEqual(table.probe(key + table.size), slot)
+        self.assertAlmostEqual(table.hit_rate, 3 / 5)
+
+    def test_search_value_matches_minimax(self):
+        rng = random.Random(5)
+        for _ in range(15):
+            state = create_state(3, 4)
+            for _ in range(rng.randrange(6)):
+                if state.is_over:
+                    break
+                state.apply(rng.choice(state.legal_moves()))
+            if state.is_over:
+                continue
+            searcher = AlphaBeta(depth=3)
+            searcher.zobrist = Zobrist(len(state.pits), sum(state.pits))
+            searcher.state = state
+            self.assertEqual(searcher._search(3, -10 * WIN, 10 * WIN), minimax(state, 3))
+
+    def test_choose_takes_a_capture(self):
+        board = Board(0, 3)
+        for index, beads in enumerate([1, 0, 2, 0, 0, 9, 1, 0]):
+            board.bowls[index].beads = beads
+        searcher = AlphaBeta(depth=2)
+        self.assertEqual(searcher.choose(board, 0), 0)
+        self.assertListEqual(list(board.pits), [1, 0, 2, 0, 0, 9, 1, 0])
+        stats = searcher.stats()
+        self.assertGreater(stats['nodes'], 0)
+        self.assertEqual(stats['reached_depth'], 2)
+
+    def test_time_budget(self):
+        searcher = AlphaBeta(depth=60, time_budget=0.05)
+        move = searcher.choose(Board(6), 0)
+        self.assertIn(move, range(6))
+        self.assertLess(searcher.reached_depth, 60)
+
+    def test_strategy_three_in_games(self):
+        random.seed(2)
+        wins = 0
+        for _ in range(10):
+            game = Game(4, 3, 1)
+            game.run()
+            wins += game.winner is game.player1
+        self.assertGreaterEqual(wins, 8)
+        player = create_player('player2', Board(3), 3, AlphaBeta(depth=1))
+        self.assertEqual(player.searcher.depth, 1)
+        self.assertIn(player.get_starting_index(), range(7, 13))
+
+    def test_strategy_three_repeats_in_one_process(self):
+        # the seed played again after another game must replay the same moves
+        games = []
+        for seed in (7, 8, 7):
+            game = Game(4, 3, 1, seed=seed, record=True)
+            game.run()
+            games.append((bytes(game.moves), game.scores))
+        self.assertEqual(games[0], games[2])
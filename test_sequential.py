@@ -0,0 +1,56 @@
+import unittest
+from .parallel import run_parallel
+from .results import Tally
+from .sequential import (BayesRule, SprtRule, WilsonRule, beta_cdf, beta_quantile, normal_quantile,
+                         run_sequential, wilson_interval)
+
+
+def tally_of(wins, games):
+    tally = Tally()
+    tally.games = games
+    tally.wins['player1'] = wins
+    return tally
+
+
+class SequentialTest(unittest.TestCase):
+    """
+    Checks the intervals and that runs stop early, reproducibly
+    """
+
+    def test_intervals(self):
+        self.assertAlmostEqual(normal_quantile(0.975), 1.959964, places=5)
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(low, 0.4038, places=4)
+        self.assertAlmostEqual(high, 0.5962, places=4)
+        self.assertAlmostEqual(beta_cdf(0.5, 2, 3), 0.6875)
+        self.assertAlmostEqual(beta_cdf(0.3, 7, 2), 1 - beta_cdf(0.7, 2, 7))
+        self.assertAlmostEqual(beta_quantile(beta_cdf(0.42, 30, 40), 30, 40), 0.42, places=6)
+        # with many games the posterior and the Wilson interval nearly agree
+        bayes = BayesRule().interval(tally_of(3000, 10000))
+        wilson = WilsonRule().interval(tally_of(3000, 10000))
+        self.assertAlmostEqual(bayes[0], wilson[0], places=3)
+        self.assertAlmostEqual(bayes[1], wilson[1], places=3)
+
+    def test_rules(self):
+        rule = WilsonRule(precision=0.05)
+        self.assertFalse(rule.done(tally_of(60, 100)))
+        self.assertTrue(rule.done(tally_of(600, 1000)))
+        sprt = SprtRule(delta=0.05)
+        self.assertEqual(sprt.decision(tally_of(80, 100)), 'H1')
+        self.assertEqual(sprt.decision(tally_of(20, 100)), 'H0')
+        self.assertIsNone(sprt.decision(tally_of(50, 100)))
+        self.assertEqual(sprt.report(tally_of(80, 100))['decision'], 'H1')
+
+    def test_run_stops_early(self):
+        tally = run_sequential(100000, 4, 2, 1, SprtRule(), workers=1, seed=3, chunk_size=100)
+        self.assertLess(tally.games, 2000)
+        self.assertEqual(tally.stopping['decision'], 'H1')
+        self.assertEqual(tally.stopping['games'], tally.games)
+        # the games played are the first chunks of the full run
+        full = run_parallel(tally.games, 4, 2, 1, workers=1, seed=3, chunk_size=100)
+        self.assertEqual(full.wins, tally.wins)
+        several = run_sequential(100000, 4, 2, 1, SprtRule(), workers=2, seed=3, chunk_size=100)
+        self.assertEqual((several.games, several.wins), (tally.games, tally.wins))
+        capped = run_sequential(300, 4, 1, 1, WilsonRule(precision=0.001), workers=1, seed=3, chunk_size=100)
+        self.assertEqual(capped.games, 300)
+        self.assertFalse(capped.stopping['done'])
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from .parallel import run_parallel
+from .service import SimulationService, parse_job, simulate_remote
+
+
+async def collect(job, **address):
+    return [event async for event in simulate_remote(job, **address)]
+
+
+class ServiceTest(unittest.TestCase):
+    """
+    Runs the service on localhost and checks what its clients receive
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parse_job(self):
+        self.assertEqual(parse_job(b'{"games": 10, "beads": 4, "player1": 1, "player2": 2}\n'),
+                         (10, 4, 1, 2, None, 6))
+        for line in (b'[1]', b'{"games": 10}', b'{"games": 0, "beads": 4, "player1": 1, "player2": 2}',
+                     b'{"games": 10, "beads": 4, "player1": 5, "player2": 2}', b'not json',
+                     b'{"games": 10, "beads": 4, "player1": 1, "player2": 2, "bowls": null}',
+                     b'{"games": 10, "beads": 4, "player1": 1, "player2": 2, "seed": [1]}',
+                     b'{"games": 1e400, "beads": 4, "player1": 1, "player2": 2}', b'{"games": "ten"}',
+                     b'{"games": 10, "beads": 4, "player1": 1, "player2": 2, "seed": NaN}',
+                     b'{"games": 10, "beads": 4, "player1": 1, "player2": 2, "bowls": -1e400}'):
+            with self.assertRaises(ValueError):
+                parse_job(line)
+
+    def test_progress_and_tally(self):
+        async def scenario():
+            service = SimulationService(workers=1, chunk_size=20)
+            await service.start()
+            host, port = service.address[:2]
+            try:
+                return await collect({'games': 50, 'beads': 3, 'player1': 1, 'player2': 2, 'seed': 4},
+                                     host=host, port=port)
+            finally:
+                await service.close()
+
+        events = asyncio.run(scenario())
+        self.assertEqual(events[0]['event'], 'accepted')
+        progress = [event['played'] for event in events if event['event'] == 'progress']
+        self.assertEqual(sorted(progress), [20, 40, 50])
+        self.assertEqual(events[-1]['event'], 'done')
+        tally = events[-1]['tally']
+        expected = run_parallel(50, 3, 1, 2, workers=1, seed=4, chunk_size=20)
+        self.assertEqual(tally['games'], 50)
+        self.assertDictEqual(tally['wins'], dict(expected.wins))
+
+    def test_identical_jobs_are_joined(self):
+        path = os.path.join(self.directory, 'jonkal.sock')
+
+        async def scenario():
+            service = SimulationService(workers=1, chunk_size=25)
+            await service.start(path=path)
+            job = {'games': 100, 'beads': 4, 'player1': 2, 'player2': 1, 'seed': 9}
+            try:
+                streams = await asyncio.gather(collect(job, path=path), collect(job, path=path),
+                                               collect(dict(job, seed=10), path=path))
+            finally:
+                await service.close()
+            return service, streams
+
+        service, (first, second, other) = asyncio.run(scenario())
+        self.assertEqual(service.jobs_started, 2)
+        self.assertDictEqual(service.jobs, {})
+        self.assertEqual(first[0]['job'], second[0]['job'])
+        self.assertNotEqual(first[0]['job'], other[0]['job'])
+        self.assertTrue(first[0]['joined'] or second[0]['joined'])
+        self.assertDictEqual(first[-1]['tally'], second[-1]['tally'])
+
+    def test_refused_job(self):
+        async def scenario():
+            service = SimulationService(workers=1)
+            await service.start()
+            try:
+                return await collect({'games': 5, 'beads': 4, 'player1': 7, 'player2': 1}, port=service.address[1])
+            finally:
+                await service.close()
+
+        events = asyncio.run(scenario())
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['event'], 'error')
+
+    def test_job_of_wrong_types_gets_an_error_event(self):
+        async def scenario():
+            service = SimulationService(workers=1)
+            await service.start()
+            job = {'games': 5, 'beads': 4, 'player1': 1, 'player2': 1}
+            try:
+                return await asyncio.gather(collect(dict(job, bowls=None), port=service.address[1]),
+                                            collect(dict(job, seed=[1]), port=service.address[1]))
+            finally:
+                await service.close()
+
+        for events in asyncio.run(scenario()):
+            self.assertEqual([event['event'] for event in events], ['error'])
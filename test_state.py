@@ -0,0 +1,87 @@
+import random
+import unittest
+import numpy as np
+from .interface import Board
+from .batch import BatchGame
+from .state import State, create_state
+
+
+class StateTest(unittest.TestCase):
+    """
+    Plays random move sequences forwards and backwards
+    """
+
+    def snapshot(self, state):
+        return list(state.pits), list(state.sums), state.to_move, state.pending, state.ender
+
+    def test_starting_position(self):
+        state = create_state(4, 3)
+        self.assertListEqual(state.legal_moves(), [0, 1, 2])
+        self.assertEqual(state.to_move, 0)
+        self.assertFalse(state.is_over)
+
+    def test_extra_turn_keeps_the_move(self):
+        state = create_state(3, 3)
+        token = state.apply(0)
+        self.assertEqual(state.to_move, 0)
+        self.assertTrue(state.pending)
+        self.assertListEqual(list(state.pits), [0, 4, 4, 1, 3, 3, 3, 0])
+        state.undo(token)
+        self.assertListEqual(list(state.pits), [3, 3, 3, 0, 3, 3, 3, 0])
+        self.assertFalse(state.pending)
+
+    def test_from_board_copies(self):
+        board = Board(3, 4)
+        state = State.from_board(board, to_move=1)
+        state.apply(state.legal_moves()[0])
+        self.assertListEqual(list(board.pits), [3, 3, 3, 3, 0, 3, 3, 3, 3, 0])
+
+    def test_matches_batch_engine_and_undoes_exactly(self):
+        rng = random.Random(3)
+        for index in range(100):
+            beads, bowls = 3 + index % 6, 3 + index % 4
+            state = create_state(beads, bowls)
+            batch = BatchGame(1, beads, bowls)
+            start = self.snapshot(state)
+            history = []
+            while not state.is_over:
+                move = rng.choice(state.legal_moves())
+                before = self.snapshot(state)
+                history.append((state.apply(move), before))
+                batch.step([move])
+                self.assertEqual(state.is_over, not batch.active[0])
+                if not state.is_over:
+                    # a finished batch game empties the non ending player's bowls, a state keeps them
+                    self.assertListEqual(list(state.pits), batch.pits[0].tolist())
+                    self.assertEqual(state.to_move, batch.to_move[0])
+            player1, player2 = state.scores()
+            self.assertListEqual([player1, player2], batch.scores[0].tolist())
+            while history:
+                token, before = history.pop()
+                state.undo(token)
+                self.assertEqual(self.snapshot(state), before)
+            self.assertEqual(self.snapshot(state), start)
+
+    def test_large_bowls_undo(self):
+        """moves with whole laps and captures of big bowls come back exactly"""
+        state = create_state(20, 3)
+        start = self.snapshot(state)
+        tokens = [state.apply(move) for move in (0, 5, 1)]
+        for token in reversed(tokens):
+            state.undo(token)
+        self.assertEqual(self.snapshot(state), start)
+        self.assertTrue(np.array_equal(state.pits, Board(20, 3).pits))
+
+    def test_wide_board_undo(self):
+        """bowl indices past 255 fit the move field of the token"""
+        rng = random.Random(5)
+        state = create_state(2, 200)
+        history = []
+        for _ in range(60):
+            before = self.snapshot(state)
+            history.append((state.apply(rng.choice(state.legal_moves())), before))
+        self.assertTrue(any(before[2] == 1 for _, before in history))
+        while history:
+            token, before = history.pop()
+            state.undo(token)
+            self.assertEqual(self.snapshot(state), before)
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from . import strategies
+from .batch import play_batch
+from .interface import Board, Game, create_player
+from .strategies import NO_MOVE, FullestBowl, RandomBowl, Strategy, get_strategy, register_strategy, strategy_ids
+
+
+class LeftmostBowl(Strategy):
+    """a plug in without a vectorized form: the first bowl holding beads"""
+    name = 'leftmost bowl'
+
+    def choose(self, player):
+        for index in range(player.bowls_range_start, player.nest):
+            if player.board.pits[index]:
+                return index
+
+
+class StrategiesTest(unittest.TestCase):
+    """
+    Checks the registry and that the batch policies pick what the single board ones may
+    """
+
+    def setUp(self):
+        self.rng = np.random.default_rng(2)
+
+    def plug_in(self, strategy_id=9):
+        register_strategy(strategy_id, LeftmostBowl())
+        self.addCleanup(strategies._strategies.pop, strategy_id)
+
+    def test_registry(self):
+        self.assertListEqual(strategy_ids(), [1, 2, 3, 4])
+        self.assertIsInstance(get_strategy(1), RandomBowl)
+        self.assertIsInstance(get_strategy(2), FullestBowl)
+        with self.assertRaises(ValueError):
+            get_strategy(9)
+        self.plug_in()
+        self.assertIn(9, strategy_ids())
+        game = Game(4, 9, 1, seed=3)
+        game.run()
+        self.assertIsNone(game.current_player)
+
+    def test_random_bowl_batch(self):
+        pits = np.array([[0, 3, 0, 1, 0, 2, 5, 1, 1, 1, 1, 1, 1, 0],
+                         [0, 0, 0, 0, 0, 0, 9, 4, 0, 0, 0, 0, 1, 0]])
+        to_move = np.array([0, 1])
+        moves = get_strategy(1).choose_batch(np.repeat(pits, 500, axis=0), np.repeat(to_move, 500), self.rng)
+        self.assertSetEqual(set(moves[:500].tolist()), {1, 3, 5})
+        self.assertSetEqual(set(moves[500:].tolist()), {7, 12})
+        self.assertListEqual(get_strategy(1).choose_batch(pits, np.array([1, 0]), self.rng).tolist()[1:], [NO_MOVE])
+
+    def test_fullest_bowl_batch_breaks_ties_at_random(self):
+        pits = np.tile([2, 5, 1, 5, 0, 0, 0, 4, 4, 4, 4, 4, 4, 0], (4000, 1))
+        moves = get_strategy(2).choose_batch(pits, np.zeros(4000, dtype=np.int8), self.rng)
+        self.assertSetEqual(set(moves.tolist()), {1, 3})
+        self.assertAlmostEqual(float(np.mean(moves == 1)), 0.5, delta=0.05)
+        # with the whole side empty every bowl is among the fullest, as in FullestBowl.choose
+        empty = get_strategy(2).choose_batch(np.zeros((100, 14), dtype=np.int32), np.ones(100, dtype=np.int8), self.rng)
+        self.assertTrue(((empty >= 7) & (empty < 13)).all())
+
+    def test_fallback_batch_matches_choose(self):
+        strategy = LeftmostBowl()
+        batch = play_batch(20, 4, 1, 1, np.random.default_rng(5))
+        pits = np.array([[0, 0, 3, 1, 0, 2, 5, 1, 1, 1, 1, 1, 1, 0], batch.pits[0]])
+        moves = strategy.choose_batch(pits, np.array([0, 1]), self.rng)
+        board = Board(0)
+        for index, beads in enumerate(pits[0].tolist()):
+            board.set_beads(index, beads)
+        self.assertEqual(moves[0], strategy.choose(create_player('player1', board, 9)))
+        # a finished game has nothing left on either side
+        self.assertEqual(moves[1], NO_MOVE)
+
+    def test_batch_game_with_plug_in(self):
+        self.plug_in()
+        batch = play_batch(30, 3, 9, 2, np.random.default_rng(1))
+        self.assertFalse(batch.active.any())
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from . import strategies
+from .parallel import run_parallel
+from .strategies import Strategy, register_strategy
+from .tournament import Cache, cell_key, code_version, format_matrix, run_tournament
+
+
+class Failing(Strategy):
+    """a plug in that breaks the game it plays in"""
+    name = 'failing'
+
+    def choose(self, player):
+        raise RuntimeError('broken strategy')
+
+
+class TournamentTest(unittest.TestCase):
+    """
+    Checks the matrices and that cached cells are not played again
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_matrix_matches_single_runs(self):
+        matrices = run_tournament((1, 2), beads=(3,), bowls=(4, 6), games=60, seed=3, workers=1, chunk_size=25)
+        self.assertListEqual(sorted(matrices), [(3, 4), (3, 6)])
+        matrix = matrices[(3, 4)]
+        self.assertListEqual(matrix['games'], [[60, 60], [60, 60]])
+        single = run_parallel(60, 3, 2, 1, workers=1, seed=[3, 2, 1, 3, 4], chunk_size=25, num_of_bowls_per_player=4)
+        self.assertEqual(matrix['win_rate'][1][0], single.win_rate('player1'))
+        self.assertIn('beads 3 bowls 4', format_matrix(matrix))
+
+    def test_cache(self):
+        cache_dir = os.path.join(self.directory, 'cache')
+        first = run_tournament((1, 2), beads=(4,), games=40, workers=1, cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 4)
+        cache = Cache(cache_dir)
+        key = cell_key(1, 2, 4, 6, seed=0, games=40, version=code_version())
+        result = cache.load(key)
+        self.assertEqual(result['games'], 40)
+        # a doctored entry shows that a rerun reads the cache instead of playing
+        result['win_rate']['player1'] = 0.5
+        cache.store(key, result)
+        again = run_tournament((1, 2), beads=(4,), games=40, workers=1, cache_dir=cache_dir)
+        self.assertEqual(again[(4, 6)]['win_rate'][0][1], 0.5)
+        self.assertEqual(again[(4, 6)]['win_rate'][1][0], first[(4, 6)]['win_rate'][1][0])
+        # another number of games, or another version of the code, is a different cell
+        self.assertIsNone(cache.load(cell_key(1, 2, 4, 6, seed=0, games=41, version=code_version())))
+        self.assertIsNone(cache.load(cell_key(1, 2, 4, 6, seed=0, games=40, version='old')))
+
+    def test_cells_are_cached_as_they_finish(self):
+        register_strategy(9, Failing())
+        self.addCleanup(strategies._strategies.pop, 9)
+        cache_dir = os.path.join(self.directory, 'cache')
+        # the cells are played in order, the second one pairs strategy 1 with the failing one
+        with self.assertRaises(RuntimeError):
+            run_tournament((1, 9), beads=(4,), games=40, workers=1, chunk_size=15, cache_dir=cache_dir)
+        cache = Cache(cache_dir)
+        self.assertEqual(cache.load(cell_key(1, 1, 4, 6, seed=0, games=40, version=code_version()))['games'], 40)
+        self.assertIsNone(cache.load(cell_key(1, 9, 4, 6, seed=0, games=40, version=code_version())))
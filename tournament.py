@@ -0,0 +1,158 @@
+"""
+Round robin tournaments over a grid of strategies, bead counts and board sizes
+Actions include:
+    playing every (player1 strategy, player2 strategy) pair for every board configuration, with
+        the chunks of all cells spread over a single pool of worker processes
+    caching each cell's tally on disk, keyed by the cell, the seed, the number of games and the
+        version of the code, so a rerun only plays the cells that are missing or stale
+    one win rate matrix per (beads per bowl, bowls per player) configuration
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+
+from .fingerprint import code_version
+from .parallel import chunk_count, chunk_tasks, play_chunk
+from .results import Tally
+
+
+def cell_key(player1_strat, player2_strat, beads_per_bowl, num_of_bowls_per_player, seed, games, version):
+    """:returns: the cache key of a cell, as a dict of plain data"""
+    return {'player1': player1_strat, 'player2': player2_strat, 'beads': beads_per_bowl,
+            'bowls': num_of_bowls_per_player, 'seed': seed, 'games': games, 'version': version}
+
+
+class Cache:
+    """
+    A directory of json files, one per cell, named after a digest of the cell's key
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return "<Cache directory: %s>" % self.directory
+
+    def path(self, key):
+        name = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:24]
+        return os.path.join(self.directory, name + '.json')
+
+    def load(self, key):
+        """:returns: the summary stored for key, None when it is missing or unreadable"""
+        try:
+            with open(self.path(key)) as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        return entry['result'] if entry.get('key') == key else None
+
+    def store(self, key, result):
+        """writes the summary of key atomically, so an interrupted sweep leaves no broken entry"""
+        path = self.path(key)
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump({'key': key, 'result': result}, handle, sort_keys=True)
+        os.replace(temporary, path)
+
+
+def _play_cell_chunk(task):
+    """:returns: (cell, tally) of one chunk of a cell, executed in a worker process"""
+    cell, chunk = task
+    return cell, play_chunk(chunk)[0]
+
+
+def run_tournament(strategies=(1, 2), beads=(3, 4, 5, 6), bowls=(6,), games=1000, seed=0, workers=None,
+                   chunk_size=1000, cache_dir=None, log=None):
+    """
+    :param strategies: strategies meeting each other, every ordered pair is a cell
+    :param beads: beads per bowl of the configurations
+    :param bowls: bowls per player of the configurations
+    :param games: games per cell
+    :param seed: seed of the tournament; each cell draws its own stream from it and its
+        configuration, so a cell gives the same tally whichever other cells are played
+    :param workers: number of worker processes, defaults to the number of cpus; 1 runs in process
+    :param cache_dir: optional directory of cached cells, read before playing and written as soon
+        as a cell's last chunk is in, so the cells finished before an interruption are kept
+    :param log: optional file receiving a line per cell
+    :returns: dict of {(beads, bowls): matrix} where matrix is as returned by win_rate_matrix
+    """
+    version = code_version()
+    cache = Cache(cache_dir) if cache_dir else None
+    cells = [(player1_strat, player2_strat, beads_per_bowl, num_of_bowls_per_player)
+             for beads_per_bowl in beads for num_of_bowls_per_player in bowls
+             for player1_strat in strategies for player2_strat in strategies]
+    results = {}
+    tasks = []
+    tallies = {}
+    left = {}  # chunks of each cell still to be merged
+    for cell in cells:
+        key = cell_key(*cell, seed=seed, games=games, version=version)
+        cached = cache.load(key) if cache is not None else None
+        if cached is not None:
+            results[cell] = cached
+            continue
+        player1_strat, player2_strat, beads_per_bowl, num_of_bowls_per_player = cell
+        entropy, chunks = chunk_tasks(games, beads_per_bowl, player1_strat, player2_strat,
+                                      [seed, player1_strat, player2_strat, beads_per_bowl, num_of_bowls_per_player],
+                                      chunk_size, num_of_bowls_per_player=num_of_bowls_per_player)
+        tallies[cell] = Tally()
+        tallies[cell].seed = entropy
+        left[cell] = chunk_count(games, chunk_size)
+        tasks.extend((cell, chunk) for chunk in chunks)
+
+    def finish(cell):
+        results[cell] = tallies[cell].as_dict()
+        if cache is not None:
+            cache.store(cell_key(*cell, seed=seed, games=games, version=version), results[cell])
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        outcomes = map(_play_cell_chunk, tasks)
+        _merge_cells(outcomes, tallies, left, finish)
+    else:
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            _merge_cells(pool.imap_unordered(_play_cell_chunk, tasks), tallies, left, finish)
+    if log is not None:
+        for cell in cells:
+            print("player1 {} vs player2 {}, beads {}, bowls {}: player1 wins {:.1%}{}".format(
+                *cell, results[cell]['win_rate']['player1'], '' if cell in tallies else ' (cached)'), file=log)
+
+    return {(beads_per_bowl, num_of_bowls_per_player): win_rate_matrix(results, strategies, beads_per_bowl,
+                                                                       num_of_bowls_per_player)
+            for beads_per_bowl in beads for num_of_bowls_per_player in bowls}
+
+
+def _merge_cells(outcomes, tallies, left, finish):
+    """merges chunk tallies into the tally of their cell, calling finish(cell) once the last one is in"""
+    for cell, tally in outcomes:
+        tallies[cell].merge(tally)
+        left[cell] -= 1
+        if not left[cell]:
+            finish(cell)
+
+
+def win_rate_matrix(results, strategies, beads_per_bowl, num_of_bowls_per_player):
+    """
+    :param results: {cell: Tally.as_dict()} of every cell of the configuration
+    :returns: dict with the strategies and, as lists of rows, player1's win rate and the
+        draw rate for player1 playing the row strategy against player2 playing the column one
+    """
+    rows = [[results[(player1_strat, player2_strat, beads_per_bowl, num_of_bowls_per_player)]
+             for player2_strat in strategies] for player1_strat in strategies]
+    return {'beads': beads_per_bowl, 'bowls': num_of_bowls_per_player, 'strategies': list(strategies),
+            'games': [[cell['games'] for cell in row] for row in rows],
+            'win_rate': [[cell['win_rate']['player1'] for cell in row] for row in rows],
+            'draw_rate': [[cell['draws'] / cell['games'] if cell['games'] else 0.0 for cell in row]
+                          for row in rows]}
+
+
+def format_matrix(matrix):
+    """:returns: the win rate matrix as text, player1's strategies down and player2's across"""
+    strategies = matrix['strategies']
+    lines = ["beads {} bowls {}: player1 win rate".format(matrix['beads'], matrix['bowls']),
+             "p1 \\ p2 " + "".join("{:>8}".format(strategy) for strategy in strategies)]
+    for strategy, row in zip(strategies, matrix['win_rate']):
+        lines.append("{:>7} ".format(strategy) + "".join("{:>8.3f}".format(rate) for rate in row))
+    return "\n".join(lines)